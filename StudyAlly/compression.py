@@ -0,0 +1,117 @@
+import re
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# text, JSON, XML, JavaScript and SVG; images, audio, video and archives are compressed already
+COMPRESSIBLE_TYPE = re.compile(r"^(text/|application/(json|javascript|xml|[^;]*\+json|[^;]*\+xml)|image/svg\+xml)", re.I)
+
+
+class Gzip:
+    encoding = "gzip"
+
+    def __init__(self, level):
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class Brotli:
+    encoding = "br"
+
+    def __init__(self, level):
+        self.compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+class Zstd:
+    encoding = "zstd"
+
+    def __init__(self, level):
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+# brotli and zstd need the brotli and zstandard packages
+CODECS = {codec.encoding: codec for codec, module in ((Gzip, zlib), (Brotli, brotli), (Zstd, zstandard)) if module}
+
+
+def negotiate(accept_encoding, encodings):
+    """The encoding in `encodings` the client accepts with the highest q-value,
+    ties going to the earlier one, or None."""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name:
+            accepted[name.lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(codec, level, data):
+    compressor = codec(level)
+    return compressor.compress(data) + compressor.finish()
+
+
+def compress_stream(codec, level, chunks):
+    # flushed per chunk so streamed responses still arrive as they're produced
+    compressor = codec(level)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def acompress_stream(codec, level, chunks):
+    compressor = codec(level)
+    async for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
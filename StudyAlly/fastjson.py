@@ -0,0 +1,62 @@
+import codecs
+import io
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # the stdlib json classes take over
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer on orjson.
+
+    With the default JSON settings (compact, unicode) the output is byte for
+    byte what JSONRenderer produces: datetimes, dates and times are encoded
+    natively in the same ISO 8601 form, anything else orjson can't encode
+    goes through DRF's JSONEncoder.default, and \\u2028/\\u2029 are escaped.
+    Indented output, ensure_ascii and whatever orjson refuses (e.g. integers
+    over 64 bits) are left to JSONRenderer. The known differences are floats
+    in exponent notation (1e16 rather than 1e+16) and NaN, which becomes
+    null instead of an error; no serializer here produces either.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        if orjson is None or self.ensure_ascii or not self.compact \
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        return ret.replace("\u2028".encode(), b"\\u2028").replace("\u2029".encode(), b"\\u2029")
+
+
+class ORJSONParser(JSONParser):
+    """JSONParser on orjson. Bodies orjson rejects are re-parsed with json,
+    so the ParseError reads as it always has. Unlike json, orjson reads
+    integers past 64 bits as floats; nothing here accepts those anyway."""
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+
+        encoding = (parser_context or {}).get("encoding", settings.DEFAULT_CHARSET)
+        body = stream.read()
+        try:
+            return orjson.loads(body if codecs.lookup(encoding).name == "utf-8" else body.decode(encoding))
+        except (orjson.JSONDecodeError, UnicodeDecodeError):
+            # also accepts what orjson doesn't, like NaN without STRICT_JSON
+            return super().parse(io.BytesIO(body), media_type, parser_context)
@@ -0,0 +1,96 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+
+# fields whose to_representation returns database values unchanged
+PASSTHROUGH_FIELDS = (
+    serializers.IntegerField, serializers.CharField, serializers.BooleanField, serializers.ChoiceField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+class CompiledSerializer:
+    """Read-only, dict-building twin of a flat ModelSerializer.
+
+    The serializer's readable fields are turned into a single generated
+    function over `.values()` rows once, at import time, so listing rows
+    builds no model instances, bound fields or ReturnDicts. Fields that
+    don't pass database values through as they are go through the DRF
+    field's own to_representation, so the output is the same as the
+    serializer's.
+
+        notifications = CompiledSerializer(NotificationSerializer)
+        notifications.serialize(Notification.objects.filter(user=user))
+    """
+
+    def __init__(self, serializer_class):
+        if serializer_class.to_representation is not serializers.ModelSerializer.to_representation:
+            raise ImproperlyConfigured(f"{serializer_class.__name__} overrides to_representation")
+
+        namespace, items = {}, []
+        self.sources = []
+        for field in serializer_class()._readable_fields:
+            if field.source == "*" or "." in field.source:
+                raise ImproperlyConfigured(f"{serializer_class.__name__}.{field.field_name} isn't a model column")
+
+            self.sources.append(field.source)
+            value = f"row[{field.source!r}]"
+            converter, arguments = self.converter(field), "value"
+            if type(field) is serializers.DateTimeField and converter is not field.to_representation:
+                arguments = "value, current_timezone"
+            if converter is not None:
+                # DRF leaves None alone too
+                namespace[f"convert_{field.field_name}"] = converter
+                value = f"(None if (value := {value}) is None else convert_{field.field_name}({arguments}))"
+            items.append(f"{field.field_name!r}: {value}")
+
+        exec(f"def to_representation(row, current_timezone):\n    return {{{', '.join(items)}}}", namespace)
+        self.row_to_representation = namespace["to_representation"]
+
+    def converter(self, field):
+        if type(field) in PASSTHROUGH_FIELDS:
+            return None
+
+        default_format = {
+            serializers.DateTimeField: api_settings.DATETIME_FORMAT,
+            serializers.DateField: api_settings.DATE_FORMAT,
+            serializers.TimeField: api_settings.TIME_FORMAT,
+        }.get(type(field))
+        output_format = getattr(field, "format", default_format)
+        if default_format is None or output_format is None or output_format.lower() != ISO_8601:
+            return field.to_representation
+
+        if type(field) is serializers.DateTimeField:
+            own_timezone = hasattr(field, "timezone")
+
+            def datetime_representation(value, current_timezone):
+                field_timezone = field.timezone if own_timezone else current_timezone
+                if field_timezone is not None and value.utcoffset() is not None:
+                    value = value.astimezone(field_timezone)
+                else:
+                    value = field.enforce_timezone(value)
+                value = value.isoformat()
+                return value[:-6] + "Z" if value.endswith("+00:00") else value
+            return datetime_representation
+        return lambda value: value.isoformat()
+
+    def current_timezone(self):
+        # DateTimeField looks this up for every value, once per call is enough
+        return timezone.get_current_timezone() if settings.USE_TZ else None
+
+    def to_representation(self, row):
+        return self.row_to_representation(row, self.current_timezone())
+
+    def values(self, queryset):
+        return queryset.values(*self.sources)
+
+    def serialize(self, queryset):
+        current_timezone = self.current_timezone()
+        return [self.row_to_representation(row, current_timezone) for row in self.values(queryset)]
+
+    async def aserialize(self, queryset):
+        current_timezone = self.current_timezone()
+        return [self.row_to_representation(row, current_timezone) async for row in self.values(queryset)]
@@ -0,0 +1,126 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+
+# placeholders lists of any length and inline literals collapse to one shape
+IN_LIST_REGEX = re.compile(r"\((?:%s,\s*)+%s\)")
+STRING_REGEX = re.compile(r"'(?:[^']|'')*'")
+NUMBER_REGEX = re.compile(r"\b\d+\b")
+
+
+def fingerprint(sql):
+    sql = IN_LIST_REGEX.sub("(%s, ...)", sql)
+    sql = STRING_REGEX.sub("?", sql)
+    return NUMBER_REGEX.sub("?", sql)
+
+
+class QueryMetrics:
+    """execute_wrapper counting the queries of one request and their DB time.
+
+    Statements slower than `slow_threshold` seconds are kept in `slow` as
+    (alias, sql, params, seconds) so they can be explained after the request.
+    """
+
+    def __init__(self, slow_threshold=None):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self.slow_threshold = slow_threshold
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.duration += elapsed
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+            if self.slow_threshold is not None and elapsed >= self.slow_threshold and not many:
+                self.slow.append((context["connection"].alias, sql, params, elapsed))
+
+    @property
+    def duplicates(self):
+        # the same query shape run more than once usually means an N+1 loop
+        return {sql: count for sql, count in self.fingerprints.items() if count > 1}
+
+    @property
+    def repeated(self):
+        # queries beyond the first of their shape
+        return sum(count - 1 for count in self.duplicates.values())
+
+
+_slow_query_handler = None
+# when each fingerprint was last explained, see SLOW_QUERY_EXPLAIN_INTERVAL
+_explained_at = {}
+_explained_lock = threading.Lock()
+
+
+def get_slow_query_logger():
+    # built lazily so the log directory only appears once something is slow
+    global _slow_query_handler
+    logger = logging.getLogger("StudyAlly.slow_queries")
+    path = os.path.abspath(settings.SLOW_QUERY_LOG)
+    if _slow_query_handler is None or _slow_query_handler.baseFilename != path:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handler = RotatingFileHandler(path, maxBytes=settings.SLOW_QUERY_LOG_MAX_BYTES, backupCount=settings.SLOW_QUERY_LOG_BACKUPS)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        if _slow_query_handler is not None:
+            logger.removeHandler(_slow_query_handler)
+            _slow_query_handler.close()
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        _slow_query_handler = handler
+    return logger
+
+
+def should_explain(sql_fingerprint):
+    now = time.monotonic()
+    with _explained_lock:
+        last = _explained_at.get(sql_fingerprint)
+        if last is not None and now - last < settings.SLOW_QUERY_EXPLAIN_INTERVAL:
+            return False
+        _explained_at[sql_fingerprint] = now
+        return True
+
+
+def explain(alias, sql, params):
+    connection = connections[alias]
+    prefix = "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN "
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            return [str(row[-1]) for row in cursor.fetchall()]
+    except Exception as exc:
+        return [f"EXPLAIN failed: {exc}"]
+
+
+def log_slow_queries(view_name, metrics):
+    """Write one JSON line per slow statement; parameters are not logged.
+
+    The plan is null when the same query shape was explained recently.
+    """
+    logger = get_slow_query_logger()
+    for alias, sql, params, elapsed in metrics.slow:
+        sql_fingerprint = fingerprint(sql)
+        logger.info(json.dumps({
+            "time": timezone.now().isoformat(),
+            "view": view_name,
+            "database": alias,
+            "duration_ms": round(elapsed * 1000, 3),
+            "fingerprint": sql_fingerprint,
+            "sql": sql,
+            "plan": explain(alias, sql, params) if should_explain(sql_fingerprint) else None,
+        }))
@@ -0,0 +1,143 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+
+# names carrying a content hash (e.g. avatar.3f2a9c1b7d4e.jpg) never change
+HASHED_NAME_REGEX = re.compile(r"\.[0-9a-f]{12,}\.[^./]+$")
+RANGE_REGEX = re.compile(r"^bytes=(\d*)-(\d*)$")
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+
+class RangeFile:
+    """File wrapper that stops reading after `length` bytes.
+
+    It keeps `fileno()` so WSGI servers can still sendfile() the range
+    starting from the current offset, bounded by Content-Length.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def get_cache_control(path):
+    if HASHED_NAME_REGEX.search(path):
+        return f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    return f"public, max-age={settings.MEDIA_CACHE_MAX_AGE}"
+
+
+def parse_range(header, size):
+    # only single byte ranges are supported, anything else gets the full file
+    match = RANGE_REGEX.match(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+
+    first, last = match.groups()
+    if first == "":
+        # suffix range: the last N bytes
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+
+    if start >= size or start > end:
+        raise ValueError("Unsatisfiable range")
+    return start, end
+
+
+def if_range_passes(request, etag, last_modified):
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if not if_range:
+        return True
+    if if_range.startswith(('"', "W/")):
+        return parse_etags(if_range) == [etag]
+    return parse_http_date_safe(if_range) == last_modified
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat = os.stat(full_path)
+    except (OSError, ValueError, SuspiciousFileOperation):
+        raise Http404("File not found")
+    if not os.path.isfile(full_path):
+        raise Http404("File not found")
+
+    size = stat.st_size
+    last_modified = int(stat.st_mtime)
+    etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(last_modified),
+        "Cache-Control": get_cache_control(path),
+        "Accept-Ranges": "bytes",
+    }
+
+    # answer revalidations from the stat() alone
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=last_modified, response=HttpResponse(headers=headers)
+    )
+    if not_modified.status_code != 200:
+        return not_modified
+
+    content_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+
+    # let the fronting proxy stream the file
+    backend = settings.MEDIA_SENDFILE_BACKEND
+    if backend == "nginx":
+        # nginx decodes the URI, so spaces, "%", "?" and non-ASCII names survive
+        headers["X-Accel-Redirect"] = settings.MEDIA_SENDFILE_URL + quote(path)
+        return HttpResponse(content_type=content_type, headers=headers)
+    if backend == "apache":
+        headers["X-Sendfile"] = full_path
+        return HttpResponse(content_type=content_type, headers=headers)
+
+    byte_range = None
+    range_header = request.META.get("HTTP_RANGE")
+    if range_header and if_range_passes(request, etag, last_modified):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            headers["Content-Range"] = f"bytes */{size}"
+            return HttpResponse(status=416, headers=headers)
+
+    file = open(full_path, "rb")
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, end = byte_range
+        response = FileResponse(RangeFile(file, start, end - start + 1), content_type=content_type, status=206)
+        response["Content-Length"] = end - start + 1
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    for header, value in headers.items():
+        response[header] = value
+    return response
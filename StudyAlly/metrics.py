@@ -0,0 +1,323 @@
+import atexit
+import glob
+import hmac
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_safe
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Registry:
+    """Metric values of this process.
+
+    With METRICS_DIR set every worker periodically writes its values to
+    METRICS_DIR/<pid>-<start time>.json and a scrape merges the files, so
+    counters and histograms add up across pre-fork workers, while gauges only
+    count live workers. The files of workers that exited are folded into
+    METRICS_DIR/archive.json and removed, which keeps their counts without
+    the directory growing with every restart.
+    """
+
+    def __init__(self):
+        self.metrics = []
+        self.values = {"counter": {}, "gauge": {}, "histogram": {}}
+        self.lock = threading.Lock()
+        self.last_flush = 0.0
+
+    def register(self, metric):
+        self.metrics.append(metric)
+
+    def add(self, kind, key, amount):
+        with self.lock:
+            self.values[kind][key] = self.values[kind].get(key, 0) + amount
+
+    def observe(self, key, buckets, value):
+        with self.lock:
+            # one slot per bucket plus +Inf, then the sum
+            counts = self.values["histogram"].setdefault(key, [0] * (len(buckets) + 2))
+            counts[bisect_left(buckets, value)] += 1
+            counts[-1] += value
+
+    def path(self, name):
+        return os.path.join(settings.METRICS_DIR, f"{name}.json")
+
+    def flush(self):
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        with self.lock:
+            data = json.dumps(self.values)
+            self.last_flush = time.monotonic()
+        write_atomic(self.path(process_name(os.getpid())), data)
+
+    def maybe_flush(self):
+        if settings.METRICS_DIR and time.monotonic() - self.last_flush >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def collect(self):
+        if not settings.METRICS_DIR:
+            with self.lock:
+                return json.loads(json.dumps(self.values))
+
+        self.flush()
+        merged = {"counter": {}, "gauge": {}, "histogram": {}}
+        with directory_lock(settings.METRICS_DIR):
+            archive = self.archive_exited()
+            merge_values(merged, archive)
+            for name, values in self.worker_files():
+                if name not in archive["files"]:
+                    merge_values(merged, values, gauges=True)
+        return merged
+
+    def worker_files(self):
+        for path in glob.glob(self.path("*-*")):
+            try:
+                with open(path) as file:
+                    yield os.path.basename(path), json.load(file)
+            except (OSError, ValueError):
+                continue
+
+    def archive_exited(self):
+        """Fold the files of exited workers into the archive and return it."""
+        archive_path = self.path("archive")
+        try:
+            with open(archive_path) as file:
+                archive = json.load(file)
+        except (OSError, ValueError):
+            archive = {"counter": {}, "histogram": {}, "files": []}
+
+        exited = [(name, values) for name, values in self.worker_files() if not process_alive(name[:-len(".json")])]
+        if not exited:
+            return archive
+
+        for name, values in exited:
+            # files already listed were counted before, but removing them failed
+            if name not in archive["files"]:
+                merge_values(archive, values)
+                archive["files"].append(name)
+        write_atomic(archive_path, json.dumps(archive))
+
+        for name, _ in exited:
+            try:
+                os.remove(os.path.join(settings.METRICS_DIR, name))
+            except OSError:
+                pass
+        archive["files"] = [name for name in archive["files"] if os.path.exists(os.path.join(settings.METRICS_DIR, name))]
+        write_atomic(archive_path, json.dumps(archive))
+        return archive
+
+    def render(self):
+        values = self.collect()
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render(values[metric.kind]))
+        return "\n".join(lines) + "\n"
+
+
+def merge_values(merged, values, gauges=False):
+    for key, value in values["counter"].items():
+        merged["counter"][key] = merged["counter"].get(key, 0) + value
+    if gauges:
+        for key, value in values["gauge"].items():
+            merged["gauge"][key] = merged["gauge"].get(key, 0) + value
+    for key, counts in values["histogram"].items():
+        total = merged["histogram"].setdefault(key, [0] * len(counts))
+        for index, count in enumerate(counts):
+            total[index] += count
+
+
+def write_atomic(path, data):
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as file:
+        file.write(data)
+    os.replace(temp_path, path)
+
+
+@contextmanager
+def directory_lock(directory):
+    # scrapes of different workers must not archive the same files twice
+    with open(os.path.join(directory, ".lock"), "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def process_start_time(pid):
+    """Start time of a process in clock ticks since boot, None where /proc isn't available."""
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            # the command name in parentheses may contain spaces
+            return stat.read().rpartition(")")[2].split()[19]
+    except OSError:
+        return None
+
+
+_process_names = {}
+
+
+def process_name(pid):
+    # the start time tells a process apart from a later one that got the same pid
+    if pid not in _process_names:
+        _process_names[pid] = f"{pid}-{process_start_time(pid) or time.time_ns()}"
+    return _process_names[pid]
+
+
+def process_alive(name):
+    pid, _, start_time = name.partition("-")
+    if not pid.isdigit() or not pid_alive(int(pid)):
+        return False
+    current = process_start_time(pid)
+    return current is None or current == start_time
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labels, **extra):
+    labels = {**labels, **extra}
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in labels.items()) + "}"
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = frozenset(labelnames)
+        (registry or REGISTRY).register(self)
+        self.registry = registry or REGISTRY
+
+    def key(self, labels):
+        if labels.keys() != self.labelnames:
+            raise ValueError(f"{self.name} takes the labels {sorted(self.labelnames)}, got {sorted(labels)}")
+        return json.dumps([self.name, sorted(labels.items())])
+
+    def samples(self, values):
+        for key, value in sorted(values.items()):
+            name, labels = json.loads(key)
+            if name == self.name:
+                yield dict(labels), value
+
+    def render(self, values):
+        samples = list(self.samples(values))
+        if not samples and not self.labelnames:
+            # unlabelled metrics start at zero instead of being absent, labelled ones have no series yet
+            return [f"{self.name} 0"]
+        return [f"{self.name}{format_labels(labels)} {format_value(value)}" for labels, value in samples]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        self.registry.add(self.kind, self.key(labels), amount)
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, amount=1, **labels):
+        self.registry.add(self.kind, self.key(labels), amount)
+
+    def dec(self, amount=1, **labels):
+        self.registry.add(self.kind, self.key(labels), -amount)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        self.registry.observe(self.key(labels), self.buckets, value)
+
+    def render(self, values):
+        lines = []
+        for labels, counts in self.samples(values):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{format_labels(labels, le=bound)} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(labels)} {format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{format_labels(labels)} {cumulative}")
+        return lines
+
+
+REGISTRY = Registry()
+
+REQUESTS = Counter("studyally_http_requests_total", "HTTP requests by route, method and status code.", ("route", "method", "status"))
+REQUEST_LATENCY = Histogram("studyally_http_request_duration_seconds", "HTTP request latency by route and method.", ("route", "method"))
+REQUESTS_IN_PROGRESS = Gauge("studyally_http_requests_in_progress", "HTTP requests being handled.")
+DB_QUERIES = Counter("studyally_db_queries_total", "Database queries by route.", ("route",))
+DB_QUERY_SECONDS = Counter("studyally_db_query_seconds_total", "Time spent in database queries by route.", ("route",))
+DB_QUERIES_PER_REQUEST = Histogram(
+    "studyally_db_queries_per_request", "Database queries per request by route.", ("route",), buckets=(1, 2, 5, 10, 20, 50, 100, 200)
+)
+DB_REPEATED_QUERIES = Counter(
+    "studyally_db_repeated_queries_total", "Queries repeating the shape of an earlier query of the same request, by route.", ("route",)
+)
+NOTIFICATIONS_CREATED = Counter("studyally_notifications_created_total", "Notifications created.")
+RECOMMENDATIONS_SERVED = Counter("studyally_recommendations_served_total", "Study groups recommended to users.")
+LOGINS = Counter("studyally_logins_total", "Successful logins.")
+FRAGMENT_CACHE_LOOKUPS = Counter(
+    "studyally_fragment_cache_lookups_total", "Serialized fragment cache lookups by fragment and result.", ("fragment", "result")
+)
+
+
+@atexit.register
+def flush_on_exit():
+    if settings.configured and settings.METRICS_DIR:
+        REGISTRY.flush()
+
+
+def scrape_allowed(request):
+    if settings.METRICS_TOKEN:
+        authorization = request.headers.get("Authorization", "")
+        if hmac.compare_digest(authorization.encode(), f"Bearer {settings.METRICS_TOKEN}".encode()):
+            return True
+    return request.META.get("REMOTE_ADDR") in settings.METRICS_ALLOWED_IPS
+
+
+@require_safe
+def metrics_view(request):
+    if not scrape_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(REGISTRY.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
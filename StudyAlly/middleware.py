@@ -0,0 +1,315 @@
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .compression import CODECS, COMPRESSIBLE_TYPE, acompress_stream, compress, compress_stream, negotiate
+from .instrumentation import QueryMetrics, log_slow_queries
+from .metrics import DB_QUERIES, DB_QUERIES_PER_REQUEST, DB_QUERY_SECONDS, DB_REPEATED_QUERIES, REGISTRY, REQUEST_LATENCY, REQUESTS, REQUESTS_IN_PROGRESS
+from .profiling import StackSampler, record_profile
+from .routers import replica_reads
+
+
+logger = logging.getLogger(__name__)
+
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class HybridMiddleware:
+    """Base for middleware that runs natively under both WSGI and ASGI, so
+    async views aren't pushed back onto a thread by the middleware chain."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+
+class MetricsMiddleware(HybridMiddleware):
+    """Record request counts, latency and DB usage per route for /metrics."""
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        REQUESTS_IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            REQUESTS_IN_PROGRESS.dec()
+        self.record(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        REQUESTS_IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            REQUESTS_IN_PROGRESS.dec()
+        self.record(request, response, time.perf_counter() - start)
+        return response
+
+    def record(self, request, response, elapsed):
+        # route names, not paths, keep the label set small
+        match = request.resolver_match
+        route = match.view_name if match else "unresolved"
+        REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+        REQUEST_LATENCY.observe(elapsed, route=route, method=request.method)
+
+        query_metrics = getattr(response, "query_metrics", None)
+        if query_metrics is not None:
+            DB_QUERIES.inc(query_metrics.count, route=route)
+            DB_QUERY_SECONDS.inc(query_metrics.duration, route=route)
+            DB_QUERIES_PER_REQUEST.observe(query_metrics.count, route=route)
+            DB_REPEATED_QUERIES.inc(query_metrics.repeated, route=route)
+
+        REGISTRY.maybe_flush()
+
+
+class CompressionMiddleware(HybridMiddleware):
+    """Compress responses with the best encoding the client accepts.
+
+    COMPRESSION_ENCODINGS sets the server's preference (zstd and br need the
+    zstandard and brotli packages). Bodies under COMPRESSION_MIN_SIZE, media
+    that is compressed already, partial content and responses that have a
+    Content-Encoding are left alone. Streaming responses are compressed as
+    they stream.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.encodings = [encoding for encoding in settings.COMPRESSION_ENCODINGS if encoding in CODECS]
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.compress(request, await self.get_response(request))
+
+    def compress(self, request, response):
+        if not self.compressible(response):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = negotiate(request.headers.get("Accept-Encoding", ""), self.encodings)
+        if encoding is None:
+            return response
+
+        codec, level = CODECS[encoding], settings.COMPRESSION_LEVELS[encoding]
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_stream(codec, level, response.streaming_content)
+            else:
+                response.streaming_content = compress_stream(codec, level, response.streaming_content)
+            # the compressed length isn't known up front
+            del response.headers["Content-Length"]
+        else:
+            compressed = compress(codec, level, response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        # the bytes differ from the uncompressed representation
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    def compressible(self, response):
+        if response.has_header("Content-Encoding") or response.status_code == 206:
+            return False
+        if not COMPRESSIBLE_TYPE.match(response.get("Content-Type", "")):
+            return False
+        if response.streaming:
+            length = response.get("Content-Length")
+            return length is None or int(length) >= settings.COMPRESSION_MIN_SIZE
+        return len(response.content) >= settings.COMPRESSION_MIN_SIZE
+
+
+class ReplicaRoutingMiddleware(HybridMiddleware):
+    """Let read-only requests read from the replicas.
+
+    After a successful write the user's reads are pinned to the primary for
+    REPLICA_PIN_SECONDS, so users always see their own writes even if the
+    replicas lag behind. Pins are kept by user id in the "replica_pins"
+    cache, which all workers have to share.
+    """
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        key = self.pin_key(request)
+        pinned = key is not None and request.method in SAFE_METHODS and caches["replica_pins"].get(key) is not None
+        token = replica_reads.set(request.method in SAFE_METHODS and not pinned)
+        try:
+            response = self.get_response(request)
+        finally:
+            replica_reads.reset(token)
+
+        if self.should_pin(request, response, key):
+            caches["replica_pins"].set(key, True, settings.REPLICA_PIN_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        key = self.pin_key(request)
+        pinned = key is not None and request.method in SAFE_METHODS and await caches["replica_pins"].aget(key) is not None
+        token = replica_reads.set(request.method in SAFE_METHODS and not pinned)
+        try:
+            response = await self.get_response(request)
+        finally:
+            replica_reads.reset(token)
+
+        if self.should_pin(request, response, key):
+            await caches["replica_pins"].aset(key, True, settings.REPLICA_PIN_SECONDS)
+        return response
+
+    def pin_key(self, request):
+        # the token's user id claim is enough, loading the user would be a read of its own
+        authentication = JWTAuthentication()
+        try:
+            header = authentication.get_header(request)
+            raw_token = header and authentication.get_raw_token(header)
+            if not raw_token:
+                return None
+            user_id = authentication.get_validated_token(raw_token)[jwt_settings.USER_ID_CLAIM]
+        except (AuthenticationFailed, KeyError):
+            return None
+        return f"replica_pin:{user_id}"
+
+    def should_pin(self, request, response, key):
+        return key is not None and request.method not in SAFE_METHODS and response.status_code < 400
+
+
+class QueryInstrumentationMiddleware(HybridMiddleware):
+    """Count the queries and DB time of every request.
+
+    Results are exported per route on /metrics (see MetricsMiddleware),
+    reported in a Server-Timing header and logged when a view declares a
+    `query_budget` and goes over it. With SLOW_QUERY_THRESHOLD_MS set,
+    slower statements go to the slow query log with their query plan.
+    """
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = self.new_metrics()
+        with ExitStack() as stack:
+            self.instrument(stack, metrics)
+            response = self.get_response(request)
+
+        name = self.report(request, response, metrics)
+        if metrics.slow:
+            # explained outside the execute wrapper so EXPLAIN isn't counted
+            log_slow_queries(name, metrics)
+        return response
+
+    async def __acall__(self, request):
+        metrics = self.new_metrics()
+        with ExitStack() as stack:
+            self.instrument(stack, metrics)
+            response = await self.get_response(request)
+
+        name = self.report(request, response, metrics)
+        if metrics.slow:
+            await sync_to_async(log_slow_queries)(name, metrics)
+        return response
+
+    def new_metrics(self):
+        threshold = settings.SLOW_QUERY_THRESHOLD_MS
+        return QueryMetrics(slow_threshold=threshold / 1000 if threshold >= 0 else None)
+
+    def instrument(self, stack, metrics):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(metrics))
+
+    def report(self, request, response, metrics):
+        match = request.resolver_match
+        name = match.view_name if match else "unresolved"
+        response.query_metrics = metrics
+
+        budget = getattr(getattr(match.func, "view_class", None), "query_budget", None) if match else None
+        response.query_budget = budget
+        if budget is not None and metrics.count > budget:
+            logger.warning("%s ran %d queries, budget is %d", name, metrics.count, budget)
+
+        if settings.SERVER_TIMING:
+            response["Server-Timing"] = (
+                f'db;dur={metrics.duration * 1000:.2f};desc="{metrics.count} queries, {sum(metrics.duplicates.values())} duplicated"'
+            )
+        return name
+
+
+class ProfilingMiddleware(HybridMiddleware):
+    """Sample the call stacks of a fraction of requests.
+
+    PROFILER_SAMPLE_RATE of all requests are profiled, plus any request with
+    an `X-Profile: 1` header from a staff user. Samples are aggregated per URL
+    name and downloadable as collapsed stacks from /api/_profiler/. Under ASGI
+    the request shares its threads with others, so every thread is sampled.
+    """
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        with StackSampler(threading.get_ident(), settings.PROFILER_INTERVAL) as sampler:
+            response = self.get_response(request)
+        return self.record(request, response, sampler)
+
+    async def __acall__(self, request):
+        if request.headers.get("X-Profile") == "1":
+            profile = await sync_to_async(self.should_profile)(request)
+        else:
+            profile = self.should_profile(request)
+        if not profile:
+            return await self.get_response(request)
+
+        with StackSampler(None, settings.PROFILER_INTERVAL) as sampler:
+            response = await self.get_response(request)
+        return self.record(request, response, sampler)
+
+    def record(self, request, response, sampler):
+        match = request.resolver_match
+        record_profile(match.view_name if match else "unresolved", sampler.stacks)
+        response["X-Profile-Samples"] = sum(sampler.stacks.values())
+        return response
+
+    def should_profile(self, request):
+        if request.headers.get("X-Profile") == "1":
+            return self.is_staff(request)
+        return random.random() < settings.PROFILER_SAMPLE_RATE
+
+    def is_staff(self, request):
+        # runs before AuthenticationMiddleware, and the API uses JWTs anyway
+        try:
+            result = JWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return False
+        return result is not None and result[0].is_staff
@@ -0,0 +1,116 @@
+import glob
+import os
+import re
+import sys
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+
+PROFILE_NAME_REGEX = re.compile(r"^[\w.:-]+$")
+
+
+def collapse(frame):
+    """Render a frame's stack root first in the collapsed format flamegraph tools read."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{frame.f_globals.get('__name__', '?')}.{code.co_qualname}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StackSampler:
+    """Samples the stack of one thread, or of every other thread when
+    `thread_id` is None, every `interval` seconds from a background thread."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frames = sys._current_frames()
+            if self.thread_id is not None:
+                frames = {self.thread_id: frames.get(self.thread_id)}
+            for thread_id, frame in frames.items():
+                if frame is not None and thread_id != self.thread.ident:
+                    self.stacks[collapse(frame)] += 1
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+
+# this process's samples per URL name, mirrored to PROFILER_DIR so every worker's share can be merged
+_profiles = {}
+_profiles_lock = threading.Lock()
+
+
+def profile_path(name, pid):
+    return os.path.join(settings.PROFILER_DIR, f"{name}.{pid}.folded")
+
+
+def record_profile(name, stacks):
+    with _profiles_lock:
+        profile = _profiles.setdefault(name, Counter())
+        profile.update(stacks)
+        os.makedirs(settings.PROFILER_DIR, exist_ok=True)
+        with open(profile_path(name, os.getpid()), "w") as folded:
+            folded.writelines(f"{stack} {count}\n" for stack, count in profile.items())
+
+
+def load_profiles():
+    """Merge the folded files of all workers into {name: Counter(stack: samples)}."""
+    profiles = {}
+    for path in glob.glob(os.path.join(settings.PROFILER_DIR, "*.folded")):
+        name = os.path.basename(path).rsplit(".", 2)[0]
+        profile = profiles.setdefault(name, Counter())
+        with open(path) as folded:
+            for line in folded:
+                stack, _, count = line.rstrip("\n").rpartition(" ")
+                if count.isdigit():
+                    profile[stack] += int(count)
+    return profiles
+
+
+class ListProfilesView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        profiles = load_profiles()
+        return Response(
+            [{"name": name, "samples": sum(stacks.values())} for name, stacks in sorted(profiles.items())],
+            status=status.HTTP_200_OK,
+        )
+
+
+class DownloadProfileView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, name):
+        if not PROFILE_NAME_REGEX.match(name):
+            raise Http404("Profile not found")
+        stacks = load_profiles().get(name)
+        if not stacks:
+            raise Http404("Profile not found")
+
+        # feed to flamegraph.pl, speedscope or inferno as is
+        body = "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+        return HttpResponse(
+            body, content_type="text/plain; charset=utf-8",
+            headers={"Content-Disposition": f'attachment; filename="{name}.folded"'},
+        )
@@ -0,0 +1,27 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+
+# set by ReplicaRoutingMiddleware for requests whose reads may be served by a replica
+replica_reads = ContextVar("replica_reads", default=False)
+
+
+class PrimaryReplicaRouter:
+    """Send reads to a random replica when allowed, everything else to the primary."""
+
+    def db_for_read(self, model, **hints):
+        if settings.DATABASE_REPLICAS and replica_reads.get():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
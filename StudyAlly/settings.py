@@ -10,17 +10,25 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
-from pathlib import Path
 from pathlib import Path
 from datetime import timedelta
-from dotenv import load_dotenv
 import os
 
-load_dotenv()
-
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# deployments get their environment from the platform, only import dotenv for a local .env
+if (BASE_DIR / ".env").exists():
+    from dotenv import load_dotenv
+
+    load_dotenv(BASE_DIR / ".env")
+
+# LEAN_STARTUP=1 is the profile for scale-to-zero deployments, where cold start
+# latency is user facing: only what the API needs is installed, and wsgi.py /
+# asgi.py warm up URL resolution and the serializers before the first request
+# (see StudyAlly/startup.py)
+LEAN_STARTUP = os.getenv("LEAN_STARTUP") == "1"
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.0/howto/deployment/checklist/
@@ -50,6 +58,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "StudyAlly.middleware.MetricsMiddleware",
+    "StudyAlly.middleware.QueryInstrumentationMiddleware",
+    "StudyAlly.middleware.ProfilingMiddleware",
+    "StudyAlly.middleware.CompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -58,8 +70,21 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
+    "StudyAlly.middleware.ReplicaRoutingMiddleware",
 ]
 
+if LEAN_STARTUP:
+    # the admin, sessions, messages and static files only serve the admin site;
+    # the API authenticates with JWTs in DRF, so it needs no session middleware
+    INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in (
+        "django.contrib.admin", "django.contrib.sessions", "django.contrib.messages", "django.contrib.staticfiles",
+    )]
+    MIDDLEWARE = [middleware for middleware in MIDDLEWARE if middleware not in (
+        "django.contrib.sessions.middleware.SessionMiddleware",
+        "django.contrib.auth.middleware.AuthenticationMiddleware",
+        "django.contrib.messages.middleware.MessageMiddleware",
+    )]
+
 ROOT_URLCONF = "StudyAlly.urls"
 
 TEMPLATES = [
@@ -95,13 +120,75 @@ WSGI_APPLICATION = "StudyAlly.wsgi.application"
 #     }
 # }
 
+# SQLITE_PRODUCTION=1 switches to StudyAlly.sqlite_backend (WAL, tuned pragmas,
+# BEGIN IMMEDIATE) and keeps connections open between requests
+SQLITE_PRODUCTION = os.getenv("SQLITE_PRODUCTION") == "1"
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'StudyAlly.sqlite_backend' if SQLITE_PRODUCTION else 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': int(os.getenv("DB_CONN_MAX_AGE", 600)) if SQLITE_PRODUCTION else 0,
+        'CONN_HEALTH_CHECKS': SQLITE_PRODUCTION,
     }
 }
 
+# read replicas, e.g. DB_REPLICAS=/srv/replica.sqlite3 (a copy refreshed with
+# `python manage.py sync_sqlite_replica`). Reads of safe requests go to a
+# replica unless the user wrote within the last REPLICA_PIN_SECONDS (tracked in
+# the "replica_pins" cache, which has to be shared by all workers).
+DATABASE_REPLICAS = []
+for index, name in enumerate(filter(None, os.getenv("DB_REPLICAS", "").split(","))):
+    DATABASE_REPLICAS.append(f"replica{index + 1}")
+    DATABASES[f"replica{index + 1}"] = {**DATABASES["default"], "NAME": name, "TEST": {"MIRROR": "default"}}
+
+DATABASE_ROUTERS = ["StudyAlly.routers.PrimaryReplicaRouter"]
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", 10))
+
+# report per-request query count and DB time in a Server-Timing header
+SERVER_TIMING = os.getenv("SERVER_TIMING", "1") == "1"
+
+# statements slower than this are written with their query plan to a rotating
+# JSON lines log, see `python manage.py slow_queries`. Off unless set, a
+# negative value disables it. Each query shape is explained at most once per
+# SLOW_QUERY_EXPLAIN_INTERVAL seconds, later entries have no plan.
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", -1))
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", str(BASE_DIR / "logs" / "slow_queries.log"))
+SLOW_QUERY_LOG_MAX_BYTES = 10 * 1024 * 1024
+SLOW_QUERY_LOG_BACKUPS = 5
+SLOW_QUERY_EXPLAIN_INTERVAL = int(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", 300))
+
+# stack sampling profiler, off unless a sample rate is set or a staff user
+# sends `X-Profile: 1`. Collapsed stacks are kept per URL name in PROFILER_DIR.
+PROFILER_SAMPLE_RATE = float(os.getenv("PROFILER_SAMPLE_RATE", 0))
+PROFILER_INTERVAL = float(os.getenv("PROFILER_INTERVAL_MS", 1)) / 1000
+PROFILER_DIR = os.getenv("PROFILER_DIR", str(BASE_DIR / "logs" / "profiles"))
+
+# Prometheus metrics at /metrics. With several worker processes set METRICS_DIR
+# to a directory shared by them (cleared on deploy) so the scrape sees all of them.
+# Scrapes must send `Authorization: Bearer <METRICS_TOKEN>` or come from one of
+# METRICS_ALLOWED_IPS; with neither set /metrics answers 403. Behind a reverse
+# proxy every request comes from the proxy's address, so prefer the token there.
+METRICS_DIR = os.getenv("METRICS_DIR")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 1))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+METRICS_ALLOWED_IPS = [ip for ip in os.getenv("METRICS_ALLOWED_IPS", "").split(",") if ip]
+
+# response compression (StudyAlly.middleware.CompressionMiddleware): encodings in
+# order of preference, the smallest body worth compressing and the level of each
+COMPRESSION_ENCODINGS = os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",")
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_LEVELS = {
+    "gzip": int(os.getenv("GZIP_LEVEL", 6)),
+    "br": int(os.getenv("BROTLI_QUALITY", 4)),
+    "zstd": int(os.getenv("ZSTD_LEVEL", 3)),
+}
+
+# Serve the hot read endpoints from the async views (groups/async_views.py,
+# accounts/async_views.py). asgi.py turns this on; keep it off under WSGI,
+# where every async view would run through async_to_sync.
+ASYNC_VIEWS = os.getenv("ASYNC_VIEWS") == "1"
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -142,6 +229,46 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, "static")]
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# media is served by StudyAlly.media.serve_media; set the backend to "nginx"
+# (X-Accel-Redirect to MEDIA_SENDFILE_URL) or "apache" (X-Sendfile) to hand
+# the file transfer off to the fronting proxy
+MEDIA_SENDFILE_BACKEND = os.getenv("MEDIA_SENDFILE_BACKEND")
+MEDIA_SENDFILE_URL = os.getenv("MEDIA_SENDFILE_URL", "/protected-media/")
+MEDIA_CACHE_MAX_AGE = int(os.getenv("MEDIA_CACHE_MAX_AGE", 60 * 60))
+
+# largest group/profile image accepted by accounts.uploads.ImageUploadHandler
+IMAGE_UPLOAD_MAX_SIZE = int(os.getenv("IMAGE_UPLOAD_MAX_SIZE", 5 * 1024 * 1024))
+
+# per-user iCal feeds (groups.views.GroupCalendarFeedView)
+CALENDAR_FEED_MAX_AGE = int(os.getenv("CALENDAR_FEED_MAX_AGE", 15 * 60))
+CALENDAR_FEED_CACHE_TIMEOUT = int(os.getenv("CALENDAR_FEED_CACHE_TIMEOUT", 60 * 60))
+
+# session reminders (python manage.py send_session_reminders)
+SESSION_REMINDER_LEAD_MINUTES = int(os.getenv("SESSION_REMINDER_LEAD_MINUTES", 30))
+SESSION_REMINDER_BUCKET_SECONDS = int(os.getenv("SESSION_REMINDER_BUCKET_SECONDS", 60))
+
+# the part of a study group's representation every viewer shares (groups.fragments).
+# Local memory by default; with several worker processes point FRAGMENT_CACHE_BACKEND
+# at a cache they share, e.g. django.core.cache.backends.filebased.FileBasedCache
+# with a directory or django.core.cache.backends.db.DatabaseCache with a table
+# (python manage.py createcachetable), so an invalidation reaches all of them.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "fragments": {
+        "BACKEND": os.getenv("FRAGMENT_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("FRAGMENT_CACHE_LOCATION", "fragments"),
+        "TIMEOUT": int(os.getenv("FRAGMENT_CACHE_TIMEOUT", 60 * 60)),
+        "OPTIONS": {"MAX_ENTRIES": int(os.getenv("FRAGMENT_CACHE_MAX_ENTRIES", 10000))},
+    },
+    "replica_pins": {
+        "BACKEND": os.getenv("REPLICA_PIN_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("REPLICA_PIN_CACHE_LOCATION", "replica_pins"),
+        "TIMEOUT": REPLICA_PIN_SECONDS,
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -157,8 +284,22 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    # orjson, with the same output as DRF's JSONRenderer/JSONParser
+    'DEFAULT_RENDERER_CLASSES': (
+        'StudyAlly.fastjson.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'StudyAlly.fastjson.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
+if LEAN_STARTUP:
+    # no browsable API, so the template engine is never loaded
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = ('StudyAlly.fastjson.ORJSONRenderer',)
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=7),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=3),
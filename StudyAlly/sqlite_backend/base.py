@@ -0,0 +1,40 @@
+"""
+SQLite backend tuned for serving production traffic.
+
+Every new connection gets the pragmas below (override them with
+DATABASES[...]["OPTIONS"]["pragmas"]) and transactions are opened with
+BEGIN IMMEDIATE so concurrent writers queue on busy_timeout instead of
+failing with "database is locked" when a read lock can't be upgraded.
+"""
+
+from django.db.backends.sqlite3 import base
+
+
+DEFAULT_PRAGMAS = {
+    # readers don't block the writer and vice versa
+    "journal_mode": "WAL",
+    # in WAL mode only checkpoints fsync, commits stay durable across app crashes
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "mmap_size": 128 * 1024 * 1024,
+    # negative values are KiB
+    "cache_size": -16 * 1024,
+    "temp_store": "MEMORY",
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = {**DEFAULT_PRAGMAS, **params.pop("pragmas", {})}
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        # take the write lock up front instead of upgrading a read lock later
+        self.cursor().execute("BEGIN IMMEDIATE")
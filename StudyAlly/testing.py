@@ -0,0 +1,39 @@
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory, RequestFactory
+
+
+class QueryBudgetTestMixin:
+    """TestCase mixin failing when an endpoint runs more queries than the
+    `query_budget` its view declares."""
+
+    def assertWithinQueryBudget(self, response, budget=None):
+        if budget is None:
+            budget = response.query_budget
+        if budget is None:
+            self.fail("The view does not declare a query_budget")
+
+        metrics = response.query_metrics
+        if metrics.count > budget:
+            duplicates = "".join(f"\n  {count}x {sql}" for sql, count in metrics.duplicates.items())
+            self.fail(f"{metrics.count} queries, budget is {budget}. Duplicated queries:{duplicates or ' none'}")
+
+
+class AsyncParityTestMixin:
+    """TestCase mixin checking that an async view (accounts.async_views)
+    answers a request byte for byte like the sync view it stands in for."""
+
+    parity_headers = ("Allow", "Vary", "Content-Type", "WWW-Authenticate", "ETag")
+
+    def assertSameResponse(self, sync_view, async_view, path, method="get", headers=None, **kwargs):
+        # the async view goes first, so it builds what the views cache itself
+        async_response = async_to_sync(async_view.as_view(sync_view=sync_view))(getattr(AsyncRequestFactory(), method)(path, headers=headers), **kwargs)
+        sync_response = sync_view.as_view()(getattr(RequestFactory(), method)(path, headers=headers), **kwargs)
+        if hasattr(sync_response, "render"):
+            # a DRF Response rather than e.g. a 304 from conditional_get
+            sync_response.render()
+
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(async_response.content, sync_response.content)
+        for header in self.parity_headers:
+            self.assertEqual(async_response.get(header), sync_response.get(header), header)
+        return sync_response
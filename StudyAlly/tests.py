@@ -0,0 +1,584 @@
+import json
+import math
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import skipUnless
+from types import SimpleNamespace
+from uuid import UUID
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connections
+from django.test import AsyncClient, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import UserAccount
+
+from . import instrumentation
+from .fastjson import ORJSONParser, ORJSONRenderer
+from .instrumentation import QueryMetrics
+from .metrics import Counter, Gauge, Histogram, Registry, process_name
+from .profiling import StackSampler, collapse
+from .sqlite_backend.base import DatabaseWrapper
+
+
+class MediaViewTest(SimpleTestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        with open(os.path.join(media_root.name, "avatar.png"), "wb") as file:
+            file.write(bytes(range(100)))
+        self.settings_override = override_settings(MEDIA_ROOT=media_root.name, MEDIA_SENDFILE_BACKEND=None)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def test_full_file(self):
+        response = self.client.get("/media/avatar.png")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), bytes(range(100)))
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(response["Content-Type"], "image/png")
+
+    def test_revalidation_is_not_modified(self):
+        etag = self.client.get("/media/avatar.png")["ETag"]
+        response = self.client.get("/media/avatar.png", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+    def test_byte_ranges(self):
+        response = self.client.get("/media/avatar.png", HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), bytes(range(10, 20)))
+        self.assertEqual(response["Content-Range"], "bytes 10-19/100")
+        self.assertEqual(response["Content-Length"], "10")
+
+        response = self.client.get("/media/avatar.png", HTTP_RANGE="bytes=-5")
+        self.assertEqual(b"".join(response.streaming_content), bytes(range(95, 100)))
+        self.assertEqual(response["Content-Range"], "bytes 95-99/100")
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get("/media/avatar.png", HTTP_RANGE="bytes=100-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */100")
+
+    def test_stale_if_range_gets_the_whole_file(self):
+        response = self.client.get("/media/avatar.png", HTTP_RANGE="bytes=10-19", HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_sendfile_handoff(self):
+        with override_settings(MEDIA_SENDFILE_BACKEND="nginx", MEDIA_SENDFILE_URL="/protected-media/"):
+            response = self.client.get("/media/avatar.png")
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/avatar.png")
+        self.assertEqual(response.content, b"")
+
+        os.makedirs(os.path.join(self.settings_override.options["MEDIA_ROOT"], "profile_pictures"))
+        with open(os.path.join(self.settings_override.options["MEDIA_ROOT"], "profile_pictures", "Kɔfi 100%?.png"), "wb"):
+            pass
+        with override_settings(MEDIA_SENDFILE_BACKEND="nginx", MEDIA_SENDFILE_URL="/protected-media/"):
+            response = self.client.get("/media/profile_pictures/K%C9%94fi%20100%25%3F.png")
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/profile_pictures/K%C9%94fi%20100%25%3F.png")
+
+        with override_settings(MEDIA_SENDFILE_BACKEND="apache"):
+            response = self.client.get("/media/avatar.png")
+        self.assertEqual(response["X-Sendfile"], os.path.join(self.settings_override.options["MEDIA_ROOT"], "avatar.png"))
+
+    def test_missing_and_escaping_paths(self):
+        self.assertEqual(self.client.get("/media/missing.png").status_code, 404)
+        self.assertEqual(self.client.get("/media/../settings.py").status_code, 404)
+
+
+class SQLiteBackendTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "db.sqlite3")
+        settings_dict = {
+            **connections["default"].settings_dict,
+            "NAME": self.path,
+            "OPTIONS": {"pragmas": {"cache_size": -2048}},
+        }
+        self.connection = DatabaseWrapper(settings_dict, alias="sqlite_backend_test")
+        self.addCleanup(self.connection.close)
+
+    def pragma(self, name):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_pragmas_are_applied_to_new_connections(self):
+        self.assertEqual(self.pragma("journal_mode"), "wal")
+        self.assertEqual(self.pragma("synchronous"), 1)  # NORMAL
+        self.assertEqual(self.pragma("busy_timeout"), 5000)
+        self.assertEqual(self.pragma("temp_store"), 2)  # MEMORY
+        # OPTIONS override the defaults
+        self.assertEqual(self.pragma("cache_size"), -2048)
+
+    def test_transactions_take_the_write_lock_up_front(self):
+        self.connection.ensure_connection()
+        self.connection.set_autocommit(False, force_begin_transaction_with_broken_autocommit=True)
+        self.addCleanup(self.connection.rollback)
+
+        # a deferred BEGIN would hold no lock until the first write
+        other = sqlite3.connect(self.path, timeout=0)
+        self.addCleanup(other.close)
+        with self.assertRaisesMessage(sqlite3.OperationalError, "database is locked"):
+            other.execute("BEGIN IMMEDIATE")
+
+
+@override_settings(DATABASE_REPLICAS=["replica_test"])
+class ReplicaRoutingTest(TransactionTestCase):
+    def setUp(self):
+        self.users = [
+            UserAccount.objects.create_user(
+                email=f"user{i}@ashesi.edu.gh", password="Passw0rd!", firstname="Ama", lastname="Mensah", mobile_number=f"020000000{i}"
+            )
+            for i in range(2)
+        ]
+        self.clients = []
+        for user in self.users:
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+            self.clients.append(client)
+
+        # the replica is a copy of the primary taken now, like sync_sqlite_replica makes
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "replica.sqlite3")
+        connections["default"].ensure_connection()
+        target = sqlite3.connect(path)
+        connections["default"].connection.backup(target)
+        target.close()
+
+        connections.settings["replica_test"] = {**connections["default"].settings_dict, "NAME": path}
+        self.addCleanup(connections.settings.pop, "replica_test")
+        self.addCleanup(connections.__delitem__, "replica_test")
+        self.addCleanup(lambda: connections["replica_test"].close())
+        self.addCleanup(caches["replica_pins"].clear)
+
+    def firstname(self, client):
+        response = client.get("/api/account/user/")
+        self.assertEqual(response.status_code, 200)
+        return response.data["firstname"]
+
+    def test_reads_are_served_by_the_replica(self):
+        UserAccount.objects.filter(id=self.users[0].id).update(firstname="Kofi")
+        self.assertEqual(self.firstname(self.clients[0]), "Ama")
+
+    def test_writes_pin_the_user_to_the_primary(self):
+        response = self.clients[0].patch("/api/account/update/", {"firstname": "Kofi"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Set-Cookie", response)
+        self.assertEqual(self.firstname(self.clients[0]), "Kofi")
+
+        # other users still read the replica
+        UserAccount.objects.filter(id=self.users[1].id).update(firstname="Yaw")
+        self.assertEqual(self.firstname(self.clients[1]), "Ama")
+
+        # once the pin is gone, the lagging replica answers again
+        caches["replica_pins"].clear()
+        self.assertEqual(self.firstname(self.clients[0]), "Ama")
+
+    def test_failed_writes_do_not_pin(self):
+        response = self.clients[0].patch("/api/account/update/", {"email": "not an email"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        UserAccount.objects.filter(id=self.users[0].id).update(firstname="Kofi")
+        self.assertEqual(self.firstname(self.clients[0]), "Ama")
+
+    async def test_async_requests_are_pinned_too(self):
+        headers = {"Authorization": self.clients[0]._credentials["HTTP_AUTHORIZATION"]}
+        client = AsyncClient()
+        response = await client.patch("/api/account/update/", {"firstname": "Kofi"}, content_type="application/json", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        response = await client.get("/api/account/user/", headers=headers)
+        self.assertEqual(response.json()["firstname"], "Kofi")
+
+
+class SlowQueryLogTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.log = os.path.join(directory.name, "logs", "slow_queries.log")
+        settings_override = override_settings(SLOW_QUERY_LOG=self.log)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        instrumentation._explained_at.clear()
+
+        user = UserAccount.objects.create_user(
+            email="member@ashesi.edu.gh", password="Passw0rd!", firstname="Ama", lastname="Mensah", mobile_number="0200000001"
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+    def entries(self):
+        with open(self.log) as log:
+            return [json.loads(line) for line in log]
+
+    def test_threshold(self):
+        def execute(delay):
+            def execute(sql, params, many, context):
+                time.sleep(delay)
+            return execute
+
+        metrics = QueryMetrics(slow_threshold=0.01)
+        context = {"connection": SimpleNamespace(alias="default")}
+        metrics(execute(0), "SELECT 1", (), False, context)
+        metrics(execute(0.02), "SELECT 2", (), False, context)
+        metrics(execute(0.02), "INSERT 3", [()], True, context)
+        self.assertEqual([(alias, sql) for alias, sql, params, elapsed in metrics.slow], [("default", "SELECT 2")])
+        self.assertEqual(metrics.count, 3)
+
+    def test_off_by_default(self):
+        self.assertEqual(self.client.get("/api/account/user/").status_code, 200)
+        self.assertFalse(os.path.exists(os.path.dirname(self.log)))
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_log_format_and_explain_rate_limit(self):
+        self.client.get("/api/account/user/")
+        first = self.entries()
+        self.assertTrue(first)
+        for entry in first:
+            self.assertEqual(set(entry), {"time", "view", "database", "duration_ms", "fingerprint", "sql", "plan"})
+            self.assertEqual(entry["view"], "user")
+            self.assertEqual(entry["database"], "default")
+            self.assertNotIn("member@ashesi.edu.gh", entry["sql"])
+        self.assertTrue(all(isinstance(line, str) for line in first[0]["plan"]))
+
+        # the same statements again within SLOW_QUERY_EXPLAIN_INTERVAL are logged without a plan
+        self.client.get("/api/account/user/")
+        second = self.entries()[len(first):]
+        self.assertEqual([entry["fingerprint"] for entry in second], [entry["fingerprint"] for entry in first])
+        self.assertTrue(all(entry["plan"] is None for entry in second))
+
+    def test_report(self):
+        os.makedirs(os.path.dirname(self.log))
+        out = StringIO()
+        call_command("slow_queries", stdout=out)
+        self.assertEqual(out.getvalue(), "No slow queries logged\n")
+
+        def entry(view, sql, duration_ms, plan):
+            return json.dumps({"view": view, "fingerprint": sql, "duration_ms": duration_ms, "plan": plan}) + "\n"
+
+        with open(self.log + ".1", "w") as log:
+            log.write(entry("groups", "SELECT a", 300, ["SCAN groups"]))
+        with open(self.log, "w") as log:
+            log.write(entry("profiles", "SELECT b", 150, ["SEARCH profiles"]))
+            log.write(entry("profiles", "SELECT b", 150, ["SEARCH profiles"]))
+            log.write(entry("groups", "SELECT a", 200, None))
+            log.write("not json\n")
+
+        out = StringIO()
+        call_command("slow_queries", "--plans", "--limit", "1", stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[1].split(), ["500.0", "2", "250.0", "300.0", "groups"])
+        self.assertEqual(lines[2:], ["    SELECT a", "      SCAN groups"])
+
+
+class StackSamplerTest(SimpleTestCase):
+    def spin(self, seconds):
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            pass
+
+    def test_samples_the_given_thread(self):
+        with StackSampler(threading.get_ident(), 0.001) as sampler:
+            self.spin(0.05)
+        self.assertTrue(sampler.stacks)
+        self.assertTrue(any(stack.endswith("StudyAlly.tests.StackSamplerTest.spin") for stack in sampler.stacks))
+
+    def test_every_thread_but_its_own(self):
+        with StackSampler(None, 0.001) as sampler:
+            self.spin(0.05)
+        self.assertTrue(any("StackSamplerTest.spin" in stack for stack in sampler.stacks))
+        self.assertFalse(any("StackSampler.run" in stack for stack in sampler.stacks))
+
+    def test_collapsed_stacks_start_at_the_root(self):
+        def inner():
+            return collapse(sys._getframe())
+
+        stack = inner().split(";")
+        self.assertEqual(stack[-1], "StudyAlly.tests.StackSamplerTest.test_collapsed_stacks_start_at_the_root.<locals>.inner")
+        self.assertEqual(stack[-2], "StudyAlly.tests.StackSamplerTest.test_collapsed_stacks_start_at_the_root")
+
+
+class ProfilerViewsTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings_override = override_settings(PROFILER_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.clients = {}
+        for is_staff in (True, False):
+            user = UserAccount.objects.create_user(
+                email=f"staff{is_staff}@ashesi.edu.gh", password="Passw0rd!", firstname="Ama", lastname="Mensah",
+                mobile_number=f"020000000{int(is_staff)}", is_staff=is_staff,
+            )
+            self.clients[is_staff] = APIClient()
+            self.clients[is_staff].credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+    def write(self, filename, lines):
+        with open(os.path.join(self.directory, filename), "w") as folded:
+            folded.write("".join(f"{line}\n" for line in lines))
+
+    def test_admins_only(self):
+        self.assertEqual(APIClient().get("/api/_profiler/").status_code, 401)
+        self.assertEqual(self.clients[False].get("/api/_profiler/").status_code, 403)
+        self.assertEqual(self.clients[False].get("/api/_profiler/user.folded").status_code, 403)
+        self.assertEqual(self.clients[True].get("/api/_profiler/").status_code, 200)
+
+    def test_workers_are_merged(self):
+        self.write("user.100.folded", ["views.a;views.b 3"])
+        self.write("user.200.folded", ["views.a;views.b 2", "views.a;views.c 1"])
+        self.write("groups:list.100.folded", ["views.d 1"])
+
+        response = self.clients[True].get("/api/_profiler/")
+        self.assertEqual(response.data, [{"name": "groups:list", "samples": 1}, {"name": "user", "samples": 6}])
+
+        response = self.clients[True].get("/api/_profiler/user.folded")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"views.a;views.b 5\nviews.a;views.c 1\n")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="user.folded"')
+
+    def test_unknown_profiles(self):
+        self.assertEqual(self.clients[True].get("/api/_profiler/user.folded").status_code, 404)
+        self.assertEqual(self.clients[True].get("/api/_profiler/..%2Fsecrets.folded").status_code, 404)
+
+    def test_staff_can_profile_a_request(self):
+        response = self.clients[True].get("/api/account/user/", HTTP_X_PROFILE="1")
+        self.assertIn("X-Profile-Samples", response)
+        self.assertEqual(os.listdir(self.directory), [f"user.{os.getpid()}.folded"])
+
+        response = self.clients[False].get("/api/account/user/", HTTP_X_PROFILE="1")
+        self.assertNotIn("X-Profile-Samples", response)
+
+
+class MetricsEndpointTest(SimpleTestCase):
+    def test_closed_unless_configured(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+
+    @override_settings(METRICS_TOKEN="s3cret")
+    def test_token(self):
+        self.assertEqual(self.client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code, 200)
+        self.assertEqual(self.client.get("/metrics", headers={"Authorization": "Bearer guess"}).status_code, 403)
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+
+    @override_settings(METRICS_ALLOWED_IPS=["10.0.0.5"])
+    def test_allowed_ips(self):
+        response = self.client.get("/metrics", REMOTE_ADDR="10.0.0.5")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"# TYPE studyally_http_requests_total counter\n", response.content)
+        self.assertEqual(self.client.get("/metrics", REMOTE_ADDR="10.0.0.6").status_code, 403)
+
+
+@override_settings(METRICS_DIR=None, METRICS_TOKEN="s3cret")
+class QueryMetricsExportTest(TestCase):
+    def scrape(self):
+        response = self.client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+        return {
+            sample: float(value)
+            for sample, value in (line.rsplit(" ", 1) for line in response.content.decode().splitlines() if not line.startswith("#"))
+        }
+
+    def test_query_stats_per_route(self):
+        user = UserAccount.objects.create_user(
+            email="member@ashesi.edu.gh", password="Passw0rd!", firstname="Ama", lastname="Mensah", mobile_number="0200000001"
+        )
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+        before = self.scrape()
+        response = client.get("/api/account/notifications/")
+        after = self.scrape()
+
+        route = response.resolver_match.view_name
+        metrics = response.query_metrics
+        self.assertGreater(metrics.count, 0)
+        for sample, change in (
+            (f'studyally_db_queries_total{{route="{route}"}}', metrics.count),
+            (f'studyally_db_query_seconds_total{{route="{route}"}}', metrics.duration),
+            (f'studyally_db_queries_per_request_count{{route="{route}"}}', 1),
+            (f'studyally_db_queries_per_request_sum{{route="{route}"}}', metrics.count),
+            (f'studyally_db_repeated_queries_total{{route="{route}"}}', metrics.repeated),
+        ):
+            self.assertAlmostEqual(after[sample] - before.get(sample, 0), change, msg=sample)
+
+    def test_repeated_queries(self):
+        metrics = QueryMetrics()
+        metrics.fingerprints.update({"SELECT ? FROM a": 3, "SELECT ? FROM b": 1})
+        self.assertEqual(metrics.repeated, 2)
+
+
+@override_settings(METRICS_DIR=None)
+class MetricsRenderTest(SimpleTestCase):
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_labelled_metrics_without_samples_have_no_series(self):
+        Counter("logins_total", "Logins.", registry=self.registry)
+        requests = Counter("requests_total", "Requests.", ("route",), registry=self.registry)
+        self.assertEqual(self.registry.render().splitlines(), [
+            "# HELP logins_total Logins.", "# TYPE logins_total counter", "logins_total 0",
+            "# HELP requests_total Requests.", "# TYPE requests_total counter",
+        ])
+
+        requests.inc(route='say "hi"')
+        self.assertEqual(self.registry.render().splitlines()[-1], 'requests_total{route="say \\"hi\\""} 1')
+
+    def test_labels_must_match(self):
+        requests = Counter("requests_total", "Requests.", ("route", "method"), registry=self.registry)
+        with self.assertRaises(ValueError):
+            requests.inc(route="user")
+
+    def test_histogram_buckets_are_cumulative(self):
+        latency = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0), registry=self.registry)
+        Gauge("in_progress", "In progress.", registry=self.registry).inc()
+        for value in (0.05, 0.5, 0.7, 5):
+            latency.observe(value, route="user")
+        self.assertEqual(self.registry.render().splitlines()[2:7], [
+            'latency_seconds_bucket{route="user",le="0.1"} 1',
+            'latency_seconds_bucket{route="user",le="1.0"} 3',
+            'latency_seconds_bucket{route="user",le="+Inf"} 4',
+            'latency_seconds_sum{route="user"} 6.25',
+            'latency_seconds_count{route="user"} 4',
+        ])
+
+
+class MetricsDirectoryTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings_override = override_settings(METRICS_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.registry = Registry()
+        self.logins = Counter("logins_total", "Logins.", registry=self.registry)
+        self.in_progress = Gauge("in_progress", "In progress.", registry=self.registry)
+
+    def write_worker(self, name, logins, in_progress):
+        key = self.logins.key({})
+        values = {"counter": {key: logins}, "gauge": {self.in_progress.key({}): in_progress}, "histogram": {}}
+        with open(os.path.join(self.directory, f"{name}.json"), "w") as file:
+            json.dump(values, file)
+
+    def collect(self):
+        values = self.registry.collect()
+        return values["counter"].get(self.logins.key({}), 0), values["gauge"].get(self.in_progress.key({}), 0)
+
+    def test_exited_workers_are_archived_once(self):
+        self.logins.inc(2)
+        self.in_progress.inc()
+        # pids are at most 2 ** 22 on Linux
+        self.write_worker("99999999-1", logins=5, in_progress=3)
+
+        self.assertEqual(self.collect(), (7, 1))
+        self.assertEqual(sorted(os.listdir(self.directory)), [".lock", f"{process_name(os.getpid())}.json", "archive.json"])
+        self.assertEqual(self.collect(), (7, 1))
+
+    @skipUnless(os.path.exists("/proc/self/stat"), "needs /proc to tell processes apart")
+    def test_reused_pid_is_a_different_worker(self):
+        # an earlier process that had this pid
+        self.write_worker(f"{os.getpid()}-1", logins=5, in_progress=3)
+        self.logins.inc()
+
+        self.assertEqual(self.collect(), (6, 0))
+        self.assertNotIn(f"{os.getpid()}-1.json", os.listdir(self.directory))
+
+
+class FastJSONTest(SimpleTestCase):
+    def assertRendersLikeDRF(self, data, accepted_media_type=None, renderer_context=None,
+                             renderer_class=ORJSONRenderer, reference_class=JSONRenderer):
+        rendered = renderer_class().render(data, accepted_media_type, renderer_context)
+        self.assertEqual(rendered, reference_class().render(data, accepted_media_type, renderer_context))
+        return rendered
+
+    def parse(self, parser_class, body, encoding="utf-8"):
+        return parser_class().parse(BytesIO(body), parser_context={"encoding": encoding})
+
+    def test_decimal(self):
+        rendered = self.assertRendersLikeDRF({"rating": Decimal("4.50"), "ratings": [Decimal("1"), Decimal("0.1")]})
+        self.assertEqual(json.loads(rendered), {"rating": 4.5, "ratings": [1.0, 0.1]})
+
+    def test_dates_and_times(self):
+        self.assertRendersLikeDRF({
+            "created_at": datetime(2024, 3, 5, 14, 30, 15, 123456, tzinfo=timezone.utc),
+            "naive": datetime(2024, 3, 5, 14, 30),
+            "offset": datetime(2024, 3, 5, 14, 30, tzinfo=timezone(timedelta(hours=1))),
+            "day": date(2024, 3, 5),
+            "start_time": datetime(2024, 3, 5, 9, 15).time(),
+            "duration": timedelta(hours=1, minutes=30),
+            "id": UUID("12345678-1234-5678-1234-567812345678"),
+        })
+
+    def test_lazy_strings(self):
+        rendered = self.assertRendersLikeDRF({"detail": gettext_lazy("Group not found")})
+        self.assertEqual(rendered, b'{"detail":"Group not found"}')
+
+    def test_line_separators_are_escaped(self):
+        rendered = self.assertRendersLikeDRF({"bio": "Akwaaba\u2028\u2029"})
+        self.assertIn(b"\\u2028\\u2029", rendered)
+
+    def test_ensure_ascii_falls_back(self):
+        class ASCIIRenderer(ORJSONRenderer):
+            ensure_ascii = True
+
+        class ASCIIJSONRenderer(JSONRenderer):
+            ensure_ascii = True
+
+        rendered = self.assertRendersLikeDRF(
+            {"name": "Kɔfi"}, renderer_class=ASCIIRenderer, reference_class=ASCIIJSONRenderer
+        )
+        self.assertEqual(rendered, b'{"name":"K\\u0254fi"}')
+
+    def test_indent_falls_back(self):
+        data = {"name": "Kɔfi", "interests": ["maths"]}
+        rendered = self.assertRendersLikeDRF(data, "application/json; indent=4")
+        self.assertIn(b'\n    "name"', rendered)
+        self.assertRendersLikeDRF(data, "application/json", {"indent": 2})
+
+    def test_unencodable_values_fall_back(self):
+        self.assertRendersLikeDRF({"big": 2 ** 70})
+        with self.assertRaises(TypeError):
+            ORJSONRenderer().render({"value": object()})
+
+    def test_none_renders_empty(self):
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+    def test_parse(self):
+        body = '{"name": "Kɔfi", "ids": [1, 2]}'
+        self.assertEqual(self.parse(ORJSONParser, body.encode()), {"name": "Kɔfi", "ids": [1, 2]})
+        self.assertEqual(
+            self.parse(ORJSONParser, body.encode("utf-16"), "utf-16"), self.parse(JSONParser, body.encode("utf-16"), "utf-16")
+        )
+
+    def test_parse_nan_falls_back(self):
+        class LenientParser(ORJSONParser):
+            strict = False
+
+        parsed = self.parse(LenientParser, b'{"score": NaN}')
+        self.assertTrue(math.isnan(parsed["score"]))
+
+    def test_parse_errors_match_drf(self):
+        for body in (b'{"name": ', b"\xff\xfe", b"[1, 2,]", b'{"score": NaN}'):
+            with self.subTest(body=body):
+                with self.assertRaises(ParseError) as expected:
+                    self.parse(JSONParser, body)
+                with self.assertRaises(ParseError) as context:
+                    self.parse(ORJSONParser, body)
+                self.assertEqual(str(context.exception.detail), str(expected.exception.detail))
@@ -14,14 +14,28 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
-from django.urls import path, include
+import re
+
+from django.apps import apps
+from django.urls import path, re_path, include
 
 from django.conf import settings
-from django.conf.urls.static import static
+
+from .media import serve_media
+from .metrics import metrics_view
+from .profiling import ListProfilesView, DownloadProfileView
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('api/account/', include('accounts.urls'), name='accounts_api'),
     path('api/groups/', include('groups.urls'), name='groups_api'),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path('metrics', metrics_view, name='metrics'),
+    path('api/_profiler/', ListProfilesView.as_view(), name='profiler_list'),
+    path('api/_profiler/<str:name>.folded', DownloadProfileView.as_view(), name='profiler_download'),
+    re_path(r'^%s(?P<path>.+)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media, name='media'),
+]
+
+# not installed with LEAN_STARTUP
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+
+    urlpatterns.insert(0, path('admin/', admin.site.urls))
@@ -0,0 +1,129 @@
+from django.conf import settings
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import status
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from StudyAlly.conditional import not_modified, set_etag, version_etag
+from .models import AccessBlacklist, Notification, UserAccount, UserProfile
+from .serializers import UserProfileSerializer, notification_rows
+from .versions import own_profile_version
+
+
+def select_view(sync_view, async_view):
+    # ASGI deployments (see asgi.py) serve the hot reads from the async views
+    if settings.ASYNC_VIEWS:
+        return async_view.as_view(sync_view=sync_view)
+    return sync_view.as_view()
+
+
+async def serialize(serializer_class, instance, many=False, **kwargs):
+    # the serializer's ato_representation loads its related rows with the async ORM
+    serializer = serializer_class(**kwargs)
+    if many:
+        return [await serializer.ato_representation(item) for item in instance]
+    return await serializer.ato_representation(instance)
+
+
+class AsyncAPIView(View):
+    """Async counterpart of the authenticated read-only APIViews.
+
+    Does the work of JWTAuthentication, IsAuthenticated and AccessBlacklisted
+    with the async ORM, then renders the (data, status) a handler returns
+    with the default DRF renderer, so responses match the sync views.
+    Views that override `version` are served conditionally, as
+    StudyAlly.conditional.conditional_get serves the sync ones, and OPTIONS
+    is answered with the DRF metadata of `sync_view`.
+    """
+
+    # as in APIView, the first one renders
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    # the APIView this view stands in for, set by select_view
+    sync_view = None
+
+    async def dispatch(self, request, *args, **kwargs):
+        handler = getattr(self, request.method.lower(), None)
+        if request.method.lower() not in self.http_method_names or handler is None:
+            return self.render({"detail": f'Method "{request.method}" not allowed.'}, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+        error = await self.authenticate(request)
+        if error is not None:
+            return self.render(error, status.HTTP_401_UNAUTHORIZED, {"WWW-Authenticate": 'Bearer realm="api"'})
+
+        version = self.version(request, *args, **kwargs) if request.method in ("GET", "HEAD") else None
+        if version is None:
+            data, status_code = await handler(request, *args, **kwargs)
+            return self.render(data, status_code)
+
+        etag = version_etag(request, [row async for row in version])
+        response = not_modified(request, etag)
+        if response is None:
+            data, status_code = await handler(request, *args, **kwargs)
+            return set_etag(self.render(data, status_code), etag)
+        # DRF adds its headers to 304s too
+        return self.add_headers(response)
+
+    def version(self, request, *args, **kwargs):
+        # the queryset of (id, updated_at) rows the response is built from
+        return None
+
+    async def options(self, request, *args, **kwargs):
+        view = self.sync_view(request=request, args=args, kwargs=kwargs)
+        return view.metadata_class().determine_metadata(request, view), status.HTTP_200_OK
+
+    async def authenticate(self, request):
+        authentication = JWTAuthentication()
+        header = authentication.get_header(request)
+        raw_token = authentication.get_raw_token(header) if header else None
+        if raw_token is None:
+            return {"detail": "Authentication credentials were not provided."}
+
+        try:
+            token = authentication.get_validated_token(raw_token)
+        except InvalidToken as exc:
+            return exc.detail
+
+        user = await UserAccount.objects.filter(**{jwt_settings.USER_ID_FIELD: token[jwt_settings.USER_ID_CLAIM]}).afirst()
+        if user is None:
+            return {"detail": "User not found", "code": "user_not_found"}
+        if not user.is_active:
+            return {"detail": "User is inactive", "code": "user_inactive"}
+
+        if await AccessBlacklist.objects.filter(token=raw_token.decode()).aexists():
+            return {"detail": "User not authenticated"}
+
+        request.user = user
+        return None
+
+    def render(self, data, status_code, headers=None):
+        renderer = self.renderer_classes[0]()
+        response = HttpResponse(
+            renderer.render(data, renderer.media_type), status=status_code, content_type=renderer.media_type, headers=headers
+        )
+        return self.add_headers(response)
+
+    def add_headers(self, response):
+        response["Allow"] = ", ".join(method.upper() for method in self._allowed_methods())
+        if len(self.renderer_classes) > 1:
+            response["Vary"] = "Accept"
+        return response
+
+
+class AsyncRetrieveUserProfileView(AsyncAPIView):
+    def version(self, request):
+        return own_profile_version(request)
+
+    async def get(self, request):
+        user_profile = await UserProfile.objects.select_related("user").aget(user=request.user)
+        return await serialize(UserProfileSerializer, user_profile, context={"request": request}), status.HTTP_200_OK
+
+
+class AsyncRetrieveUserNotificationsView(AsyncAPIView):
+    query_budget = 3
+
+    async def get(self, request):
+        notifications = Notification.objects.filter(user=request.user)
+        return await notification_rows.aserialize(notifications), status.HTTP_200_OK
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+from django.utils import timezone
+
+
+PROFILES = {
+    "default": "django.db.backends.sqlite3",
+    "production": "StudyAlly.sqlite_backend",
+}
+
+
+class Command(BaseCommand):
+    help = "Measure concurrent write throughput of the default and production SQLite profiles"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--writes", type=int, default=200, help="Writes per thread")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'profile':<12}{'threads':>8}{'commits':>9}{'errors':>8}{'seconds':>9}{'commits/s':>11}")
+        for profile, engine in PROFILES.items():
+            with tempfile.TemporaryDirectory() as directory:
+                commits, errors, elapsed = self.run_profile(
+                    profile, engine, os.path.join(directory, "bench.sqlite3"), options["threads"], options["writes"]
+                )
+            self.stdout.write(
+                f"{profile:<12}{options['threads']:>8}{commits:>9}{errors:>8}{elapsed:>9.2f}{commits / elapsed:>11.0f}"
+            )
+
+    def run_profile(self, profile, engine, name, threads, writes):
+        alias = f"benchmark_{profile}"
+        connections.settings[alias] = connections.configure_settings(
+            {"default": {"ENGINE": engine, "NAME": name}}
+        )["default"]
+
+        with connections[alias].cursor() as cursor:
+            cursor.execute(
+                "CREATE TABLE notification (id INTEGER PRIMARY KEY, user_id INTEGER, message TEXT, date TEXT, is_read BOOL)"
+            )
+        connections[alias].close()
+
+        results = []
+        lock = threading.Lock()
+
+        def worker(user_id):
+            commits = errors = 0
+            for i in range(writes):
+                try:
+                    # the read-then-write shape of the views: check, then insert a notification
+                    with transaction.atomic(using=alias):
+                        with connections[alias].cursor() as cursor:
+                            cursor.execute("SELECT COUNT(*) FROM notification WHERE user_id = %s", [user_id])
+                            cursor.execute(
+                                "INSERT INTO notification (user_id, message, date, is_read) VALUES (%s, %s, %s, 0)",
+                                [user_id, f"benchmark notification {i}", timezone.now().isoformat()],
+                            )
+                    commits += 1
+                except OperationalError:
+                    errors += 1
+            connections[alias].close()
+            with lock:
+                results.append((commits, errors))
+
+        workers = [threading.Thread(target=worker, args=(user_id,)) for user_id in range(threads)]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        del connections.settings[alias]
+        return sum(commits for commits, _ in results), sum(errors for _, errors in results), elapsed
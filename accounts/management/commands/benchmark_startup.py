@@ -0,0 +1,90 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# runs in a fresh interpreter: boot the application, serve one request, report
+CHILD = """
+import io, json, sys, time
+start = time.perf_counter()
+from importlib import import_module
+application = import_module(sys.argv[1]).application
+booted = time.perf_counter()
+path, authorization = sys.argv[2], sys.argv[3]
+if sys.argv[1].endswith("asgi"):
+    import asyncio
+    messages, requests = [], [{"type": "http.request", "body": b"", "more_body": False}]
+    async def receive():
+        if requests:
+            return requests.pop()
+        await asyncio.Event().wait()
+    async def send(message):
+        messages.append(message)
+    headers = [(b"host", b"localhost")] + ([(b"authorization", authorization.encode())] if authorization else [])
+    asyncio.run(application({
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "", "headers": headers,
+        "client": ("127.0.0.1", 0), "server": ("localhost", 80),
+    }, receive, send))
+    status = messages[0]["status"]
+else:
+    statuses = []
+    environ = {
+        "REQUEST_METHOD": "GET", "PATH_INFO": path, "SCRIPT_NAME": "", "QUERY_STRING": "",
+        "SERVER_NAME": "localhost", "SERVER_PORT": "80", "SERVER_PROTOCOL": "HTTP/1.1", "HTTP_HOST": "localhost",
+        "wsgi.version": (1, 0), "wsgi.url_scheme": "http", "wsgi.input": io.BytesIO(), "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True, "wsgi.multiprocess": False, "wsgi.run_once": False,
+    }
+    if authorization:
+        environ["HTTP_AUTHORIZATION"] = authorization
+    b"".join(application(environ, lambda status, headers: statuses.append(status)))
+    status = int(statuses[0].split()[0])
+print(json.dumps({
+    "boot": booted - start, "request": time.perf_counter() - booted, "status": status, "modules": len(sys.modules),
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Measure time to first response of a freshly started process, with and without LEAN_STARTUP"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5)
+        parser.add_argument("--asgi", action="store_true", help="Boot StudyAlly.asgi instead of StudyAlly.wsgi")
+        parser.add_argument("--path", default="/api/account/notifications/")
+        parser.add_argument("--authorization", default="", help='e.g. "Bearer <access token>" for an authenticated request')
+
+    def handle(self, *args, **options):
+        module = "StudyAlly.asgi" if options["asgi"] else "StudyAlly.wsgi"
+        self.stdout.write(f"{module} GET {options['path']}, median of {options['runs']} runs")
+        self.stdout.write(f"{'profile':<10}{'total ms':>10}{'boot ms':>10}{'request ms':>12}{'modules':>9}{'status':>8}")
+
+        for lean in ("0", "1"):
+            runs = [self.run_once(module, lean, options) for _ in range(options["runs"])]
+            self.stdout.write(
+                f"{'lean' if lean == '1' else 'default':<10}"
+                f"{statistics.median(run['total'] for run in runs) * 1000:>10.0f}"
+                f"{statistics.median(run['boot'] for run in runs) * 1000:>10.0f}"
+                f"{statistics.median(run['request'] for run in runs) * 1000:>12.1f}"
+                f"{runs[-1]['modules']:>9}{runs[-1]['status']:>8}"
+            )
+
+    def run_once(self, module, lean, options):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "StudyAlly.settings"),
+               "LEAN_STARTUP": lean, "PYTHONDONTWRITEBYTECODE": "1"}
+        # total includes interpreter startup, as a scaled-from-zero instance sees it
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", CHILD, module, options["path"], options["authorization"]],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        total = time.perf_counter() - start
+        if result.returncode:
+            raise CommandError(result.stderr)
+        return {**json.loads(result.stdout.splitlines()[-1]), "total": total}
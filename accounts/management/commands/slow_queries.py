@@ -0,0 +1,54 @@
+import json
+import os
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Report the slowest query fingerprints from the slow query log"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=10)
+        parser.add_argument("--plans", action="store_true", help="Show the latest query plan of each fingerprint")
+
+    def handle(self, *args, **options):
+        offenders = defaultdict(lambda: {"count": 0, "total": 0.0, "max": 0.0, "views": set(), "plan": []})
+        for entry in self.read_entries():
+            offender = offenders[entry["fingerprint"]]
+            offender["count"] += 1
+            offender["total"] += entry["duration_ms"]
+            offender["max"] = max(offender["max"], entry["duration_ms"])
+            offender["views"].add(entry["view"])
+            if entry["plan"] is not None:
+                offender["plan"] = entry["plan"]
+
+        if not offenders:
+            self.stdout.write("No slow queries logged")
+            return
+
+        ranked = sorted(offenders.items(), key=lambda item: item[1]["total"], reverse=True)[:options["limit"]]
+        self.stdout.write(f"{'total ms':>10}{'count':>7}{'avg ms':>9}{'max ms':>9}  views / query")
+        for sql, offender in ranked:
+            self.stdout.write(
+                f"{offender['total']:>10.1f}{offender['count']:>7}{offender['total'] / offender['count']:>9.1f}"
+                f"{offender['max']:>9.1f}  {', '.join(sorted(offender['views']))}"
+            )
+            self.stdout.write(f"    {sql}")
+            if options["plans"]:
+                for line in offender["plan"]:
+                    self.stdout.write(f"      {line}")
+
+    def read_entries(self):
+        # oldest rotated file first, so the latest plan wins
+        paths = [f"{settings.SLOW_QUERY_LOG}.{index}" for index in range(settings.SLOW_QUERY_LOG_BACKUPS, 0, -1)]
+        for path in paths + [settings.SLOW_QUERY_LOG]:
+            if not os.path.exists(path):
+                continue
+            with open(path) as log:
+                for line in log:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
@@ -0,0 +1,26 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Copy the primary SQLite database into the configured replica files"
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError("No replicas configured, set DB_REPLICAS")
+
+        source = sqlite3.connect(settings.DATABASES["default"]["NAME"])
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                name = settings.DATABASES[alias]["NAME"]
+                # online backup, consistent even while the primary is being written to
+                target = sqlite3.connect(name)
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f"Synced {alias} ({name})")
+        finally:
+            source.close()
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.14 on 2026-10-19 10:12
+
+from django.db import migrations, models
+
+
+def remove_duplicate_interests(apps, schema_editor):
+    UserInterest = apps.get_model("accounts", "UserInterest")
+    seen = set()
+    for interest in UserInterest.objects.order_by("id"):
+        key = (interest.user_id, interest.interest)
+        if key in seen:
+            interest.delete()
+        seen.add(key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_remove_notification_is_deleted'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_interests, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='userinterest',
+            constraint=models.UniqueConstraint(fields=('user', 'interest'), name='unique_user_interest'),
+        ),
+    ]
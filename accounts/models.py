@@ -108,12 +108,19 @@ class UserProfile(models.Model):
     major = models.CharField(max_length=50, choices=Major.choices)
     profile_picture = models.ImageField(upload_to="profile_pictures/", null=True, blank=True)
     date_of_birth = models.DateField()
+    # also bumped when the account or its interests change (accounts.versions)
+    updated_at = models.DateTimeField(auto_now=True)
 
 
 class UserInterest(models.Model):
     user = models.ForeignKey(UserAccount, on_delete=models.CASCADE)
     interest = models.CharField(max_length=50, choices=Interest.choices)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "interest"], name="unique_user_interest"),
+        ]
+
 
 class Notification(models.Model):
     user = models.ForeignKey(UserAccount, on_delete=models.CASCADE)
@@ -3,6 +3,7 @@ from rest_framework import serializers
 from django.core.validators import validate_email
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
+from StudyAlly.fastserializers import CompiledSerializer
 from .models import (
     UserAccount, UserProfile, UserInterest, Notification, Major, Interest
 )
@@ -192,6 +193,14 @@ class UserProfileSerializer(serializers.ModelSerializer):
         return instance
     
     def to_representation(self, instance):
+        # retrieve user interests
+        return self.profile_representation(instance, user_interest_rows.serialize(UserInterest.objects.filter(user=instance.user)))
+
+    async def ato_representation(self, instance):
+        # to_representation with the interests loaded through the async ORM
+        return self.profile_representation(instance, await user_interest_rows.aserialize(UserInterest.objects.filter(user=instance.user)))
+
+    def profile_representation(self, instance, interests):
         user_profile = super().to_representation(instance)
         user_profile["user"] = instance.user.id
         user_profile["firstname"] = instance.user.firstname
@@ -199,12 +208,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
         user_profile["email"] = instance.user.email
         user_profile["mobile_number"] = instance.user.mobile_number
         user_profile["date_joined"] = instance.user.date_joined
-
-        # retrieve user interests
-        user_interests = UserInterest.objects.filter(user=instance.user)
-        user_profile["interests"] = []
-        for interest in user_interests:
-            user_profile["interests"].append(UserInterestSerializer(interest).data)
+        user_profile["interests"] = interests
         return user_profile
 
 
@@ -230,4 +234,9 @@ class NotificationSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         validated_data["user"] = self.context["request"].user
-        return Notification.objects.create(**validated_data)
\ No newline at end of file
+        return Notification.objects.create(**validated_data)
+
+
+# read-only fast paths over .values() rows for the hot list reads
+user_interest_rows = CompiledSerializer(UserInterestSerializer)
+notification_rows = CompiledSerializer(NotificationSerializer)
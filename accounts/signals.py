@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import UserAccount, UserInterest
+from .versions import touch_profiles
+
+
+# the account fields UserProfileSerializer (and StudyGroupSerializer's creator) show
+PROFILE_ACCOUNT_FIELDS = {"firstname", "lastname", "email", "mobile_number", "date_joined"}
+
+
+def profile_fields_changed(update_fields):
+    return update_fields is None or not PROFILE_ACCOUNT_FIELDS.isdisjoint(update_fields)
+
+
+@receiver(post_save, sender=UserAccount)
+def account_changed(sender, instance, created, update_fields, **kwargs):
+    if not created and profile_fields_changed(update_fields):
+        touch_profiles(instance.id)
+
+
+@receiver([post_save, post_delete], sender=UserInterest)
+def interest_changed(sender, instance, **kwargs):
+    touch_profiles(instance.user_id)
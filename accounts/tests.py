@@ -1,3 +1,190 @@
-from django.test import TestCase
+import datetime
+import io
+import tempfile
+from unittest import skipUnless
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from StudyAlly.testing import AsyncParityTestMixin, QueryBudgetTestMixin
+from .async_views import AsyncRetrieveUserNotificationsView, AsyncRetrieveUserProfileView
+from .models import Notification, UserAccount, UserInterest, UserProfile
+from .views import RetrieveUserNotificationsView, RetrieveUserProfileView
+from .serializers import NotificationSerializer, UserInterestSerializer, notification_rows, user_interest_rows
+
+
+class UserInterestConstraintTest(TestCase):
+    def test_interest_upsert_is_idempotent(self):
+        user = UserAccount.objects.create_user(
+            email="member@ashesi.edu.gh", password="Passw0rd!", firstname="Ama", lastname="Mensah", mobile_number="0200000001"
+        )
+        for _ in range(2):
+            UserInterest.objects.bulk_create([UserInterest(user=user, interest="Finance")], ignore_conflicts=True)
+        self.assertEqual(UserInterest.objects.filter(user=user).count(), 1)
+
+    @skipUnless(connection.vendor == "sqlite", "query plans are SQLite specific")
+    def test_interest_lookup_uses_composite_index(self):
+        sql, params = UserInterest.objects.filter(user_id=1, interest="Finance").query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            plan = " ".join(row[-1] for row in cursor.fetchall())
+        self.assertIn("(user_id=? AND interest=?)", plan)
+
+
+class NotificationsQueryBudgetTest(QueryBudgetTestMixin, TestCase):
+    def test_notifications_within_budget(self):
+        user = UserAccount.objects.create_user(
+            email="member@ashesi.edu.gh", password="Passw0rd!", firstname="Ama", lastname="Mensah", mobile_number="0200000001"
+        )
+        Notification.objects.bulk_create([Notification(user=user, message=f"Message {i}") for i in range(5)])
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+        response = client.get("/api/account/notifications/")
+        self.assertEqual(len(response.data), 5)
+        self.assertWithinQueryBudget(response)
+
+
+class CompiledSerializerTest(TestCase):
+    def test_rows_match_model_serializers(self):
+        user = UserAccount.objects.create_user(
+            email="member@ashesi.edu.gh", password="Passw0rd!", firstname="Ama", lastname="Mensah", mobile_number="0200000001"
+        )
+        Notification.objects.bulk_create([Notification(user=user, message="Hi", is_read=True), Notification(user=user, message="Ho")])
+        UserInterest.objects.bulk_create([UserInterest(user=user, interest="Finance"), UserInterest(user=user, interest="Networks")])
+
+        self.assertEqual(notification_rows.serialize(Notification.objects.all()), NotificationSerializer(Notification.objects.all(), many=True).data)
+        self.assertEqual(user_interest_rows.serialize(UserInterest.objects.all()), UserInterestSerializer(UserInterest.objects.all(), many=True).data)
+
+
+class ImageUploadTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name, IMAGE_UPLOAD_MAX_SIZE=4096)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        user = UserAccount.objects.create_user(
+            email="member@ashesi.edu.gh", password="Passw0rd!", firstname="Ama", lastname="Mensah", mobile_number="0200000001"
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+    def add_profile(self, content, name="avatar.png"):
+        return self.client.post("/api/account/profile/add/", {
+            "major": "Computer Science", "date_of_birth": "2000-01-01",
+            "profile_picture": SimpleUploadedFile(name, content, content_type="image/png"),
+        }, format="multipart")
+
+    def png(self, size=(8, 8)):
+        buffer = io.BytesIO()
+        Image.new("RGB", size).save(buffer, "PNG")
+        return buffer.getvalue()
+
+    def test_image_is_stored(self):
+        response = self.add_profile(self.png())
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(UserProfile.objects.get().profile_picture.name.startswith("profile_pictures/avatar"))
+
+    def test_non_image_is_unsupported(self):
+        # named and labelled as a png, but the first bytes say otherwise
+        response = self.add_profile(b"#!/bin/sh\necho not an image\n")
+        self.assertEqual(response.status_code, 415)
+        self.assertEqual(response.data["detail"].code, "unsupported_image")
+        self.assertFalse(UserProfile.objects.exists())
+
+    def test_short_non_image_is_unsupported(self):
+        # shorter than the sniffed header, so checked once the file is complete
+        self.assertEqual(self.add_profile(b"GIF").status_code, 415)
+
+    def test_oversized_image_is_rejected(self):
+        response = self.add_profile(self.png() + b"\0" * 8192)
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(response.data["detail"].code, "upload_too_large")
+        self.assertFalse(UserProfile.objects.exists())
+
+
+class ProfileInterestsTest(TestCase):
+    def setUp(self):
+        user = UserAccount.objects.create_user(
+            email="member@ashesi.edu.gh", password="Passw0rd!", firstname="Ama", lastname="Mensah", mobile_number="0200000001"
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+    def interests(self, response):
+        return sorted(interest["interest"] for interest in response.data["interests"])
+
+    def test_create_and_update_responses_list_the_new_interests(self):
+        response = self.client.post("/api/account/profile/add/", {
+            "major": "Computer Science", "date_of_birth": "2000-01-01", "interests": ["Networks", "Data Science", "Astrology"],
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.interests(response), ["Data Science", "Networks"])
+
+        response = self.client.patch("/api/account/profile/update/", {"interests": ["Networks", "Machine Learning"]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.interests(response), ["Data Science", "Machine Learning", "Networks"])
+
+
+class ProfileConditionalGetTest(TestCase):
+    def test_unchanged_profile_is_not_modified(self):
+        user = UserAccount.objects.create_user(
+            email="member@ashesi.edu.gh", password="Passw0rd!", firstname="Ama", lastname="Mensah", mobile_number="0200000001"
+        )
+        UserProfile.objects.create(user=user, major="Computer Science", date_of_birth=datetime.date(2000, 1, 1))
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+        etag = client.get("/api/account/user/profile/")["ETag"]
+        self.assertEqual(client.get("/api/account/user/profile/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # the last login isn't part of the profile, interests are
+        user.save(update_fields=["last_login"])
+        self.assertEqual(client.get("/api/account/user/profile/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        UserInterest.objects.create(user=user, interest="Finance")
+        response = client.get("/api/account/user/profile/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+class AsyncViewParityTest(AsyncParityTestMixin, TestCase):
+    def setUp(self):
+        user = UserAccount.objects.create_user(
+            email="member@ashesi.edu.gh", password="Passw0rd!", firstname="Ama", lastname="Mensah", mobile_number="0200000001"
+        )
+        UserProfile.objects.create(user=user, major="Computer Science", date_of_birth=datetime.date(2000, 1, 1))
+        UserInterest.objects.create(user=user, interest="Networks")
+        Notification.objects.bulk_create([Notification(user=user, message=f"Notification {i}") for i in range(3)])
+        self.headers = {"Authorization": f"Bearer {RefreshToken.for_user(user).access_token}"}
+
+    def test_notifications(self):
+        path = "/api/account/notifications/"
+        response = self.assertSameResponse(RetrieveUserNotificationsView, AsyncRetrieveUserNotificationsView, path, headers=self.headers)
+        self.assertEqual(len(response.data), 3)
+        self.assertSameResponse(RetrieveUserNotificationsView, AsyncRetrieveUserNotificationsView, path, method="delete", headers=self.headers)
+
+    def test_own_profile(self):
+        path = "/api/account/user/profile/"
+        response = self.assertSameResponse(RetrieveUserProfileView, AsyncRetrieveUserProfileView, path, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        response = self.assertSameResponse(
+            RetrieveUserProfileView, AsyncRetrieveUserProfileView, path, headers={**self.headers, "If-None-Match": response["ETag"]}
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.assertSameResponse(RetrieveUserProfileView, AsyncRetrieveUserProfileView, path).status_code, 401)
+
+    def test_options(self):
+        path = "/api/account/notifications/"
+        response = self.assertSameResponse(
+            RetrieveUserNotificationsView, AsyncRetrieveUserNotificationsView, path, method="options", headers=self.headers
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["name"], "Retrieve User Notifications")
+        path = "/api/account/user/profile/"
+        self.assertSameResponse(RetrieveUserProfileView, AsyncRetrieveUserProfileView, path, method="options", headers=self.headers)
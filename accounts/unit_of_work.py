@@ -0,0 +1,45 @@
+from collections import defaultdict
+from functools import wraps
+
+from django.db import transaction
+
+from StudyAlly.metrics import NOTIFICATIONS_CREATED
+from .models import Notification
+
+
+class UnitOfWork:
+    """Collects side-effect rows (notifications) of a mutation so each model
+    is inserted with a single bulk query right before commit. Rows the
+    response shows have to be written by the view itself."""
+
+    def __init__(self):
+        self.pending = defaultdict(list)
+
+    def add(self, *objs, ignore_conflicts=False):
+        for obj in objs:
+            self.pending[type(obj), ignore_conflicts].append(obj)
+
+    def flush(self):
+        for (model, ignore_conflicts), objs in self.pending.items():
+            model.objects.bulk_create(objs, ignore_conflicts=ignore_conflicts)
+            if model is Notification:
+                NOTIFICATIONS_CREATED.inc(len(objs))
+        self.pending.clear()
+
+
+def atomic_mutation(method):
+    """Run a view handler in one transaction with a UnitOfWork on
+    `self.unit_of_work`. Error responses and exceptions roll everything back."""
+
+    @wraps(method)
+    def wrapper(view, request, *args, **kwargs):
+        with transaction.atomic():
+            view.unit_of_work = UnitOfWork()
+            response = method(view, request, *args, **kwargs)
+            if response.status_code >= 400:
+                transaction.set_rollback(True)
+            else:
+                view.unit_of_work.flush()
+        return response
+
+    return wrapper
@@ -0,0 +1,112 @@
+from django.conf import settings
+from django.core.files.uploadhandler import StopUpload, TemporaryFileUploadHandler
+from django.http.multipartparser import MultiPartParser as DjangoMultiPartParser, MultiPartParserError
+from rest_framework import status
+from rest_framework.exceptions import APIException, ParseError
+from rest_framework.parsers import DataAndFiles, MultiPartParser
+
+
+IMAGE_SIGNATURES = [
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+]
+
+# enough bytes to recognise every signature above plus RIFF/WEBP
+SNIFF_LENGTH = 12
+
+
+class UploadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = "Uploaded image is too large"
+    default_code = "upload_too_large"
+
+
+class UnsupportedImage(APIException):
+    status_code = status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    default_detail = "Uploaded file is not a supported image"
+    default_code = "unsupported_image"
+
+
+def sniff_image_type(header):
+    for signature, content_type in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return content_type
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+class ImageUploadHandler(TemporaryFileUploadHandler):
+    """Stream image uploads to a temp file, aborting as soon as the size cap
+    is exceeded or the first bytes are not a known image signature."""
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_size = settings.IMAGE_UPLOAD_MAX_SIZE
+        self.error = None
+
+    def abort(self, error):
+        self.error = error
+        # don't read the rest of the body, the client gets an error right away
+        raise StopUpload(connection_reset=True)
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # reject before reading anything if the body can't possibly fit
+        if content_length > self.max_size + settings.DATA_UPLOAD_MAX_MEMORY_SIZE:
+            raise UploadTooLarge()
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        if content_length is not None and content_length > self.max_size:
+            self.abort(UploadTooLarge())
+
+        self.header = b""
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > self.max_size:
+            self.abort(UploadTooLarge())
+
+        if len(self.header) < SNIFF_LENGTH:
+            self.header += raw_data[:SNIFF_LENGTH - len(self.header)]
+            if len(self.header) == SNIFF_LENGTH:
+                self.check_header()
+
+        self.file.write(raw_data)
+
+    def check_header(self):
+        content_type = sniff_image_type(self.header)
+        if content_type is None:
+            self.abort(UnsupportedImage())
+        self.content_type = self.file.content_type = content_type
+
+    def file_complete(self, file_size):
+        # files shorter than the sniff window never got checked
+        if len(self.header) < SNIFF_LENGTH and sniff_image_type(self.header) is None:
+            self.error = UnsupportedImage()
+            self.file.close()
+            return None
+        return super().file_complete(file_size)
+
+
+class ImageMultiPartParser(MultiPartParser):
+    """Multipart parser for the image endpoints using ImageUploadHandler."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        request = parser_context["request"]
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        meta = request.META.copy()
+        meta["CONTENT_TYPE"] = media_type
+        handler = ImageUploadHandler(request._request)
+
+        try:
+            parser = DjangoMultiPartParser(meta, stream, [handler], encoding)
+            data, files = parser.parse()
+        except MultiPartParserError as exc:
+            raise ParseError("Multipart form parse error - %s" % str(exc))
+
+        if handler.error is not None:
+            raise handler.error
+        return DataAndFiles(data, files)
@@ -1,6 +1,7 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
 
+from .async_views import AsyncRetrieveUserNotificationsView, AsyncRetrieveUserProfileView, select_view
 from .views import (
     AccountRegistrationView, AccountLoginView, UserAccountView, AccountLogoutView,
     UpdateUserAccountView, AddUserProfileView, UpdateUserProfileView, RetrieveUserProfileView,
@@ -19,12 +20,12 @@ urlpatterns = [
 
     path("profile/add/", AddUserProfileView.as_view(), name="add_profile"),
     path("profile/update/", UpdateUserProfileView.as_view(), name="update_profile"),
-    path("user/profile/", RetrieveUserProfileView.as_view(), name="retrieve_profile"),
+    path("user/profile/", select_view(RetrieveUserProfileView, AsyncRetrieveUserProfileView), name="retrieve_profile"),
     path("profiles/", ListUserProfilesView.as_view(), name="list_profiles"),
     path("profile/<int:user_id>/", RetrieveUserProfileDetailsView.as_view(), name="retrieve_profile_details"),
     path("interests/remove/<int:interest_id>/", RemoveUserInterestView.as_view(), name="remove_interest"),
 
-    path("notifications/", RetrieveUserNotificationsView.as_view(), name="notifications"),
+    path("notifications/", select_view(RetrieveUserNotificationsView, AsyncRetrieveUserNotificationsView), name="notifications"),
     path("notifications/mark/read/<int:notification_id>/", MarkNotificationAsOrUnreadReadView.as_view(), name="mark_notification_read"),
     path("notifications/mark/unread/<int:notification_id>/", MarkNotificationAsOrUnreadReadView.as_view(), name="mark_notification_unread"),
     path("notifications/delete/<int:notification_id>/", DeleteNotificationView.as_view(), name="delete_notification"),
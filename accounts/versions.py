@@ -0,0 +1,20 @@
+from django.utils import timezone
+
+from .models import UserProfile
+
+
+def touch_profiles(*user_ids):
+    # moves the profiles' ETags when the account or interests they include change
+    UserProfile.objects.filter(user_id__in=user_ids).update(updated_at=timezone.now())
+
+
+def own_profile_version(request):
+    return UserProfile.objects.filter(user=request.user).values_list("id", "updated_at")
+
+
+def profile_version(request, user_id):
+    return UserProfile.objects.filter(user_id=user_id).values_list("id", "updated_at")
+
+
+def profiles_version(request):
+    return UserProfile.objects.order_by("id").values_list("id", "updated_at")
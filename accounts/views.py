@@ -2,6 +2,7 @@ from rest_framework import status, generics
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.parsers import FormParser
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.utils import timezone
@@ -10,8 +11,14 @@ from .models import UserAccount, UserProfile, UserInterest, Notification, Access
 from .serializers import (
     AccountRegistrationSerializer, AccountLoginSerializer, UserAccountSerializer, 
     UpdateUserAccountSerializer, UserProfileSerializer, UserInterestSerializer, 
-    NotificationSerializer)
+    NotificationSerializer, notification_rows)
 from .permissions import AccessBlacklisted
+from .uploads import ImageMultiPartParser
+from .unit_of_work import atomic_mutation
+from .versions import own_profile_version, profile_version, profiles_version
+from StudyAlly.conditional import conditional_get
+from StudyAlly.fastjson import ORJSONParser
+from StudyAlly.metrics import LOGINS
 
 
 class AccountRegistrationView(APIView):
@@ -41,7 +48,8 @@ class AccountLoginView(TokenObtainPairView):
 
             # update last login
             user.last_login = timezone.now()
-            user.save()
+            user.save(update_fields=["last_login"])
+            LOGINS.inc()
 
             return response
 
@@ -99,7 +107,9 @@ class UpdateUserAccountView(APIView):
 
 class AddUserProfileView(APIView):
     permission_classes = [IsAuthenticated, AccessBlacklisted]
+    parser_classes = [ORJSONParser, FormParser, ImageMultiPartParser]
 
+    @atomic_mutation
     def post(self, request):
         serializer = UserProfileSerializer(data=request.data, context={"request": request})
         if serializer.is_valid():
@@ -107,17 +117,19 @@ class AddUserProfileView(APIView):
 
             # if interests in request data, create user interests
             if "interests" in request.data:
-                for interest in request.data["interests"]:
-                    if interest in Interest and not UserInterest.objects.filter(user=user_profile.user, interest=interest).exists():
-                        user_interest = UserInterest.objects.create(user=user_profile.user, interest=interest)
-                        user_interest.save()
-            return Response(UserProfileSerializer(user_profile).data, status=status.HTTP_201_CREATED)
+                # written right away rather than at commit, the response lists them
+                UserInterest.objects.bulk_create(
+                    [UserInterest(user=user_profile.user, interest=interest) for interest in request.data["interests"] if interest in Interest],
+                    ignore_conflicts=True,
+                )
+            return Response(UserProfileSerializer(user_profile, context={"request": request}).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
 
 class RetrieveUserProfileView(APIView):
     permission_classes = [IsAuthenticated, AccessBlacklisted]
 
+    @conditional_get(own_profile_version)
     def get(self, request):
         user_profile = UserProfile.objects.get(user=request.user)
         serializer = UserProfileSerializer(user_profile, context={"request": request})
@@ -128,6 +140,10 @@ class ListUserProfilesView(generics.ListAPIView):
     permission_classes = [IsAuthenticated, AccessBlacklisted]
     queryset = UserProfile.objects.all()
     serializer_class = UserProfileSerializer
+
+    @conditional_get(profiles_version)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
     
 
 class RetrieveUserProfileDetailsView(generics.RetrieveAPIView):
@@ -135,11 +151,17 @@ class RetrieveUserProfileDetailsView(generics.RetrieveAPIView):
     queryset = UserProfile.objects.all()
     serializer_class = UserProfileSerializer
     lookup_field = "user_id"
+
+    @conditional_get(profile_version)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
     
 
 class UpdateUserProfileView(APIView):
     permission_classes = [IsAuthenticated, AccessBlacklisted]
+    parser_classes = [ORJSONParser, FormParser, ImageMultiPartParser]
 
+    @atomic_mutation
     def patch(self, request):
         user_profile = UserProfile.objects.get(user=request.user)
         serializer = UserProfileSerializer(user_profile, data=request.data, partial=True, context={"request": request})
@@ -148,10 +170,11 @@ class UpdateUserProfileView(APIView):
 
             # if interests in request data, create user interests
             if "interests" in request.data:
-                for interest in request.data["interests"]:
-                    if interest in Interest and not UserInterest.objects.filter(user=user_profile.user, interest=interest).exists():
-                        user_interest = UserInterest.objects.create(user=user_profile.user, interest=interest)
-                        user_interest.save()
+                # written right away rather than at commit, the response lists them
+                UserInterest.objects.bulk_create(
+                    [UserInterest(user=user_profile.user, interest=interest) for interest in request.data["interests"] if interest in Interest],
+                    ignore_conflicts=True,
+                )
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
@@ -172,11 +195,11 @@ class RemoveUserInterestView(APIView):
 
 class RetrieveUserNotificationsView(APIView):
     permission_classes = [IsAuthenticated, AccessBlacklisted]
+    query_budget = 3
 
     def get(self, request):
         notifications = Notification.objects.filter(user=request.user)
-        serializer = NotificationSerializer(notifications, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(notification_rows.serialize(notifications), status=status.HTTP_200_OK)
     
 
 class MarkNotificationAsOrUnreadReadView(APIView):
@@ -0,0 +1,63 @@
+from rest_framework import status
+
+from StudyAlly.metrics import RECOMMENDATIONS_SERVED
+from accounts.async_views import AsyncAPIView, serialize
+from accounts.models import UserInterest, UserProfile
+from .models import StudyGroup, GroupInterests
+from .roles import get_group_roles
+from .serializers import StudyGroupSerializer
+from .versions import group_version, member_groups_version
+
+
+class AsyncRetrieveStudyGroupView(AsyncAPIView):
+    def version(self, request, group_id):
+        return group_version(request, group_id)
+
+    async def get(self, request, group_id):
+        study_group = await StudyGroup.objects.select_related("creator").filter(id=group_id).afirst()
+        if study_group is None:
+            return {"message": "Group not found"}, status.HTTP_404_NOT_FOUND
+
+        return await serialize(StudyGroupSerializer, study_group, context={"request": request}), status.HTTP_200_OK
+
+
+class AsyncListStudyGroupsView(AsyncAPIView):
+    def version(self, request):
+        return member_groups_version(request)
+
+    async def get(self, request):
+        # retrieve groups the user is part of
+        group_roles = get_group_roles(request)
+        await group_roles.aload()
+        group_ids = group_roles.member_group_ids()
+        study_groups = [group async for group in StudyGroup.objects.filter(id__in=group_ids).select_related("creator")]
+        return await serialize(StudyGroupSerializer, study_groups, many=True, context={"request": request}), status.HTTP_200_OK
+
+
+class AsyncRecommendGroupView(AsyncAPIView):
+    async def get(self, request):
+        # users without a profile have no major, only their interests count
+        user_profile = await UserProfile.objects.filter(user=request.user).afirst()
+        major = user_profile.major if user_profile is not None else None
+
+        # get groups the user is not part of, same major first
+        possible_groups = StudyGroup.objects.exclude(groupmembers__member=request.user)
+        groups = [group async for group in possible_groups.select_related("creator")]
+        recommended_groups = [group for group in groups if group.major == major]
+        remaining_groups = [group for group in groups if group.major != major]
+
+        # then groups with similar interests as the user, in the order of the user's interests
+        user_interests = [interest async for interest in UserInterest.objects.filter(user=request.user).values_list("interest", flat=True)]
+        group_interests = {
+            pair async for pair in GroupInterests.objects.filter(
+                group__in=possible_groups, interest__in=user_interests
+            ).values_list("group_id", "interest")
+        }
+        for interest in user_interests:
+            for group in list(remaining_groups):
+                if (group.id, interest) in group_interests:
+                    recommended_groups.append(group)
+                    remaining_groups.remove(group)
+
+        RECOMMENDATIONS_SERVED.inc(len(recommended_groups))
+        return await serialize(StudyGroupSerializer, recommended_groups, many=True, context={"request": request}), status.HTTP_200_OK
@@ -0,0 +1,138 @@
+import datetime
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from accounts.models import Interest, Major, Notification, UserAccount, UserInterest, UserProfile
+from .models import GroupInterests, GroupMembers, GroupMembershipRequest, GroupScheduledTime, StudyGroup, Weekday
+
+
+DATASET_PASSWORD = "Synthetic1!"
+BATCH_SIZE = 500
+
+FIRSTNAMES = ["Ama", "Kofi", "Akosua", "Kwame", "Abena", "Yaw", "Efua", "Kojo", "Adwoa", "Kwesi", "Esi", "Kobby"]
+LASTNAMES = ["Mensah", "Owusu", "Boateng", "Asante", "Osei", "Addo", "Appiah", "Darko", "Ofori", "Agyeman"]
+
+# roughly the size of each programme
+MAJOR_WEIGHTS = {
+    Major.CS: 30, Major.MIS: 25, Major.BA: 20, Major.CE: 10, Major.EE: 8, Major.ME: 7,
+}
+
+
+def weighted_sample(population, weights, k, rng):
+    chosen = set()
+    while len(chosen) < min(k, len(population)):
+        chosen.add(rng.choices(population, weights)[0])
+    return list(chosen)
+
+
+@transaction.atomic
+def generate_dataset(users, groups=None, notifications_per_user=10, seed=0):
+    """Bulk insert a synthetic but realistically shaped dataset and return row counts.
+
+    Every user has a profile, 1-5 interests (a few popular ones dominate) and
+    the password DATASET_PASSWORD. Group sizes are long-tailed and members
+    mostly share the group's major. Rows are namespaced by a run token, so
+    the generator can be run repeatedly against the same database.
+    """
+    rng = random.Random(seed)
+    # not seeded, so reruns with the same seed don't collide
+    token = random.randrange(10 ** 6)
+    groups = users // 10 if groups is None else groups
+    password = make_password(DATASET_PASSWORD)
+    majors, major_weights = list(MAJOR_WEIGHTS), list(MAJOR_WEIGHTS.values())
+    interests = list(Interest)
+    interest_weights = [1 / (rank + 1) for rank in range(len(interests))]
+    rng.shuffle(interests)
+
+    accounts = UserAccount.objects.bulk_create([
+        UserAccount(
+            email=f"synthetic.{token}.{index}@ashesi.edu.gh",
+            mobile_number=f"9{token:06d}{index:07d}",
+            firstname=rng.choice(FIRSTNAMES),
+            lastname=rng.choice(LASTNAMES),
+            password=password,
+            is_verified=True,
+        )
+        for index in range(users)
+    ], batch_size=BATCH_SIZE)
+
+    profiles = UserProfile.objects.bulk_create([
+        UserProfile(
+            user=account,
+            major=rng.choices(majors, major_weights)[0],
+            date_of_birth=datetime.date(2000, 1, 1) + datetime.timedelta(days=rng.randrange(6 * 365)),
+        )
+        for account in accounts
+    ], batch_size=BATCH_SIZE)
+
+    UserInterest.objects.bulk_create([
+        UserInterest(user=account, interest=interest)
+        for account in accounts
+        for interest in weighted_sample(interests, interest_weights, rng.randint(1, 5), rng)
+    ], batch_size=BATCH_SIZE)
+
+    by_major = {}
+    for profile in profiles:
+        by_major.setdefault(profile.major, []).append(profile.user)
+
+    study_groups = []
+    for index in range(groups):
+        creator = rng.choice(profiles)
+        study_groups.append(StudyGroup(
+            name=f"{rng.choice(interests)} study group {index}",
+            major=creator.major,
+            creator=creator.user,
+            whatsAppLink=f"https://chat.whatsapp.com/synthetic{token}{index}",
+        ))
+    study_groups = StudyGroup.objects.bulk_create(study_groups, batch_size=BATCH_SIZE)
+
+    members, requests, interests_rows, times = [], [], [], []
+    for group in study_groups:
+        size = min(users, max(1, int(rng.lognormvariate(1.8, 0.7))))
+        same_major = by_major[group.major]
+        group_members = {group.creator_id: True}
+        while len(group_members) < size:
+            # most members share the group's major
+            pool = same_major if rng.random() < 0.7 else accounts
+            group_members.setdefault(rng.choice(pool).id, rng.random() < 0.1)
+        members.extend(GroupMembers(group=group, member_id=member_id, is_admin=is_admin) for member_id, is_admin in group_members.items())
+
+        for _ in range(rng.randint(0, 3)):
+            user = rng.choice(accounts)
+            if user.id not in group_members:
+                requests.append(GroupMembershipRequest(group=group, user=user))
+
+        interests_rows.extend(
+            GroupInterests(group=group, interest=interest)
+            for interest in weighted_sample(interests, interest_weights, rng.randint(1, 3), rng)
+        )
+
+        for _ in range(rng.randint(1, 3)):
+            start = rng.randint(8, 20)
+            times.append(GroupScheduledTime(
+                group=group, day=rng.choice(Weekday.values),
+                start_time=datetime.time(start), end_time=datetime.time(start + rng.randint(1, 2)),
+            ))
+
+    GroupMembers.objects.bulk_create(members, batch_size=BATCH_SIZE)
+    GroupMembershipRequest.objects.bulk_create(requests, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    GroupInterests.objects.bulk_create(interests_rows, batch_size=BATCH_SIZE)
+    GroupScheduledTime.objects.bulk_create(times, batch_size=BATCH_SIZE)
+
+    notifications = [
+        Notification(user=account, message=f"Synthetic notification {index}", is_read=rng.random() < 0.6)
+        for account in accounts
+        for index in range(rng.randint(0, 2 * notifications_per_user))
+    ]
+    Notification.objects.bulk_create(notifications, batch_size=BATCH_SIZE)
+
+    return {
+        "users": len(accounts),
+        "groups": len(study_groups),
+        "members": len(members),
+        "membership requests": len(requests),
+        "scheduled times": len(times),
+        "notifications": len(notifications),
+    }
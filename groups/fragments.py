@@ -0,0 +1,48 @@
+from django.core.cache import caches
+
+from StudyAlly.metrics import FRAGMENT_CACHE_LOOKUPS
+
+
+def group_fragment_key(group_id):
+    return f"groups:fragment:{group_id}"
+
+
+def invalidate_group_fragments(*group_ids):
+    caches["fragments"].delete_many([group_fragment_key(group_id) for group_id in group_ids])
+
+
+def get_group_fragment(group, build):
+    """The shared part of `group`'s representation, from the fragments cache
+    or from `build(group)` on a miss.
+
+    Entries are dropped by the signals in groups.signals after every change
+    that commits, and also carry the group's updated_at: an entry built from
+    rows a concurrent write was changing, or one another process's local
+    cache missed the invalidation of, no longer matches and is rebuilt.
+    """
+    cache = caches["fragments"]
+    key = group_fragment_key(group.id)
+    entry = cache.get(key)
+    if entry is not None and entry[0] == group.updated_at:
+        FRAGMENT_CACHE_LOOKUPS.inc(fragment="study_group", result="hit")
+        return entry[1]
+
+    FRAGMENT_CACHE_LOOKUPS.inc(fragment="study_group", result="miss")
+    fragment = build(group)
+    cache.set(key, (group.updated_at, fragment))
+    return fragment
+
+
+async def aget_group_fragment(group, abuild):
+    # get_group_fragment for the async views, `abuild` is a coroutine function
+    cache = caches["fragments"]
+    key = group_fragment_key(group.id)
+    entry = await cache.aget(key)
+    if entry is not None and entry[0] == group.updated_at:
+        FRAGMENT_CACHE_LOOKUPS.inc(fragment="study_group", result="hit")
+        return entry[1]
+
+    FRAGMENT_CACHE_LOOKUPS.inc(fragment="study_group", result="miss")
+    fragment = await abuild(group)
+    await cache.aset(key, (group.updated_at, fragment))
+    return fragment
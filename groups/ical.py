@@ -0,0 +1,83 @@
+import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+from .schedule import first_occurrence
+
+
+ICAL_DAYS = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+
+
+def escape_text(value):
+    return (
+        value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+    )
+
+
+def fold_line(line):
+    # content lines are limited to 75 octets, continuations start with a space
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line
+
+    parts = []
+    while encoded:
+        limit = 75 if not parts else 74
+        # don't split a multi-byte character
+        while limit < len(encoded) and (encoded[limit] & 0xC0) == 0x80:
+            limit -= 1
+        parts.append(encoded[:limit].decode())
+        encoded = encoded[limit:]
+    return "\r\n ".join(parts)
+
+
+def format_local(date, time):
+    return datetime.datetime.combine(date, time).strftime("%Y%m%dT%H%M%S")
+
+
+def format_utc(value):
+    return value.astimezone(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def scheduled_time_event(scheduled_time):
+    tzid = settings.TIME_ZONE
+    first = first_occurrence(scheduled_time)
+
+    rrule = f"FREQ=WEEKLY;INTERVAL={scheduled_time.interval_weeks};BYDAY={ICAL_DAYS[scheduled_time.day]}"
+    if scheduled_time.ends_on is not None:
+        until = timezone.make_aware(
+            datetime.datetime.combine(scheduled_time.ends_on, datetime.time.max), timezone.get_current_timezone()
+        )
+        rrule += f";UNTIL={format_utc(until)}"
+
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:scheduled-time-{scheduled_time.id}@studyally",
+        f"DTSTAMP:{format_utc(scheduled_time.updated_at)}",
+        f"DTSTART;TZID={tzid}:{format_local(first, scheduled_time.start_time)}",
+        f"DTEND;TZID={tzid}:{format_local(first, scheduled_time.end_time)}",
+        f"RRULE:{rrule}",
+        f"SUMMARY:{escape_text(scheduled_time.group.name)}",
+    ]
+    for exception in scheduled_time.groupscheduledtimeexception_set.all():
+        lines.append(f"EXDATE;TZID={tzid}:{format_local(exception.date, scheduled_time.start_time)}")
+    if scheduled_time.group.whatsAppLink:
+        lines.append(f"URL:{scheduled_time.group.whatsAppLink}")
+    lines.append("END:VEVENT")
+    return lines
+
+
+def render_calendar(scheduled_times):
+    """Render scheduled times as an iCalendar feed with one recurring event each."""
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//StudyAlly//Study Groups//EN",
+        "CALSCALE:GREGORIAN",
+        "X-WR-CALNAME:StudyAlly",
+    ]
+    for scheduled_time in scheduled_times:
+        lines.extend(scheduled_time_event(scheduled_time))
+    lines.append("END:VCALENDAR")
+    return "".join(fold_line(line) + "\r\n" for line in lines)
@@ -0,0 +1,181 @@
+import asyncio
+import io
+import logging
+import statistics
+import sys
+import threading
+import time
+from importlib import import_module, reload
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.db.models import Count
+from django.urls import clear_url_caches, reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import UserAccount
+from groups.dataset import generate_dataset
+from groups.models import StudyGroup
+from .benchmark_endpoints import percentile, url_prefixes
+
+
+# the endpoints that have async views, see ASYNC_VIEWS
+READ_ENDPOINTS = [
+    ("groups", "list_groups"),
+    ("groups", "retrieve_group"),
+    ("groups", "recommend_group"),
+    ("accounts", "notifications"),
+    ("accounts", "retrieve_profile"),
+]
+
+
+def use_async_views(enabled):
+    # the urlconfs pick their views at import time
+    settings.ASYNC_VIEWS = enabled
+    for module in ("accounts.urls", "groups.urls", settings.ROOT_URLCONF):
+        reload(import_module(module))
+    clear_url_caches()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the read endpoints under concurrent load on the sync WSGI stack (fixed thread pool) "
+        "and the async ASGI stack, with simulated slow clients, in a throwaway database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200, help="Dataset size")
+        parser.add_argument("--clients", type=int, default=64, help="Concurrent clients")
+        parser.add_argument("--requests", type=int, default=256, help="Requests per endpoint and stack")
+        parser.add_argument("--threads", type=int, default=8, help="WSGI worker threads")
+        parser.add_argument("--client-delay", type=float, default=50, help="Milliseconds each client takes to read a response")
+        parser.add_argument("--only", help="Only endpoints whose name contains this")
+
+    def handle(self, *args, **options):
+        logging.getLogger("django.request").setLevel(logging.CRITICAL)
+
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            generate_dataset(options["users"])
+            self.run(options)
+        finally:
+            use_async_views(False)
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def run(self, options):
+        group = StudyGroup.objects.annotate(size=Count("groupmembers")).order_by("-size").first()
+        tokens = [
+            f"Bearer {RefreshToken.for_user(user).access_token}"
+            for user in UserAccount.objects.filter(userprofile__isnull=False)[:options["clients"]]
+        ]
+        prefixes = url_prefixes()
+
+        self.stdout.write(
+            f"{options['clients']} clients, {options['threads']} WSGI threads, {options['client_delay']:g} ms client delay"
+        )
+        self.stdout.write(f"{'endpoint':<28}{'stack':>6}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+        for app, name in READ_ENDPOINTS:
+            if options["only"] and options["only"] not in name:
+                continue
+            kwargs = {"group_id": group.id} if name == "retrieve_group" else {}
+            path = prefixes[f"{app}.urls"] + reverse(name, urlconf=f"{app}.urls", kwargs=kwargs).lstrip("/")
+
+            use_async_views(False)
+            self.report(f"{app}:{name}", "wsgi", *self.run_wsgi(path, tokens, options))
+            use_async_views(True)
+            self.report(f"{app}:{name}", "asgi", *asyncio.run(self.run_asgi(path, tokens, options)))
+
+    def report(self, key, stack, elapsed, timings, errors):
+        self.stdout.write(
+            f"{key:<28}{stack:>6}{len(timings) / elapsed:>9.1f}{statistics.median(timings):>9.2f}"
+            f"{percentile(timings, 95):>9.2f}{percentile(timings, 99):>9.2f}{errors:>8}"
+        )
+
+    def run_wsgi(self, path, tokens, options):
+        """One thread per client, but only --threads of them inside the app at once,
+        like a threaded WSGI server. A worker stays busy until its client has read
+        the response."""
+        handler = WSGIHandler()
+        workers = threading.BoundedSemaphore(options["threads"])
+        delay = options["client_delay"] / 1000
+        remaining = iter(range(options["requests"]))
+        lock = threading.Lock()
+        timings, errors = [], []
+
+        def client(token):
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        break
+                statuses = []
+                start = time.perf_counter()
+                with workers:
+                    response = handler(self.environ(path, token), lambda status, headers: statuses.append(status))
+                    for _ in response:
+                        pass
+                    time.sleep(delay)
+                    response.close()
+                timings.append((time.perf_counter() - start) * 1000)
+                errors.extend(status for status in statuses if not status.startswith("200"))
+            connections.close_all()
+
+        threads = [threading.Thread(target=client, args=(tokens[index % len(tokens)],)) for index in range(options["clients"])]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - start, timings, len(errors)
+
+    async def run_asgi(self, path, tokens, options):
+        """One coroutine per client against a single event loop."""
+        application = ASGIHandler()
+        delay = options["client_delay"] / 1000
+        remaining = iter(range(options["requests"]))
+        timings, errors = [], []
+
+        async def client(token):
+            while next(remaining, None) is not None:
+                statuses, requests = [], [{"type": "http.request", "body": b"", "more_body": False}]
+
+                async def receive():
+                    if requests:
+                        return requests.pop()
+                    # the client stays connected until the response is done
+                    await asyncio.Event().wait()
+
+                async def send(message):
+                    if message["type"] == "http.response.start":
+                        statuses.append(message["status"])
+                    elif not message.get("more_body"):
+                        await asyncio.sleep(delay)
+
+                start = time.perf_counter()
+                await application(self.scope(path, token), receive, send)
+                timings.append((time.perf_counter() - start) * 1000)
+                errors.extend(status for status in statuses if status != 200)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client(tokens[index % len(tokens)]) for index in range(options["clients"])))
+        return time.perf_counter() - start, timings, len(errors)
+
+    def environ(self, path, token):
+        return {
+            "REQUEST_METHOD": "GET", "PATH_INFO": path, "SCRIPT_NAME": "", "QUERY_STRING": "",
+            "SERVER_NAME": "testserver", "SERVER_PORT": "80", "SERVER_PROTOCOL": "HTTP/1.1",
+            "HTTP_HOST": "testserver", "HTTP_AUTHORIZATION": token,
+            "wsgi.version": (1, 0), "wsgi.url_scheme": "http", "wsgi.input": io.BytesIO(), "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True, "wsgi.multiprocess": False, "wsgi.run_once": False,
+        }
+
+    def scope(self, path, token):
+        return {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+            "headers": [(b"host", b"testserver"), (b"authorization", token.encode())],
+            "client": ("127.0.0.1", 0), "server": ("testserver", 80),
+        }
@@ -0,0 +1,213 @@
+import datetime
+import json
+import logging
+import statistics
+import time
+from importlib import import_module
+
+from django.core import signing
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+from django.urls import get_resolver, reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import Interest, Major, Notification, UserAccount, UserInterest
+from groups.dataset import DATASET_PASSWORD, generate_dataset
+from groups.models import (
+    GroupInterests, GroupMembers, GroupMembershipRequest, GroupScheduledTime, GroupScheduledTimeException, StudyGroup
+)
+from groups.schedule import first_occurrence
+from groups.views import CALENDAR_FEED_SALT
+
+
+METHODS = ("get", "post", "put", "patch", "delete")
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(percent / 100 * (len(values) - 1))))]
+
+
+class Fixture:
+    """The resources the benchmarked requests act on, centred on the creator
+    of the largest group so every permission check passes."""
+
+    def __init__(self):
+        self.group = StudyGroup.objects.annotate(size=Count("groupmembers")).order_by("-size").first()
+        self.actor = self.group.creator
+        members = GroupMembers.objects.filter(group=self.group).exclude(member=self.actor)
+        self.member = members.first() or GroupMembers.objects.create(group=self.group, member=self.outsider())
+        self.membership_request = (
+            GroupMembershipRequest.objects.filter(group=self.group).first()
+            or GroupMembershipRequest.objects.create(group=self.group, user=self.outsider())
+        )
+        self.scheduled_time = GroupScheduledTime.objects.filter(group=self.group).first()
+        self.exception_date = first_occurrence(self.scheduled_time) + datetime.timedelta(weeks=1)
+        self.exception = GroupScheduledTimeException.objects.create(
+            scheduled_time=self.scheduled_time, date=self.exception_date + datetime.timedelta(weeks=1)
+        )
+        self.group_interest = GroupInterests.objects.filter(group=self.group).first()
+        self.user_interest = UserInterest.objects.filter(user=self.actor).first()
+        self.notification = Notification.objects.filter(user=self.actor).first() or Notification.objects.create(
+            user=self.actor, message="Benchmark notification"
+        )
+
+        self.refresh = RefreshToken.for_user(self.actor)
+        # report server errors as 500s instead of aborting the run
+        self.client = APIClient(raise_request_exception=False)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.refresh.access_token}")
+        self.reset_cookies()
+
+    def reset_cookies(self):
+        # logout deletes them
+        self.client.cookies["refresh_token"] = str(self.refresh)
+        self.client.cookies["access_token"] = str(self.refresh.access_token)
+
+    def outsider(self):
+        return UserAccount.objects.exclude(groupmembers__group=self.group).exclude(
+            groupmembershiprequest__group=self.group
+        ).first()
+
+    def kwargs(self, app, name):
+        return {
+            "group_id": self.group.id,
+            "time_id": self.scheduled_time.id,
+            "exception_id": self.exception.id,
+            "request_id": self.membership_request.id,
+            "group_member_id": self.member.id,
+            "interest_id": (self.user_interest if app == "accounts" else self.group_interest).id,
+            "notification_id": self.notification.id,
+            "user_id": self.member.member_id,
+            "token": signing.Signer(salt=CALENDAR_FEED_SALT).sign(str(self.actor.id)),
+        }[name]
+
+    def payload(self, app, name):
+        return {
+            ("accounts", "register"): {
+                "firstname": "Ama", "lastname": "Mensah", "email": "benchmark@ashesi.edu.gh", "mobile_number": "0209999999",
+                "password": "Passw0rd!", "confirm_password": "Passw0rd!",
+            },
+            ("accounts", "login"): {"email": self.actor.email, "password": DATASET_PASSWORD},
+            ("accounts", "refresh"): {"refresh": str(self.refresh)},
+            ("accounts", "update"): {"firstname": "Kofi"},
+            ("accounts", "update_profile"): {"major": Major.CS, "interests": [Interest.AI]},
+            ("groups", "create_group"): {
+                "name": "Benchmark group", "major": Major.CS, "whatsAppLink": "https://chat.whatsapp.com/benchmark",
+                "interests": [Interest.AI, Interest.ML],
+            },
+            ("groups", "update_group"): {"name": "Renamed group", "interests": [Interest.DS]},
+            ("groups", "create_scheduled_time"): {"day": "Monday", "start_time": "10:00", "end_time": "11:00"},
+            ("groups", "update_scheduled_time"): {"end_time": "22:00"},
+            ("groups", "create_scheduled_time_exception"): {"date": self.exception_date.isoformat()},
+            ("groups", "batch_accept_membership_requests"): {"all": True},
+            ("groups", "batch_reject_membership_requests"): {"all": True},
+        }.get((app, name))
+
+
+def url_prefixes():
+    """Map each included urlconf module name to the prefix it's mounted at."""
+    prefixes = {}
+    for pattern in get_resolver().url_patterns:
+        urlconf = getattr(pattern, "urlconf_name", None)
+        if hasattr(urlconf, "__name__"):
+            prefixes[urlconf.__name__] = f"/{pattern.pattern}"
+    return prefixes
+
+
+def endpoints():
+    """Yield (app, url prefix, pattern, method) for every accounts and groups route."""
+    prefixes = url_prefixes()
+    for app in ("accounts", "groups"):
+        module = import_module(f"{app}.urls")
+        for pattern in module.urlpatterns:
+            view_class = pattern.callback.view_class
+            for method in METHODS:
+                if hasattr(view_class, method):
+                    yield app, prefixes[module.__name__], pattern, method
+
+
+class Command(BaseCommand):
+    help = "Benchmark every accounts and groups endpoint at several dataset sizes in a throwaway database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scales", default="100,1000", help="Comma separated user counts")
+        parser.add_argument("--requests", type=int, default=20, help="Requests per endpoint")
+        parser.add_argument("--only", help="Only endpoints whose name contains this")
+        parser.add_argument("--save-baseline", metavar="PATH")
+        parser.add_argument("--baseline", metavar="PATH", help="Compare against a saved baseline")
+        parser.add_argument("--tolerance", type=float, default=20, help="Flag p95 regressions above this percent")
+
+    def handle(self, *args, **options):
+        baseline = {}
+        if options["baseline"]:
+            with open(options["baseline"]) as file:
+                baseline = json.load(file)
+
+        # expected 4xx responses would drown the report
+        logging.getLogger("django.request").setLevel(logging.CRITICAL)
+
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = {}
+            for scale in [int(scale) for scale in options["scales"].split(",")]:
+                call_command("flush", interactive=False, verbosity=0)
+                generate_dataset(scale)
+                results[str(scale)] = self.run_scale(scale, options, baseline.get(str(scale), {}))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if options["save_baseline"]:
+            with open(options["save_baseline"], "w") as file:
+                json.dump(results, file, indent=2)
+            self.stdout.write(f"Baseline saved to {options['save_baseline']}")
+
+    def run_scale(self, scale, options, baseline):
+        fixture = Fixture()
+        self.stdout.write(f"\n{scale} users")
+        self.stdout.write(
+            f"{'endpoint':<52}{'status':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'vs base':>9}"
+        )
+
+        results = {}
+        for app, prefix, pattern, method in endpoints():
+            key = f"{app}:{pattern.name} {method.upper()}"
+            if options["only"] and options["only"] not in key:
+                continue
+            # names repeat across apps, so reverse within the app's urlconf
+            kwargs = {name: fixture.kwargs(app, name) for name in pattern.pattern.converters}
+            url = prefix + reverse(pattern.name, urlconf=f"{app}.urls", kwargs=kwargs).lstrip("/")
+            payload = fixture.payload(app, pattern.name)
+
+            timings, queries = [], []
+            for _ in range(options["requests"]):
+                # every write is rolled back, so each request sees the same data
+                fixture.reset_cookies()
+                with transaction.atomic():
+                    start = time.perf_counter()
+                    response = getattr(fixture.client, method)(url, payload, format="json")
+                    timings.append((time.perf_counter() - start) * 1000)
+                    queries.append(response.query_metrics.count)
+                    transaction.set_rollback(True)
+
+            result = {
+                "status": response.status_code,
+                "p50": statistics.median(timings),
+                "p95": percentile(timings, 95),
+                "p99": percentile(timings, 99),
+                "queries": max(queries),
+            }
+            results[key] = result
+            self.stdout.write(f"{key:<52}{result['status']:>7}{result['p50']:>9.2f}{result['p95']:>9.2f}"
+                              f"{result['p99']:>9.2f}{result['queries']:>9}{self.compare(result, baseline.get(key), options)}")
+        return results
+
+    def compare(self, result, previous, options):
+        if previous is None:
+            return f"{'-':>9}"
+        change = (result["p95"] - previous["p95"]) / previous["p95"] * 100
+        flag = " !" if change > options["tolerance"] or result["queries"] > previous["queries"] else ""
+        return f"{change:>+8.0f}%{flag}"
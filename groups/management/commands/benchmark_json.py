@@ -0,0 +1,72 @@
+import io
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import Notification, UserProfile
+from accounts.serializers import NotificationSerializer, UserProfileSerializer
+from groups.dataset import generate_dataset
+from groups.models import StudyGroup
+from groups.serializers import StudyGroupSerializer
+from StudyAlly.fastjson import ORJSONParser, ORJSONRenderer, orjson
+
+
+class Command(BaseCommand):
+    help = "Compare DRF's JSON renderer/parser with the orjson ones on large list payloads"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000, help="Dataset size")
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError("orjson is not installed")
+
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            generate_dataset(options["users"])
+            payloads = self.payloads()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(f"{'payload':<16}{'rows':>7}{'KiB':>8}{'render ms':>11}{'orjson':>9}{'x':>7}{'parse ms':>10}{'orjson':>9}{'x':>7}")
+        for name, data in payloads.items():
+            body = JSONRenderer().render(data)
+            if ORJSONRenderer().render(data) != body:
+                raise CommandError(f"{name}: orjson output differs")
+            if ORJSONParser().parse(io.BytesIO(body)) != JSONParser().parse(io.BytesIO(body)):
+                raise CommandError(f"{name}: orjson parses differently")
+
+            render = self.timeit(lambda renderer: renderer.render(data), JSONRenderer(), options["repeat"])
+            fast_render = self.timeit(lambda renderer: renderer.render(data), ORJSONRenderer(), options["repeat"])
+            parse = self.timeit(lambda parser: parser.parse(io.BytesIO(body)), JSONParser(), options["repeat"])
+            fast_parse = self.timeit(lambda parser: parser.parse(io.BytesIO(body)), ORJSONParser(), options["repeat"])
+            self.stdout.write(
+                f"{name:<16}{len(data):>7}{len(body) / 1024:>8.0f}{render:>11.2f}{fast_render:>9.2f}{render / fast_render:>7.1f}"
+                f"{parse:>10.2f}{fast_parse:>9.2f}{parse / fast_parse:>7.1f}"
+            )
+
+    def payloads(self):
+        # serialized once, only the encoding is timed
+        request = Request(APIRequestFactory().get("/"))
+        request.user = StudyGroup.objects.first().creator
+        context = {"request": request}
+        return {
+            "profiles": UserProfileSerializer(UserProfile.objects.select_related("user"), many=True, context=context).data,
+            "notifications": NotificationSerializer(Notification.objects.all(), many=True).data,
+            "groups": StudyGroupSerializer(StudyGroup.objects.select_related("creator"), many=True, context=context).data,
+        }
+
+    def timeit(self, function, argument, repeat):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function(argument)
+            best = min(best, time.perf_counter() - start)
+        return best * 1000
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from groups.dataset import DATASET_PASSWORD, generate_dataset
+
+
+class Command(BaseCommand):
+    help = "Bulk insert a synthetic dataset of users, profiles, groups, memberships, schedules and notifications"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--groups", type=int, help="Defaults to a tenth of the users")
+        parser.add_argument("--notifications", type=int, default=10, help="Average notifications per user")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        counts = generate_dataset(
+            options["users"], options["groups"], notifications_per_user=options["notifications"], seed=options["seed"]
+        )
+        for name, count in counts.items():
+            self.stdout.write(f"{count:>8} {name}")
+        self.stdout.write(f"All users share the password {DATASET_PASSWORD}")
@@ -0,0 +1,39 @@
+import datetime
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from groups.reminders import ReminderScheduler
+
+
+class Command(BaseCommand):
+    help = "Send reminder notifications to group members before each scheduled session"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lead-minutes", type=int, default=settings.SESSION_REMINDER_LEAD_MINUTES,
+            help="How many minutes before a session the reminder is sent",
+        )
+        parser.add_argument(
+            "--bucket-seconds", type=int, default=settings.SESSION_REMINDER_BUCKET_SECONDS,
+            help="Width of the reminder index buckets, also the tick interval",
+        )
+        parser.add_argument("--once", action="store_true", help="Run a single tick and exit")
+
+    def handle(self, *args, **options):
+        scheduler = ReminderScheduler(
+            lead_time=datetime.timedelta(minutes=options["lead_minutes"]),
+            bucket_size=options["bucket_seconds"],
+        )
+
+        while True:
+            sent = scheduler.tick()
+            if sent:
+                self.stdout.write(f"{timezone.now():%Y-%m-%d %H:%M:%S} sent {sent} reminders")
+            if options["once"]:
+                break
+
+            # wake up at the start of the next bucket
+            time.sleep(options["bucket_seconds"] - time.time() % options["bucket_seconds"])
@@ -0,0 +1,100 @@
+# Generated by Django 5.0.14 on 2026-10-19 09:02
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+
+def parse_day(day):
+    day = day.strip().lower()
+    return next((index for index, name in enumerate(WEEKDAYS) if len(day) >= 2 and name.startswith(day)), None)
+
+
+def normalize_days(apps, schema_editor):
+    GroupScheduledTime = apps.get_model("groups", "GroupScheduledTime")
+    scheduled_times = list(GroupScheduledTime.objects.all())
+
+    # free-text days that don't name a weekday can't be placed in the week, fix them by hand first
+    unparsable = [scheduled_time.id for scheduled_time in scheduled_times if parse_day(scheduled_time.day) is None]
+    if unparsable:
+        raise ValueError(
+            f"GroupScheduledTime rows {unparsable} have a day that isn't a weekday name; "
+            "set it to one (e.g. \"Monday\") and run the migration again"
+        )
+
+    for scheduled_time in scheduled_times:
+        scheduled_time.weekday = parse_day(scheduled_time.day)
+        scheduled_time.save(update_fields=["weekday"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('groups', '0002_studygroup_group_image_alter_studygroup_creator'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='groupscheduledtime',
+            name='group',
+            field=models.ForeignKey(blank=True, on_delete=django.db.models.deletion.CASCADE, to='groups.studygroup'),
+        ),
+        migrations.AddField(
+            model_name='groupscheduledtime',
+            name='weekday',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.RunPython(normalize_days, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='groupscheduledtime',
+            name='day',
+        ),
+        migrations.RenameField(
+            model_name='groupscheduledtime',
+            old_name='weekday',
+            new_name='day',
+        ),
+        migrations.AlterField(
+            model_name='groupscheduledtime',
+            name='day',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')]),
+        ),
+        migrations.AddField(
+            model_name='groupscheduledtime',
+            name='ends_on',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='groupscheduledtime',
+            name='interval_weeks',
+            field=models.PositiveSmallIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='groupscheduledtime',
+            name='starts_on',
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+        migrations.AddField(
+            model_name='groupscheduledtime',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='groupscheduledtime',
+            index=models.Index(fields=['day', 'start_time'], name='groups_grou_day_38678e_idx'),
+        ),
+        migrations.CreateModel(
+            name='GroupScheduledTimeException',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('scheduled_time', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='groups.groupscheduledtime')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('scheduled_time', 'date'), name='unique_scheduled_time_exception')],
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.0.14 on 2026-10-19 10:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def remove_duplicates(apps, schema_editor):
+    GroupInterests = apps.get_model("groups", "GroupInterests")
+    GroupMembers = apps.get_model("groups", "GroupMembers")
+    GroupMembershipRequest = apps.get_model("groups", "GroupMembershipRequest")
+
+    for model, fields in [
+        (GroupInterests, ["group_id", "interest"]),
+        (GroupMembershipRequest, ["group_id", "user_id"]),
+    ]:
+        seen = set()
+        for row in model.objects.order_by("id"):
+            key = tuple(getattr(row, field) for field in fields)
+            if key in seen:
+                row.delete()
+            seen.add(key)
+
+    # keep the earliest membership, an admin if any of the duplicates was one
+    kept = {}
+    for member in GroupMembers.objects.order_by("id"):
+        key = (member.group_id, member.member_id)
+        if key not in kept:
+            kept[key] = member
+            continue
+        if member.is_admin and not kept[key].is_admin:
+            kept[key].is_admin = True
+            kept[key].save(update_fields=["is_admin"])
+        member.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('groups', '0003_groupscheduledtime_recurrence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='groupmembers',
+            index=models.Index(condition=models.Q(('is_admin', True)), fields=['group', 'member'], name='group_admins_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='groupinterests',
+            constraint=models.UniqueConstraint(fields=('group', 'interest'), name='unique_group_interest'),
+        ),
+        migrations.AddConstraint(
+            model_name='groupmembers',
+            constraint=models.UniqueConstraint(fields=('group', 'member'), name='unique_group_member'),
+        ),
+        migrations.AddConstraint(
+            model_name='groupmembershiprequest',
+            constraint=models.UniqueConstraint(fields=('group', 'user'), name='unique_group_membership_request'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-19 09:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('groups', '0004_membership_constraints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studygroup',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
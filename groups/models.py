@@ -1,7 +1,18 @@
 from django.db import models
+from django.utils import timezone
 from accounts.models import UserAccount, Interest, Major
 
 
+class Weekday(models.IntegerChoices):
+    MONDAY = 0, "Monday"
+    TUESDAY = 1, "Tuesday"
+    WEDNESDAY = 2, "Wednesday"
+    THURSDAY = 3, "Thursday"
+    FRIDAY = 4, "Friday"
+    SATURDAY = 5, "Saturday"
+    SUNDAY = 6, "Sunday"
+
+
 class StudyGroup(models.Model):
     name = models.CharField(max_length=100)
     major = models.CharField(max_length=100, choices=Major.choices)
@@ -9,12 +20,19 @@ class StudyGroup(models.Model):
     whatsAppLink = models.CharField(max_length=100)
     group_image = models.ImageField(upload_to="group_images/", blank=True, null=True)
     date_created = models.DateTimeField(auto_now_add=True)
+    # also bumped when a related row changes (groups.versions), see the ETags in groups.views
+    updated_at = models.DateTimeField(auto_now=True)
 
 
 class GroupInterests(models.Model):
     group = models.ForeignKey(StudyGroup, on_delete=models.CASCADE)
     interest = models.CharField(max_length=50, choices=Interest.choices)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["group", "interest"], name="unique_group_interest"),
+        ]
+
 
 class GroupMembers(models.Model):
     group = models.ForeignKey(StudyGroup, on_delete=models.CASCADE)
@@ -22,14 +40,51 @@ class GroupMembers(models.Model):
     date_joined = models.DateTimeField(auto_now_add=True)
     is_admin = models.BooleanField(default=False)
 
+    class Meta:
+        constraints = [
+            # also serves the (group, member[, is_admin]) membership lookups
+            models.UniqueConstraint(fields=["group", "member"], name="unique_group_member"),
+        ]
+        indexes = [
+            # admins of a group, used for every notification fan-out
+            models.Index(fields=["group", "member"], condition=models.Q(is_admin=True), name="group_admins_idx"),
+        ]
+
 
 class GroupScheduledTime(models.Model):
     group = models.ForeignKey(StudyGroup, on_delete=models.CASCADE, blank=True)
-    day = models.CharField(max_length=50)
+    day = models.PositiveSmallIntegerField(choices=Weekday.choices)
     start_time = models.TimeField()
     end_time = models.TimeField()
 
+    # recurrence: every `interval_weeks` weeks from `starts_on` until `ends_on` (if set)
+    interval_weeks = models.PositiveSmallIntegerField(default=1)
+    starts_on = models.DateField(default=timezone.localdate)
+    ends_on = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["day", "start_time"]),
+        ]
+
+
+class GroupScheduledTimeException(models.Model):
+    # a single date on which a recurring scheduled time does not take place
+    scheduled_time = models.ForeignKey(GroupScheduledTime, on_delete=models.CASCADE)
+    date = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["scheduled_time", "date"], name="unique_scheduled_time_exception"),
+        ]
+
 
 class GroupMembershipRequest(models.Model):
     group = models.ForeignKey(StudyGroup, on_delete=models.CASCADE)
-    user = models.ForeignKey(UserAccount, on_delete=models.CASCADE)
\ No newline at end of file
+    user = models.ForeignKey(UserAccount, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["group", "user"], name="unique_group_membership_request"),
+        ]
\ No newline at end of file
@@ -0,0 +1,17 @@
+from rest_framework.permissions import BasePermission
+
+from .roles import get_group_roles
+
+
+class IsGroupMember(BasePermission):
+    message = "You are not a member of this group"
+
+    def has_permission(self, request, view):
+        return get_group_roles(request).is_member(view.kwargs["group_id"])
+
+
+class IsGroupAdmin(BasePermission):
+    message = "You are not an admin of this group"
+
+    def has_permission(self, request, view):
+        return get_group_roles(request).is_admin(view.kwargs["group_id"])
@@ -0,0 +1,156 @@
+import datetime
+from collections import defaultdict
+
+from django.db.models import Q
+from django.utils import timezone
+
+from StudyAlly.metrics import NOTIFICATIONS_CREATED
+from accounts.models import Notification
+from .models import GroupMembers, GroupScheduledTime
+from .schedule import expand, takes_place_on
+
+
+class ReminderScheduler:
+    """Sends a notification to every group member `lead_time` before each session.
+
+    Upcoming reminders are kept in buckets of `bucket_size` seconds so a
+    tick only looks at the buckets that became due since the last one. The
+    index covers `horizon` ahead and is rebuilt when it runs out. Before the
+    due buckets are sent, their version (the scheduled times starting in the
+    window and their `updated_at`) is checked with one indexed query; if it
+    changed, just those buckets are read again.
+    """
+
+    def __init__(self, lead_time, bucket_size=60, horizon=datetime.timedelta(hours=24)):
+        self.lead_time = lead_time
+        self.bucket_size = bucket_size
+        self.horizon = horizon
+        self.buckets = {}
+        self.cursor = None
+        self.indexed_until = None
+
+    def bucket_for(self, moment):
+        return int(moment.timestamp()) // self.bucket_size
+
+    def bucket_start(self, bucket):
+        return datetime.datetime.fromtimestamp(bucket * self.bucket_size, tz=datetime.timezone.utc)
+
+    def scheduled_between(self, start, end):
+        """Scheduled times whose start time of day falls in [start, end), one slice per local date."""
+        start, end = timezone.localtime(start), timezone.localtime(end)
+        slices = Q(pk__in=[])
+        date = start.date()
+        while date <= end.date():
+            # a window crossing midnight is split into one (day, start_time) range per date
+            times = Q(day=date.weekday())
+            if date == start.date():
+                times &= Q(start_time__gte=start.time())
+            if date == end.date():
+                times &= Q(start_time__lt=end.time())
+            slices |= times
+            date += datetime.timedelta(days=1)
+        return GroupScheduledTime.objects.filter(slices)
+
+    def occurrences_between(self, start, end):
+        scheduled_times = self.scheduled_between(start, end).select_related("group").prefetch_related("groupscheduledtimeexception_set")
+        return [
+            occurrence
+            for occurrence in expand(scheduled_times, timezone.localdate(start), timezone.localdate(end))
+            if start <= occurrence.start < end
+        ]
+
+    def due_version(self, start, end):
+        """`updated_at` of every session the scheduled times would hold in [start, end), by (id, date)."""
+        version = {}
+        tz = timezone.get_current_timezone()
+        for scheduled_time in self.scheduled_between(start, end).only("day", "start_time", "interval_weeks", "starts_on", "ends_on", "updated_at"):
+            date = timezone.localdate(start)
+            while date <= timezone.localdate(end):
+                session_start = timezone.make_aware(datetime.datetime.combine(date, scheduled_time.start_time), tz)
+                if start <= session_start < end and takes_place_on(scheduled_time, date):
+                    version[scheduled_time.id, date] = scheduled_time.updated_at
+                date += datetime.timedelta(days=1)
+        return version
+
+    def rebuild(self, now):
+        # never go back before the last processed bucket so nothing is sent twice
+        if self.cursor is None:
+            self.cursor = self.bucket_for(now)
+        since = self.bucket_start(self.cursor)
+        until = now + self.horizon
+
+        scheduled_times = GroupScheduledTime.objects.select_related("group").prefetch_related("groupscheduledtimeexception_set")
+        start_date = timezone.localdate(since + self.lead_time)
+        end_date = timezone.localdate(until + self.lead_time)
+
+        self.buckets = {}
+        for occurrence in expand(scheduled_times, start_date, end_date):
+            remind_at = occurrence.start - self.lead_time
+            if remind_at > until:
+                # occurrences come out in start order
+                break
+            if remind_at >= since:
+                self.buckets.setdefault(self.bucket_for(remind_at), []).append(occurrence)
+
+        self.indexed_until = until
+
+    def tick(self, now=None):
+        """Send the reminders that became due; returns the number of notifications created."""
+        now = now or timezone.now()
+
+        if self.indexed_until is None or now >= self.indexed_until:
+            self.rebuild(now)
+
+        current = self.bucket_for(now)
+        if self.cursor > current:
+            return 0
+
+        # sessions starting in the window the due buckets cover
+        start = self.bucket_start(self.cursor) + self.lead_time
+        end = self.bucket_start(current + 1) + self.lead_time
+
+        due = []
+        while self.cursor <= current:
+            due.extend(self.buckets.pop(self.cursor, []))
+            self.cursor += 1
+
+        indexed = {
+            (occurrence.scheduled_time.id, timezone.localdate(occurrence.start)): occurrence.scheduled_time.updated_at
+            for occurrence in due
+        }
+        if indexed != self.due_version(start, end):
+            # scheduled times changed since the index was built
+            due = self.occurrences_between(start, end)
+
+        return self.send(due, now)
+
+    def send(self, occurrences, now):
+        if not occurrences:
+            return 0
+
+        # all members of the affected groups in one query
+        members = defaultdict(list)
+        group_ids = {occurrence.scheduled_time.group_id for occurrence in occurrences}
+        for group_id, member_id in GroupMembers.objects.filter(group_id__in=group_ids).values_list("group_id", "member_id"):
+            members[group_id].append(member_id)
+
+        today = timezone.localdate(now)
+        notifications = []
+        for occurrence in occurrences:
+            group = occurrence.scheduled_time.group
+            start = timezone.localtime(occurrence.start)
+            if start.date() == today:
+                day = "today"
+            elif start.date() == today + datetime.timedelta(days=1):
+                day = "tomorrow"
+            else:
+                day = f"on {start:%A %d %B}"
+            for member_id in members[group.id]:
+                notifications.append(Notification(
+                    user_id=member_id,
+                    message=f"Reminder: {group.name} meets {day} at {start:%H:%M}",
+                ))
+
+        Notification.objects.bulk_create(notifications, batch_size=500)
+        NOTIFICATIONS_CREATED.inc(len(notifications))
+        return len(notifications)
@@ -0,0 +1,69 @@
+from django.db.models import FilteredRelation, Q
+
+from .models import StudyGroup
+
+
+class GroupRoles:
+    """Every group the user is a member, admin or creator of.
+
+    Loaded lazily in a single query and shared by views, serializers and
+    permissions for the rest of the request. Never kept across requests: a
+    removed member or demoted admin loses access on every worker at once.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self._roles = None
+
+    @property
+    def roles(self):
+        if self._roles is None:
+            self._roles = self.load(self.queryset())
+        return self._roles
+
+    async def aload(self):
+        # async views load the roles up front, the lazy load would be a sync query
+        if self._roles is None:
+            self._roles = self.load([row async for row in self.queryset()])
+        return self._roles
+
+    def queryset(self):
+        # one LEFT JOIN restricted to the user's own membership row
+        return StudyGroup.objects.annotate(
+            membership=FilteredRelation("groupmembers", condition=Q(groupmembers__member=self.user)),
+        ).filter(
+            Q(creator=self.user) | Q(membership__isnull=False)
+        ).values_list("id", "creator_id", "membership__id", "membership__is_admin")
+
+    def load(self, groups):
+        return {
+            group_id: {
+                "member": membership_id is not None,
+                "admin": bool(is_admin),
+                "creator": creator_id == self.user.id,
+            }
+            for group_id, creator_id, membership_id, is_admin in groups
+        }
+
+    def role(self, group_id, name):
+        return self.roles.get(int(group_id), {}).get(name, False)
+
+    def is_member(self, group_id):
+        return self.role(group_id, "member")
+
+    def is_admin(self, group_id):
+        return self.role(group_id, "admin")
+
+    def is_creator(self, group_id):
+        return self.role(group_id, "creator")
+
+    def member_group_ids(self):
+        return [group_id for group_id, roles in self.roles.items() if roles["member"]]
+
+
+def get_group_roles(request):
+    # memoized on the underlying HttpRequest so DRF and Django requests share it
+    request = getattr(request, "_request", request)
+    if getattr(request, "group_roles", None) is None or request.group_roles.user != request.user:
+        request.group_roles = GroupRoles(request.user)
+    return request.group_roles
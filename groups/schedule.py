@@ -0,0 +1,145 @@
+import datetime
+import heapq
+from collections import namedtuple
+
+from django.utils import timezone
+
+from .models import Weekday
+
+
+Occurrence = namedtuple("Occurrence", ["scheduled_time", "start", "end"])
+
+
+def parse_weekday(day):
+    """Map a day name ("mon", "Tues", "THURSDAY") or number to 0-6, or None."""
+    if isinstance(day, int) or str(day).strip().isdigit():
+        day = int(day)
+        return day if day in Weekday.values else None
+
+    day = day.strip().lower()
+    if len(day) < 2:
+        return None
+    for weekday, label in Weekday.choices:
+        if label.lower().startswith(day):
+            return weekday
+    return None
+
+
+def find_conflicts(scheduled_times):
+    """Return the ids of scheduled times overlapping another one.
+
+    Single sweep over the times sorted by start: a time overlaps something
+    iff it starts before the latest end seen so far, so this is O(n log n)
+    instead of comparing every pair.
+    """
+    conflicts = set()
+    latest = None
+    for scheduled_time in sorted(scheduled_times, key=lambda time: time.start_time):
+        if latest is not None and scheduled_time.start_time < latest.end_time:
+            conflicts.add(scheduled_time.id)
+            conflicts.add(latest.id)
+        if latest is None or scheduled_time.end_time > latest.end_time:
+            latest = scheduled_time
+    return conflicts
+
+
+def weekly_timeline(scheduled_times):
+    """Group scheduled times by weekday (Monday first), sorted by start time.
+
+    Returns a list of (day, scheduled_times, conflicting_ids) tuples.
+    """
+    days = {}
+    for scheduled_time in scheduled_times:
+        days.setdefault(scheduled_time.day, []).append(scheduled_time)
+
+    timeline = []
+    for day, times in sorted(days.items()):
+        times.sort(key=lambda time: (time.start_time, time.end_time))
+        timeline.append((Weekday(day).label, times, find_conflicts(times)))
+    return timeline
+
+
+def merge_intervals(intervals):
+    """Merge overlapping or touching (start, end) intervals in one sorted sweep."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def free_windows(busy, day_start, day_end):
+    """Return the gaps between `day_start` and `day_end` not covered by `busy`."""
+    windows = []
+    cursor = day_start
+    for start, end in merge_intervals(busy):
+        if end <= cursor:
+            continue
+        if start >= day_end:
+            break
+        if start > cursor:
+            windows.append((cursor, start))
+        cursor = max(cursor, end)
+    if cursor < day_end:
+        windows.append((cursor, day_end))
+    return windows
+
+
+def weekly_free_windows(scheduled_times, day_start, day_end):
+    """Free windows for every weekday given the busy (day, start, end) rows."""
+    busy = {weekday: [] for weekday in Weekday.values}
+    for day, start_time, end_time in scheduled_times:
+        busy[day].append((start_time, end_time))
+
+    return [(Weekday(day).label, free_windows(intervals, day_start, day_end)) for day, intervals in busy.items()]
+
+
+def first_occurrence(scheduled_time):
+    # first matching weekday on or after the date the schedule starts
+    starts_on = scheduled_time.starts_on
+    return starts_on + datetime.timedelta(days=(scheduled_time.day - starts_on.weekday()) % 7)
+
+
+def takes_place_on(scheduled_time, date):
+    """Whether `date` is one of the recurrence's dates, exceptions aside."""
+    if date < scheduled_time.starts_on or (scheduled_time.ends_on is not None and date > scheduled_time.ends_on):
+        return False
+    return (date - first_occurrence(scheduled_time)).days % (7 * scheduled_time.interval_weeks) == 0
+
+
+def occurrences(scheduled_time, start_date, end_date):
+    """Lazily yield the occurrences of `scheduled_time` between two dates (inclusive).
+
+    Dates listed as exceptions are skipped; prefetch
+    `groupscheduledtimeexception_set` when expanding many scheduled times.
+    """
+    step = datetime.timedelta(weeks=scheduled_time.interval_weeks)
+    date = first_occurrence(scheduled_time)
+    if start_date > date:
+        # jump straight to the first occurrence inside the range
+        date += step * -(-(start_date - date).days // step.days)
+
+    if scheduled_time.ends_on is not None:
+        end_date = min(end_date, scheduled_time.ends_on)
+
+    exceptions = {exception.date for exception in scheduled_time.groupscheduledtimeexception_set.all()}
+    tz = timezone.get_current_timezone()
+    while date <= end_date:
+        if date not in exceptions:
+            yield Occurrence(
+                scheduled_time,
+                timezone.make_aware(datetime.datetime.combine(date, scheduled_time.start_time), tz),
+                timezone.make_aware(datetime.datetime.combine(date, scheduled_time.end_time), tz),
+            )
+        date += step
+
+
+def expand(scheduled_times, start_date, end_date):
+    """Lazily yield the occurrences of many scheduled times in start order."""
+    return heapq.merge(
+        *(occurrences(scheduled_time, start_date, end_date) for scheduled_time in scheduled_times),
+        key=lambda occurrence: occurrence.start,
+    )
@@ -1,9 +1,29 @@
 from rest_framework import serializers
 
 from .models import (
-    StudyGroup, GroupInterests, GroupMembers, GroupScheduledTime, GroupMembershipRequest
+    StudyGroup, GroupInterests, GroupMembers, GroupScheduledTime, GroupScheduledTimeException,
+    GroupMembershipRequest, Weekday
 )
+from .schedule import parse_weekday
+from .roles import get_group_roles
+from .fragments import aget_group_fragment, get_group_fragment
 from accounts.models import UserAccount, Major
+from StudyAlly.fastserializers import CompiledSerializer
+
+
+class WeekdayField(serializers.ChoiceField):
+    # accepts "Monday", "mon" or 0-6 and always returns the day name
+    def __init__(self, **kwargs):
+        super().__init__(choices=Weekday.choices, **kwargs)
+
+    def to_internal_value(self, data):
+        weekday = parse_weekday(data) if isinstance(data, (int, str)) else None
+        if weekday is None:
+            self.fail("invalid_choice", input=data)
+        return weekday
+
+    def to_representation(self, value):
+        return Weekday(value).label
 
 
 class StudyGroupSerializer(serializers.ModelSerializer):
@@ -39,35 +59,65 @@ class StudyGroupSerializer(serializers.ModelSerializer):
         return instance
     
     def to_representation(self, instance):
-        study_group = super().to_representation(instance)
-        study_group["creator"] = instance.creator.firstname + " " + instance.creator.lastname
-
-        # retrieve group interests
-        group_interests = GroupInterests.objects.filter(group=instance)
-        study_group["interests"] = []
-        for interest in group_interests:
-            study_group["interests"].append(GroupInterestsSerializer(interest).data)
-        
-        # retrieve group members
-        group_members = GroupMembers.objects.filter(group=instance)
-        study_group["members"] = []
-        for member in group_members:
-            study_group["members"].append(GroupMembersSerializer(member).data)
+        # the same for every viewer, so cached per group
+        study_group = get_group_fragment(instance, self.shared_representation)
 
         # if admin, retrieve membership requests
-        if GroupMembers.objects.filter(group=instance, member=self.context["request"].user, is_admin=True).exists():
+        group_membership_requests = None
+        if get_group_roles(self.context["request"]).is_admin(instance.id):
             group_membership_requests = GroupMembershipRequest.objects.filter(group=instance)
+
+        return self.viewer_representation(instance, study_group, group_membership_requests)
+
+    async def ato_representation(self, instance):
+        # to_representation with the rows loaded through the async ORM
+        study_group = await aget_group_fragment(instance, self.ashared_representation)
+
+        group_roles = get_group_roles(self.context["request"])
+        await group_roles.aload()
+        group_membership_requests = None
+        if group_roles.is_admin(instance.id):
+            group_membership_requests = [request async for request in GroupMembershipRequest.objects.filter(group=instance)]
+
+        return self.viewer_representation(instance, study_group, group_membership_requests)
+
+    def viewer_representation(self, instance, shared, group_membership_requests):
+        study_group = dict(shared)
+
+        # the image url is absolute to the host of the request
+        study_group["group_image"] = self.fields["group_image"].to_representation(instance.group_image)
+
+        if group_membership_requests is not None:
+            scheduled_times = study_group.pop("scheduled_times")
             study_group["membership_requests"] = []
             for request in group_membership_requests:
                 study_group["membership_requests"].append(GroupMembershipRequestSerializer(request).data)
+            study_group["scheduled_times"] = scheduled_times
+
+        return study_group
+
+    def shared_representation(self, instance):
+        study_group = super().to_representation(instance)
+        study_group["creator"] = instance.creator.firstname + " " + instance.creator.lastname
+
+        # retrieve group interests
+        study_group["interests"] = group_interest_rows.serialize(GroupInterests.objects.filter(group=instance))
+        
+        # retrieve group members
+        study_group["members"] = group_member_rows.serialize(GroupMembers.objects.filter(group=instance))
 
         # retrieve group scheduled times
-        group_scheduled_times = GroupScheduledTime.objects.filter(group=instance)
-        study_group["scheduled_times"] = []
-        for time in group_scheduled_times:
-            study_group["scheduled_times"].append(GroupScheduledTimeSerializer(time).data)
+        study_group["scheduled_times"] = scheduled_time_rows.serialize(GroupScheduledTime.objects.filter(group=instance))
 
         return study_group
+
+    async def ashared_representation(self, instance):
+        study_group = super().to_representation(instance)
+        study_group["creator"] = instance.creator.firstname + " " + instance.creator.lastname
+        study_group["interests"] = await group_interest_rows.aserialize(GroupInterests.objects.filter(group=instance))
+        study_group["members"] = await group_member_rows.aserialize(GroupMembers.objects.filter(group=instance))
+        study_group["scheduled_times"] = await scheduled_time_rows.aserialize(GroupScheduledTime.objects.filter(group=instance))
+        return study_group
     
 
 class GroupInterestsSerializer(serializers.ModelSerializer):
@@ -104,10 +154,38 @@ class GroupMembersSerializer(serializers.ModelSerializer):
         return instance
     
 
+class GroupRosterSerializer(serializers.ModelSerializer):
+    firstname = serializers.CharField(source="member.firstname")
+    lastname = serializers.CharField(source="member.lastname")
+    profile_picture = serializers.SerializerMethodField()
+    role = serializers.SerializerMethodField()
+
+    class Meta:
+        model = GroupMembers
+        fields = ["id", "member", "firstname", "lastname", "profile_picture", "role", "date_joined"]
+
+    def get_profile_picture(self, obj):
+        # select_related("member__userprofile") leaves None when there is no profile
+        user_profile = getattr(obj.member, "userprofile", None)
+        if user_profile is None or not user_profile.profile_picture:
+            return None
+
+        url = user_profile.profile_picture.url
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+
+    def get_role(self, obj):
+        if obj.member_id == obj.group.creator_id:
+            return "creator"
+        return "admin" if obj.is_admin else "member"
+
+
 class GroupScheduledTimeSerializer(serializers.ModelSerializer):
+    day = WeekdayField()
+
     class Meta:
         model = GroupScheduledTime
-        fields = ["id", "group", "day", "start_time", "end_time"]
+        fields = ["id", "group", "day", "start_time", "end_time", "interval_weeks", "starts_on", "ends_on"]
 
     def validate_group(self, value):
         if not StudyGroup.objects.filter(id=value).exists():
@@ -115,9 +193,22 @@ class GroupScheduledTimeSerializer(serializers.ModelSerializer):
         
         return value
     
+    def validate_interval_weeks(self, value):
+        if value < 1:
+            raise serializers.ValidationError("Interval must be at least one week")
+
+        return value
+
     def validate(self, attrs):
-        if attrs["start_time"] >= attrs["end_time"]:
+        # a partial update is checked against the values it leaves unchanged
+        def value(field):
+            return attrs[field] if field in attrs else getattr(self.instance, field, None)
+
+        if value("start_time") >= value("end_time"):
             raise serializers.ValidationError("Start time must be less than end time")
+
+        if value("ends_on") and value("starts_on") and value("ends_on") < value("starts_on"):
+            raise serializers.ValidationError("End date must not be before start date")
         
         return attrs
     
@@ -128,10 +219,20 @@ class GroupScheduledTimeSerializer(serializers.ModelSerializer):
         instance.day = validated_data.get("day", instance.day)
         instance.start_time = validated_data.get("start_time", instance.start_time)
         instance.end_time = validated_data.get("end_time", instance.end_time)
+        instance.interval_weeks = validated_data.get("interval_weeks", instance.interval_weeks)
+        instance.starts_on = validated_data.get("starts_on", instance.starts_on)
+        instance.ends_on = validated_data.get("ends_on", instance.ends_on)
         instance.save()
         return instance
 
 
+class GroupScheduledTimeExceptionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GroupScheduledTimeException
+        fields = ["id", "scheduled_time", "date"]
+        read_only_fields = ["scheduled_time"]
+
+
 class GroupMembershipRequestSerializer(serializers.ModelSerializer):
     class Meta:
         model = GroupMembershipRequest
@@ -156,4 +257,10 @@ class GroupMembershipRequestSerializer(serializers.ModelSerializer):
         instance.group = validated_data.get("group", instance.group)
         instance.user = validated_data.get("user", instance.user)
         instance.save()
-        return instance
\ No newline at end of file
+        return instance
+
+
+# read-only fast paths over .values() rows for the hot list reads
+group_interest_rows = CompiledSerializer(GroupInterestsSerializer)
+group_member_rows = CompiledSerializer(GroupMembersSerializer)
+scheduled_time_rows = CompiledSerializer(GroupScheduledTimeSerializer)
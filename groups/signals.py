@@ -0,0 +1,36 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import UserAccount
+from accounts.signals import profile_fields_changed
+from .models import GroupInterests, GroupMembers, GroupMembershipRequest, GroupScheduledTime, StudyGroup
+from .fragments import invalidate_group_fragments
+from .versions import touch_groups
+
+
+@receiver([post_save, post_delete], sender=StudyGroup)
+def group_changed(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidate_group_fragments, instance.id))
+
+
+@receiver([post_save, post_delete], sender=GroupInterests)
+@receiver([post_save, post_delete], sender=GroupMembers)
+@receiver([post_save, post_delete], sender=GroupScheduledTime)
+@receiver([post_save, post_delete], sender=GroupMembershipRequest)
+def group_row_changed(sender, instance, origin=None, **kwargs):
+    # rows deleted along with their group leave nothing to touch
+    if not isinstance(origin, StudyGroup):
+        touch_groups(instance.group_id)
+        transaction.on_commit(partial(invalidate_group_fragments, instance.group_id))
+
+
+@receiver(post_save, sender=UserAccount)
+def creator_changed(sender, instance, created, update_fields, **kwargs):
+    # groups show their creator's name
+    if not created and profile_fields_changed(update_fields):
+        group_ids = list(StudyGroup.objects.filter(creator=instance).values_list("id", flat=True))
+        touch_groups(*group_ids)
+        transaction.on_commit(partial(invalidate_group_fragments, *group_ids))
@@ -1,3 +1,847 @@
-from django.test import TestCase
+import datetime
+import gzip
+from types import SimpleNamespace
+from unittest import skipUnless
 
-# Create your tests here.
+from django.core.cache import caches
+from django.db import IntegrityError, connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from StudyAlly.fastjson import ORJSONRenderer
+from StudyAlly.metrics import NOTIFICATIONS_CREATED
+from StudyAlly.testing import AsyncParityTestMixin, QueryBudgetTestMixin
+from accounts.models import Notification, UserAccount, UserInterest, UserProfile
+from .async_views import AsyncListStudyGroupsView, AsyncRecommendGroupView, AsyncRetrieveStudyGroupView
+from .fragments import group_fragment_key
+from .ical import fold_line, render_calendar
+from .models import StudyGroup, GroupInterests, GroupMembers, GroupMembershipRequest, GroupScheduledTime, GroupScheduledTimeException
+from .reminders import ReminderScheduler
+from .schedule import expand, find_conflicts, takes_place_on, weekly_timeline
+from .views import ListStudyGroupsView, RecommendGroupView, RetrieveStudyGroupView
+from .serializers import GroupMembersSerializer, GroupScheduledTimeSerializer, group_member_rows, scheduled_time_rows
+
+
+def query_plan(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+        return " ".join(row[-1] for row in cursor.fetchall())
+
+
+def scheduled_time(id, day, start, end):
+    return SimpleNamespace(
+        id=id, day=day, start_time=datetime.time.fromisoformat(start), end_time=datetime.time.fromisoformat(end)
+    )
+
+
+class ConflictsTest(SimpleTestCase):
+    def test_overlapping_times_conflict(self):
+        times = [scheduled_time(1, 0, "09:00", "11:00"), scheduled_time(2, 0, "10:30", "12:00"), scheduled_time(3, 0, "13:00", "14:00")]
+        self.assertEqual(find_conflicts(times), {1, 2})
+
+    def test_touching_times_do_not_conflict(self):
+        times = [scheduled_time(1, 0, "09:00", "10:00"), scheduled_time(2, 0, "10:00", "11:00")]
+        self.assertEqual(find_conflicts(times), set())
+
+    def test_time_inside_a_long_one_conflicts_with_it(self):
+        # the long time is still the latest end when the third one starts
+        times = [scheduled_time(1, 0, "08:00", "18:00"), scheduled_time(2, 0, "09:00", "10:00"), scheduled_time(3, 0, "12:00", "13:00")]
+        self.assertEqual(find_conflicts(times), {1, 2, 3})
+
+    def test_same_hours_on_different_days_do_not_conflict(self):
+        times = [scheduled_time(1, 0, "09:00", "10:00"), scheduled_time(2, 1, "09:00", "10:00"), scheduled_time(3, 1, "09:30", "10:30")]
+        timeline = weekly_timeline(times)
+        self.assertEqual([(day, [time.id for time in day_times], conflicts) for day, day_times, conflicts in timeline], [
+            ("Monday", [1], set()),
+            ("Tuesday", [2, 3], {2, 3}),
+        ])
+
+
+class GroupRolePermissionsTest(TestCase):
+    def setUp(self):
+        self.creator, self.member = [
+            UserAccount.objects.create_user(
+                email=f"member{i}@ashesi.edu.gh", password="Passw0rd!", firstname="Ama", lastname="Mensah", mobile_number=f"020000000{i}"
+            )
+            for i in range(2)
+        ]
+        self.group = StudyGroup.objects.create(
+            name="Algorithms", major="Computer Science", creator=self.creator, whatsAppLink="https://chat.whatsapp.com/x"
+        )
+        GroupMembers.objects.create(group=self.group, member=self.creator, is_admin=True)
+        self.membership = GroupMembers.objects.create(group=self.group, member=self.member, is_admin=True)
+        self.clients = {}
+        for user in (self.creator, self.member):
+            self.clients[user] = APIClient()
+            self.clients[user].credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+    def create_scheduled_time(self):
+        return self.clients[self.member].post(
+            f"/api/groups/scheduled_time/create/{self.group.id}/", {"day": "Monday", "start_time": "10:00", "end_time": "11:00"}, format="json"
+        )
+
+    def test_demoted_admin_loses_admin_access(self):
+        self.assertEqual(self.create_scheduled_time().status_code, 201)
+
+        response = self.clients[self.creator].delete(f"/api/groups/members/admin/remove/{self.membership.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.create_scheduled_time().status_code, 403)
+
+    def test_removed_member_loses_member_access(self):
+        roster = f"/api/groups/members/roster/{self.group.id}/"
+        self.assertEqual(self.clients[self.member].get(roster).status_code, 200)
+
+        response = self.clients[self.creator].delete(f"/api/groups/members/remove/{self.membership.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.clients[self.member].get(roster).status_code, 403)
+        self.assertEqual(self.create_scheduled_time().status_code, 403)
+
+
+class FreeTimesTest(TestCase):
+    def test_free_times_of_members(self):
+        member, outsider = [
+            UserAccount.objects.create_user(
+                email=f"member{i}@ashesi.edu.gh", password="Passw0rd!", firstname="Ama", lastname="Mensah", mobile_number=f"020000000{i}"
+            )
+            for i in range(2)
+        ]
+        group, other_group = [
+            StudyGroup.objects.create(name=name, major="Computer Science", creator=member, whatsAppLink="https://chat.whatsapp.com/x")
+            for name in ("Algorithms", "Databases")
+        ]
+        GroupMembers.objects.bulk_create([GroupMembers(group=group, member=member), GroupMembers(group=other_group, member=member)])
+        GroupScheduledTime.objects.create(group=other_group, day=0, start_time="10:00", end_time="12:00")
+        clients = {}
+        for user in (member, outsider):
+            clients[user] = APIClient()
+            clients[user].credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+        response = clients[member].get(f"/api/groups/scheduled_time/free/{group.id}/?start=08:00&end=18:00")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0], {"day": "Monday", "free": [
+            {"start_time": datetime.time(8), "end_time": datetime.time(10)},
+            {"start_time": datetime.time(12), "end_time": datetime.time(18)},
+        ]})
+
+        # schedules that ended or haven't started yet don't block the range
+        today = datetime.date.today()
+        GroupScheduledTime.objects.create(
+            group=other_group, day=1, start_time="09:00", end_time="10:00",
+            starts_on=today - datetime.timedelta(days=60), ends_on=today - datetime.timedelta(days=30),
+        )
+        GroupScheduledTime.objects.create(
+            group=other_group, day=2, start_time="09:00", end_time="10:00", starts_on=today + datetime.timedelta(days=30),
+        )
+        free = {row["day"]: row["free"] for row in clients[member].get(f"/api/groups/scheduled_time/free/{group.id}/?start=08:00&end=18:00").data}
+        self.assertEqual(free["Tuesday"], [{"start_time": datetime.time(8), "end_time": datetime.time(18)}])
+        self.assertEqual(free["Wednesday"], [{"start_time": datetime.time(8), "end_time": datetime.time(18)}])
+
+        start_date = (today + datetime.timedelta(days=28)).isoformat()
+        response = clients[member].get(f"/api/groups/scheduled_time/free/{group.id}/?start=08:00&end=18:00&start_date={start_date}")
+        free = {row["day"]: row["free"] for row in response.data}
+        self.assertEqual(free["Tuesday"], [{"start_time": datetime.time(8), "end_time": datetime.time(18)}])
+        self.assertEqual(free["Wednesday"], [{"start_time": datetime.time(8), "end_time": datetime.time(9)}, {"start_time": datetime.time(10), "end_time": datetime.time(18)}])
+        self.assertEqual(clients[member].get(f"/api/groups/scheduled_time/free/{group.id}/?start_date=2024-13-01").status_code, 400)
+
+        self.assertEqual(clients[outsider].get(f"/api/groups/scheduled_time/free/{group.id}/").status_code, 403)
+        response = clients[member].get("/api/groups/scheduled_time/free/999/")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.data, {"message": "Group not found"})
+
+
+class GroupCalendarViewTest(TestCase):
+    def setUp(self):
+        self.user = UserAccount.objects.create_user(
+            email="member@ashesi.edu.gh", password="Passw0rd!", firstname="Ama", lastname="Mensah", mobile_number="0200000001"
+        )
+        self.algorithms, self.databases = [
+            StudyGroup.objects.create(name=name, major="Computer Science", creator=self.user, whatsAppLink="https://chat.whatsapp.com/x")
+            for name in ("Algorithms", "Databases")
+        ]
+        GroupMembers.objects.bulk_create([GroupMembers(group=group, member=self.user) for group in (self.algorithms, self.databases)])
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}")
+
+    def test_requires_authentication(self):
+        self.assertEqual(APIClient().get("/api/groups/calendar/").status_code, 401)
+
+    def test_weekly_calendar_of_the_users_groups(self):
+        first = GroupScheduledTime.objects.create(group=self.algorithms, day=0, start_time="10:00", end_time="12:00")
+        overlapping = GroupScheduledTime.objects.create(group=self.databases, day=0, start_time="11:00", end_time="13:00")
+        touching = GroupScheduledTime.objects.create(group=self.databases, day=0, start_time="13:00", end_time="14:00")
+        wednesday = GroupScheduledTime.objects.create(group=self.algorithms, day=2, start_time="09:00", end_time="10:00")
+        outsider = UserAccount.objects.create_user(
+            email="outsider@ashesi.edu.gh", password="Passw0rd!", firstname="Kofi", lastname="Boateng", mobile_number="0200000002"
+        )
+        other_group = StudyGroup.objects.create(name="Networks", major="Computer Science", creator=outsider, whatsAppLink="https://chat.whatsapp.com/y")
+        GroupScheduledTime.objects.create(group=other_group, day=0, start_time="10:30", end_time="11:30")
+
+        response = self.client.get("/api/groups/calendar/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(day["day"], day["conflicts"]) for day in response.data], [("Monday", 2), ("Wednesday", 0)])
+
+        monday = response.data[0]["sessions"]
+        self.assertEqual(
+            [(session["id"], session["group_name"], session["conflict"]) for session in monday],
+            [(first.id, "Algorithms", True), (overlapping.id, "Databases", True), (touching.id, "Databases", False)],
+        )
+        self.assertEqual(monday[0], {
+            "id": first.id, "group": self.algorithms.id, "day": "Monday", "start_time": "10:00:00", "end_time": "12:00:00",
+            "interval_weeks": 1, "starts_on": first.starts_on.isoformat(), "ends_on": None,
+            "group_name": "Algorithms", "conflict": True,
+        })
+        self.assertEqual([session["id"] for session in response.data[1]["sessions"]], [wednesday.id])
+
+    def test_only_running_schedules_conflict(self):
+        today = datetime.date.today()
+        current = GroupScheduledTime.objects.create(group=self.algorithms, day=0, start_time="10:00", end_time="12:00")
+        expired = GroupScheduledTime.objects.create(
+            group=self.databases, day=0, start_time="11:00", end_time="13:00",
+            starts_on=today - datetime.timedelta(days=60), ends_on=today - datetime.timedelta(days=30),
+        )
+
+        response = self.client.get("/api/groups/calendar/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [{"day": "Monday", "sessions": [response.data[0]["sessions"][0]], "conflicts": 0}])
+        self.assertEqual(response.data[0]["sessions"][0]["id"], current.id)
+        self.assertFalse(response.data[0]["sessions"][0]["conflict"])
+
+        # a range both run in
+        start = (today - datetime.timedelta(days=45)).isoformat()
+        response = self.client.get(f"/api/groups/calendar/?start={start}&end={today.isoformat()}")
+        self.assertEqual([session["id"] for session in response.data[0]["sessions"]], [current.id, expired.id])
+        self.assertEqual(response.data[0]["conflicts"], 2)
+
+        self.assertEqual(self.client.get("/api/groups/calendar/?start=2024-05-08&end=2024-05-01").status_code, 400)
+
+
+class RecurrenceTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = UserAccount.objects.create_user(
+            email="member@ashesi.edu.gh", password="Passw0rd!", firstname="Ama", lastname="Mensah", mobile_number="0200000001"
+        )
+        cls.group = StudyGroup.objects.create(
+            name="Algorithms, Data; Structures", major="Computer Science", creator=user, whatsAppLink="https://chat.whatsapp.com/x"
+        )
+        # every other Monday from 2024-05-06 to 2024-06-03, and every Wednesday from 2024-05-01
+        cls.fortnightly = GroupScheduledTime.objects.create(
+            group=cls.group, day=0, start_time="10:00", end_time="11:00",
+            interval_weeks=2, starts_on=datetime.date(2024, 5, 1), ends_on=datetime.date(2024, 6, 3),
+        )
+        cls.weekly = GroupScheduledTime.objects.create(
+            group=cls.group, day=2, start_time="09:00", end_time="10:00", starts_on=datetime.date(2024, 5, 1),
+        )
+        GroupScheduledTimeException.objects.create(scheduled_time=cls.weekly, date=datetime.date(2024, 5, 8))
+
+    def scheduled_times(self):
+        return GroupScheduledTime.objects.select_related("group").prefetch_related("groupscheduledtimeexception_set").order_by("id")
+
+    def test_takes_place_on(self):
+        self.assertTrue(takes_place_on(self.fortnightly, datetime.date(2024, 5, 20)))
+        self.assertFalse(takes_place_on(self.fortnightly, datetime.date(2024, 5, 13)))  # off week
+        self.assertFalse(takes_place_on(self.fortnightly, datetime.date(2024, 6, 17)))  # after ends_on
+        self.assertFalse(takes_place_on(self.weekly, datetime.date(2024, 4, 24)))  # before starts_on
+        self.assertFalse(takes_place_on(self.weekly, datetime.date(2024, 5, 2)))  # a Thursday
+
+    def test_expand_merges_occurrences_in_start_order(self):
+        occurrences = expand(self.scheduled_times(), datetime.date(2024, 5, 1), datetime.date(2024, 6, 5))
+        self.assertEqual([(occurrence.scheduled_time.id, occurrence.start.date()) for occurrence in occurrences], [
+            (self.weekly.id, datetime.date(2024, 5, 1)),
+            (self.fortnightly.id, datetime.date(2024, 5, 6)),
+            # 2024-05-08 is an exception
+            (self.weekly.id, datetime.date(2024, 5, 15)),
+            (self.fortnightly.id, datetime.date(2024, 5, 20)),
+            (self.weekly.id, datetime.date(2024, 5, 22)),
+            (self.weekly.id, datetime.date(2024, 5, 29)),
+            (self.fortnightly.id, datetime.date(2024, 6, 3)),
+            (self.weekly.id, datetime.date(2024, 6, 5)),
+        ])
+
+    def test_expand_starts_inside_the_range(self):
+        occurrences = list(expand(self.scheduled_times(), datetime.date(2024, 5, 21), datetime.date(2024, 5, 28)))
+        self.assertEqual([occurrence.start.isoformat() for occurrence in occurrences], ["2024-05-22T09:00:00+00:00"])
+
+    def test_render_calendar(self):
+        calendar = render_calendar(self.scheduled_times())
+        self.assertTrue(calendar.startswith("BEGIN:VCALENDAR\r\n"))
+        self.assertTrue(calendar.endswith("END:VCALENDAR\r\n"))
+        self.assertIn("DTSTART;TZID=UTC:20240506T100000\r\n", calendar)
+        self.assertIn("RRULE:FREQ=WEEKLY;INTERVAL=2;BYDAY=MO;UNTIL=20240603T235959Z\r\n", calendar)
+        self.assertIn("RRULE:FREQ=WEEKLY;INTERVAL=1;BYDAY=WE\r\n", calendar)
+        self.assertIn("EXDATE;TZID=UTC:20240508T090000\r\n", calendar)
+        self.assertIn("SUMMARY:Algorithms\\, Data\\; Structures\r\n", calendar)
+
+    def test_long_lines_are_folded(self):
+        line = "SUMMARY:" + "é" * 60
+        folded = fold_line(line)
+        self.assertTrue(all(len(part.encode()) <= 75 for part in folded.split("\r\n")))
+        self.assertEqual(folded.replace("\r\n ", ""), line)
+
+    def test_exceptions_only_on_real_occurrences(self):
+        GroupMembers.objects.create(group=self.group, member=self.group.creator, is_admin=True)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.group.creator).access_token}")
+
+        path = f"/api/groups/scheduled_time/exceptions/add/{self.fortnightly.id}/"
+        self.assertEqual(client.post(path, {"date": "2024-05-13"}, format="json").status_code, 400)
+        self.assertEqual(client.post(path, {"date": "2024-06-17"}, format="json").status_code, 400)
+        self.assertEqual(client.post(path, {"date": "2024-05-20"}, format="json").status_code, 201)
+
+    def test_partial_update(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.group.creator).access_token}")
+        path = f"/api/groups/scheduled_time/update/{self.fortnightly.id}/"
+
+        for data in ({"end_time": "12:00"}, {"interval_weeks": 3}, {"ends_on": "2024-07-01"}, {"starts_on": "2024-05-06"}):
+            with self.subTest(data=data):
+                self.assertEqual(client.patch(path, data, format="json").status_code, 200)
+        self.fortnightly.refresh_from_db()
+        self.assertEqual(
+            (self.fortnightly.start_time, self.fortnightly.end_time, self.fortnightly.interval_weeks),
+            (datetime.time(10), datetime.time(12), 3),
+        )
+        self.assertEqual((self.fortnightly.starts_on, self.fortnightly.ends_on), (datetime.date(2024, 5, 6), datetime.date(2024, 7, 1)))
+
+        # checked against the stored start and end
+        for data in ({"end_time": "10:00"}, {"start_time": "12:30"}, {"ends_on": "2024-05-01"}, {"starts_on": "2024-07-02"}):
+            with self.subTest(data=data):
+                self.assertEqual(client.patch(path, data, format="json").status_code, 400)
+
+    def test_feed_etag_follows_the_groups(self):
+        GroupMembers.objects.create(group=self.group, member=self.group.creator)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.group.creator).access_token}")
+        url = client.get("/api/groups/calendar/feed/").data["url"]
+
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+
+        self.group.name = "Algorithms II"
+        self.group.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"SUMMARY:Algorithms II", response.content)
+
+
+def at(value):
+    return datetime.datetime.fromisoformat(value).replace(tzinfo=datetime.timezone.utc)
+
+
+class ReminderSchedulerTest(TestCase):
+    def setUp(self):
+        self.creator, self.member = [
+            UserAccount.objects.create_user(
+                email=f"user{i}@ashesi.edu.gh", password="Passw0rd!", firstname="Ama", lastname="Mensah", mobile_number=f"020000000{i}"
+            )
+            for i in range(2)
+        ]
+        self.group = StudyGroup.objects.create(name="Algorithms", major="Computer Science", creator=self.creator, whatsAppLink="https://chat.whatsapp.com/x")
+        GroupMembers.objects.create(group=self.group, member=self.creator, is_admin=True)
+        GroupMembers.objects.create(group=self.group, member=self.member)
+        # Mondays at 10:00 from 2024-05-06
+        self.session = GroupScheduledTime.objects.create(
+            group=self.group, day=0, start_time="10:00", end_time="11:00", starts_on=datetime.date(2024, 5, 6),
+        )
+        self.scheduler = ReminderScheduler(lead_time=datetime.timedelta(minutes=30))
+
+    def messages(self):
+        return sorted(Notification.objects.values_list("user_id", "message"))
+
+    def test_reminders_are_sent_once_when_due(self):
+        created = NOTIFICATIONS_CREATED.registry.values["counter"].get(NOTIFICATIONS_CREATED.key({}), 0)
+
+        self.assertEqual(self.scheduler.tick(at("2024-05-06T09:29:30")), 0)
+        # version check, members, one insert: the indexed session is not read again
+        with self.assertNumQueries(3):
+            self.assertEqual(self.scheduler.tick(at("2024-05-06T09:30:10")), 2)
+        self.assertEqual(self.scheduler.tick(at("2024-05-06T09:31:00")), 0)
+
+        self.assertEqual(self.messages(), [
+            (self.creator.id, "Reminder: Algorithms meets today at 10:00"),
+            (self.member.id, "Reminder: Algorithms meets today at 10:00"),
+        ])
+        self.assertEqual(NOTIFICATIONS_CREATED.registry.values["counter"][NOTIFICATIONS_CREATED.key({})], created + 2)
+
+    def test_missed_buckets_are_caught_up(self):
+        self.scheduler.tick(at("2024-05-06T09:00:00"))
+        self.assertEqual(self.scheduler.tick(at("2024-05-06T09:45:00")), 2)
+
+    def test_reminder_before_midnight_names_the_day(self):
+        self.session.day, self.session.start_time = 1, datetime.time(0, 15)
+        self.session.save()
+
+        self.scheduler.tick(at("2024-05-06T23:40:00"))
+        self.assertEqual(self.scheduler.tick(at("2024-05-06T23:45:00")), 2)
+        self.assertEqual(self.messages()[0][1], "Reminder: Algorithms meets tomorrow at 00:15")
+
+    def test_idle_tick_reads_only_the_due_window(self):
+        self.scheduler.tick(at("2024-05-06T08:00:00"))
+        with self.assertNumQueries(1):
+            self.assertEqual(self.scheduler.tick(at("2024-05-06T08:01:00")), 0)
+
+    def test_changes_after_indexing_are_picked_up(self):
+        self.scheduler.tick(at("2024-05-06T08:00:00"))
+
+        # a new session, and the indexed one cancelled the way the exception views do it
+        GroupScheduledTime.objects.create(group=self.group, day=0, start_time="08:40", end_time="09:00", starts_on=datetime.date(2024, 5, 6))
+        GroupScheduledTimeException.objects.create(scheduled_time=self.session, date=datetime.date(2024, 5, 6))
+        self.session.save(update_fields=["updated_at"])
+
+        self.assertEqual(self.scheduler.tick(at("2024-05-06T08:10:00")), 2)
+        self.assertEqual(self.scheduler.tick(at("2024-05-06T09:30:00")), 0)
+        self.assertEqual(self.messages()[0][1], "Reminder: Algorithms meets today at 08:40")
+
+    def test_moved_session_is_not_sent_at_the_old_time(self):
+        self.scheduler.tick(at("2024-05-06T08:00:00"))
+        self.session.start_time = datetime.time(11, 0)
+        self.session.save()
+
+        self.assertEqual(self.scheduler.tick(at("2024-05-06T09:30:00")), 0)
+        self.assertEqual(self.scheduler.tick(at("2024-05-06T10:30:00")), 2)
+
+
+class GroupInterestsTest(TestCase):
+    def setUp(self):
+        user = UserAccount.objects.create_user(
+            email="member@ashesi.edu.gh", password="Passw0rd!", firstname="Ama", lastname="Mensah", mobile_number="0200000001"
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+    def interests(self, response):
+        return sorted(interest["interest"] for interest in response.data["interests"])
+
+    def test_create_and_update_responses_list_the_new_interests(self):
+        response = self.client.post("/api/groups/create/", {
+            "name": "Algorithms", "major": "Computer Science", "whatsAppLink": "https://chat.whatsapp.com/x",
+            "interests": ["Networks", "Data Science", "Astrology"],
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.interests(response), ["Data Science", "Networks"])
+
+        response = self.client.patch(f"/api/groups/update/{response.data['id']}/", {"interests": ["Networks", "Machine Learning"]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.interests(response), ["Data Science", "Machine Learning", "Networks"])
+
+
+class BatchMembershipRequestsTest(TestCase):
+    def setUp(self):
+        self.admin, *self.applicants = [
+            UserAccount.objects.create_user(
+                email=f"user{i}@ashesi.edu.gh", password="Passw0rd!", firstname="Ama", lastname=f"Mensah{i}", mobile_number=f"020000000{i}"
+            )
+            for i in range(4)
+        ]
+        self.group = StudyGroup.objects.create(name="Algorithms", major="Computer Science", creator=self.admin, whatsAppLink="https://chat.whatsapp.com/x")
+        self.other_group = StudyGroup.objects.create(name="Databases", major="Computer Science", creator=self.admin, whatsAppLink="https://chat.whatsapp.com/y")
+        GroupMembers.objects.create(group=self.group, member=self.admin, is_admin=True)
+        self.requests = [GroupMembershipRequest.objects.create(group=self.group, user=user) for user in self.applicants]
+        self.other_request = GroupMembershipRequest.objects.create(group=self.other_group, user=self.applicants[0])
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.admin).access_token}")
+
+    def post(self, action, data, group_id=None):
+        return self.client.post(f"/api/groups/membership/requests/{action}/{group_id or self.group.id}/", data, format="json")
+
+    def test_accept_only_the_listed_requests_of_the_group(self):
+        first, second, third = self.requests
+        response = self.post("accept", {"request_ids": [first.id, second.id, self.other_request.id]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(response.data["accepted"]), [first.id, second.id])
+
+        self.assertEqual(
+            set(GroupMembers.objects.filter(group=self.group).values_list("member_id", flat=True)),
+            {self.admin.id, first.user_id, second.user_id},
+        )
+        remaining = set(GroupMembershipRequest.objects.values_list("id", flat=True))
+        self.assertEqual(remaining, {third.id, self.other_request.id})
+
+    def test_reject_all_pending_requests_of_the_group(self):
+        response = self.post("reject", {"all": True})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(response.data["rejected"]), [request.id for request in self.requests])
+
+        self.assertEqual(list(GroupMembershipRequest.objects.values_list("id", flat=True)), [self.other_request.id])
+        self.assertEqual(GroupMembers.objects.filter(group=self.group).count(), 1)
+
+    def test_applicants_and_admins_are_notified(self):
+        first, second, _ = self.requests
+        self.post("accept", {"request_ids": [first.id, second.id]})
+
+        for membership_request in (first, second):
+            self.assertEqual(
+                list(Notification.objects.filter(user_id=membership_request.user_id).values_list("message", flat=True)),
+                ["Your request to join the group Algorithms was accepted"],
+            )
+        self.assertEqual(Notification.objects.filter(user=self.admin).count(), 2)
+        self.assertFalse(Notification.objects.filter(user_id=self.requests[2].user_id).exists())
+
+    def test_invalid_request_ids(self):
+        for data in ({}, {"request_ids": "1"}, {"request_ids": [True]}, {"request_ids": [self.requests[0].id, False]}, {"all": "true"}):
+            self.assertEqual(self.post("accept", data).status_code, 400, data)
+        self.assertEqual(GroupMembershipRequest.objects.count(), 4)
+
+    def test_group_is_touched_once(self):
+        GroupMembershipRequest.objects.bulk_create([
+            GroupMembershipRequest(group=self.group, user=UserAccount.objects.create_user(
+                email=f"extra{i}@ashesi.edu.gh", password="Passw0rd!", firstname="Ama", lastname="Mensah", mobile_number=f"021000000{i}"
+            ))
+            for i in range(7)
+        ])
+        for action in ("accept", "reject"):
+            with self.subTest(action=action), CaptureQueriesContext(connection) as queries:
+                before = StudyGroup.objects.get(id=self.group.id).updated_at
+                request_ids = list(GroupMembershipRequest.objects.filter(group=self.group).values_list("id", flat=True))[:5]
+                self.assertEqual(self.post(action, {"request_ids": request_ids}).status_code, 200)
+                touches = [query for query in queries if query["sql"].startswith('UPDATE "groups_studygroup"')]
+                self.assertEqual(len(touches), 1)
+                self.assertGreater(StudyGroup.objects.get(id=self.group.id).updated_at, before)
+
+    def test_missing_group(self):
+        response = self.post("reject", {"all": True}, group_id=self.other_group.id + 1)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.data, {"message": "Group not found"})
+
+    def test_only_admins(self):
+        response = self.post("accept", {"all": True}, group_id=self.other_group.id)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(GroupMembershipRequest.objects.count(), 4)
+
+
+class MembershipConstraintsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserAccount.objects.create_user(
+            email="member@ashesi.edu.gh", password="Passw0rd!", firstname="Ama", lastname="Mensah", mobile_number="0200000001"
+        )
+        cls.group = StudyGroup.objects.create(
+            name="Algorithms", major="Computer Science", creator=cls.user, whatsAppLink="https://chat.whatsapp.com/x"
+        )
+
+    def test_duplicate_member_rejected(self):
+        GroupMembers.objects.create(group=self.group, member=self.user)
+        with self.assertRaises(IntegrityError):
+            GroupMembers.objects.create(group=self.group, member=self.user)
+
+    def test_duplicate_membership_request_rejected(self):
+        GroupMembershipRequest.objects.create(group=self.group, user=self.user)
+        with self.assertRaises(IntegrityError):
+            GroupMembershipRequest.objects.create(group=self.group, user=self.user)
+
+    def test_group_interests_upsert_is_idempotent(self):
+        for _ in range(2):
+            GroupInterests.objects.bulk_create(
+                [GroupInterests(group=self.group, interest="Machine Learning")], ignore_conflicts=True
+            )
+        self.assertEqual(GroupInterests.objects.filter(group=self.group).count(), 1)
+
+
+@skipUnless(connection.vendor == "sqlite", "query plans are SQLite specific")
+class MembershipQueryPlanTest(TestCase):
+    def test_membership_lookup_uses_composite_index(self):
+        plan = query_plan(GroupMembers.objects.filter(group_id=1, member_id=1, is_admin=True))
+        self.assertIn("(group_id=? AND member_id=?)", plan)
+
+    def test_group_admins_use_partial_index(self):
+        plan = query_plan(GroupMembers.objects.filter(group_id=1, is_admin=True))
+        self.assertIn("USING INDEX group_admins_idx", plan)
+
+    def test_membership_request_lookup_uses_composite_index(self):
+        plan = query_plan(GroupMembershipRequest.objects.filter(group_id=1, user_id=1))
+        self.assertIn("(group_id=? AND user_id=?)", plan)
+
+    def test_group_interest_lookup_uses_composite_index(self):
+        plan = query_plan(GroupInterests.objects.filter(group_id=1, interest="Machine Learning"))
+        self.assertIn("(group_id=? AND interest=?)", plan)
+
+    def test_weekly_schedule_order_uses_index(self):
+        plan = query_plan(GroupScheduledTime.objects.order_by("day", "start_time"))
+        self.assertNotIn("TEMP B-TREE", plan)
+
+
+class RecommendGroupTest(TestCase):
+    def test_same_major_first_then_shared_interests(self):
+        user, creator = [
+            UserAccount.objects.create_user(
+                email=f"member{i}@ashesi.edu.gh", password="Passw0rd!", firstname="Ama", lastname="Mensah", mobile_number=f"020000000{i}"
+            )
+            for i in range(2)
+        ]
+        UserProfile.objects.create(user=user, major="Computer Science", date_of_birth=datetime.date(2000, 1, 1))
+        UserInterest.objects.create(user=user, interest="Networks")
+        UserInterest.objects.create(user=user, interest="Data Science")
+
+        def group(name, major, *interests):
+            study_group = StudyGroup.objects.create(name=name, major=major, creator=creator, whatsAppLink="https://chat.whatsapp.com/x")
+            for interest in interests:
+                GroupInterests.objects.create(group=study_group, interest=interest)
+            return study_group
+
+        group("Economics", "Business Administration")
+        data_science = group("Data", "Electrical Engineering", "Data Science")
+        networks = group("Networks", "Computer Engineering", "Networks", "Data Science")
+        algorithms = group("Algorithms", "Computer Science", "Networks")
+        joined = group("Joined", "Computer Science")
+        GroupMembers.objects.create(group=joined, member=user)
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+        response = client.get("/api/groups/recommend/")
+        self.assertEqual(response.status_code, 200)
+        ids = [group["id"] for group in response.data]
+        # the same major first, then each group sharing an interest once
+        self.assertEqual(ids[0], algorithms.id)
+        self.assertEqual(sorted(ids[1:]), sorted([networks.id, data_science.id]))
+
+
+class AsyncViewParityTest(AsyncParityTestMixin, TestCase):
+    def setUp(self):
+        self.user, creator = [
+            UserAccount.objects.create_user(
+                email=f"member{i}@ashesi.edu.gh", password="Passw0rd!", firstname="Ama", lastname="Mensah", mobile_number=f"020000000{i}"
+            )
+            for i in range(2)
+        ]
+        UserProfile.objects.create(user=self.user, major="Computer Science", date_of_birth=datetime.date(2000, 1, 1))
+        UserInterest.objects.create(user=self.user, interest="Networks")
+        self.group = StudyGroup.objects.create(name="Algorithms", major="Computer Science", creator=creator, whatsAppLink="https://chat.whatsapp.com/x")
+        networks = StudyGroup.objects.create(name="Networks", major="Computer Engineering", creator=creator, whatsAppLink="https://chat.whatsapp.com/y")
+        GroupInterests.objects.create(group=networks, interest="Networks")
+        joined = StudyGroup.objects.create(name="Joined", major="Computer Science", creator=creator, whatsAppLink="https://chat.whatsapp.com/z")
+        GroupMembers.objects.create(group=joined, member=self.user)
+        self.headers = {"Authorization": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+
+    def test_group_reads(self):
+        path = f"/api/groups/{self.group.id}/"
+        response = self.assertSameResponse(RetrieveStudyGroupView, AsyncRetrieveStudyGroupView, path, headers=self.headers, group_id=self.group.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertSameResponse(
+            RetrieveStudyGroupView, AsyncRetrieveStudyGroupView, path,
+            headers={**self.headers, "If-None-Match": response["ETag"]}, group_id=self.group.id,
+        )
+        self.assertSameResponse(RetrieveStudyGroupView, AsyncRetrieveStudyGroupView, "/api/groups/0/", headers=self.headers, group_id=0)
+        self.assertSameResponse(ListStudyGroupsView, AsyncListStudyGroupsView, "/api/groups/list/", headers=self.headers)
+
+    def test_admin_group_read(self):
+        # the async view loads the membership requests and the shared fragment without sync queries,
+        # which would raise SynchronousOnlyOperation on the event loop
+        GroupMembers.objects.create(group=self.group, member=self.user, is_admin=True)
+        GroupMembershipRequest.objects.create(group=self.group, user=self.group.creator)
+        GroupScheduledTime.objects.create(group=self.group, day=0, start_time="10:00", end_time="11:00")
+        caches["fragments"].clear()
+
+        path = f"/api/groups/{self.group.id}/"
+        response = self.assertSameResponse(RetrieveStudyGroupView, AsyncRetrieveStudyGroupView, path, headers=self.headers, group_id=self.group.id)
+        self.assertEqual(len(response.data["membership_requests"]), 1)
+        self.assertEqual(len(response.data["members"]), 1)
+        self.assertEqual(len(response.data["scheduled_times"]), 1)
+
+    def test_recommendations(self):
+        response = self.assertSameResponse(RecommendGroupView, AsyncRecommendGroupView, "/api/groups/recommend/", headers=self.headers)
+        self.assertEqual([group["name"] for group in response.data], ["Algorithms", "Networks"])
+
+    def test_recommendations_without_profile(self):
+        UserProfile.objects.filter(user=self.user).delete()
+        response = self.assertSameResponse(RecommendGroupView, AsyncRecommendGroupView, "/api/groups/recommend/", headers=self.headers)
+        self.assertEqual([group["name"] for group in response.data], ["Networks"])
+
+    def test_errors(self):
+        path = "/api/groups/list/"
+        self.assertEqual(self.assertSameResponse(ListStudyGroupsView, AsyncListStudyGroupsView, path).status_code, 401)
+        response = self.assertSameResponse(ListStudyGroupsView, AsyncListStudyGroupsView, path, headers={"Authorization": "Bearer nonsense"})
+        self.assertEqual(response.status_code, 401)
+        response = self.assertSameResponse(ListStudyGroupsView, AsyncListStudyGroupsView, path, method="post", headers=self.headers)
+        self.assertEqual(response.status_code, 405)
+
+    def test_options(self):
+        response = self.assertSameResponse(ListStudyGroupsView, AsyncListStudyGroupsView, "/api/groups/list/", method="options", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["name"], "List Study Groups")
+        path = f"/api/groups/{self.group.id}/"
+        self.assertSameResponse(
+            RetrieveStudyGroupView, AsyncRetrieveStudyGroupView, path, method="options", headers=self.headers, group_id=self.group.id
+        )
+        response = self.assertSameResponse(ListStudyGroupsView, AsyncListStudyGroupsView, "/api/groups/list/", method="options")
+        self.assertEqual(response.status_code, 401)
+
+    def test_single_renderer(self):
+        # as installed with LEAN_STARTUP, where the response does not vary by Accept
+        class SyncView(ListStudyGroupsView):
+            renderer_classes = [ORJSONRenderer]
+
+        class AsyncView(AsyncListStudyGroupsView):
+            renderer_classes = [ORJSONRenderer]
+
+        for method in ("get", "options", "post"):
+            with self.subTest(method=method):
+                response = self.assertSameResponse(SyncView, AsyncView, "/api/groups/list/", method=method, headers=self.headers)
+                self.assertNotIn("Vary", response)
+
+
+class GroupRosterTest(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            UserAccount.objects.create_user(
+                email=f"member{i}@ashesi.edu.gh", password="Passw0rd!", firstname="Ama", lastname=f"Mensah{i}", mobile_number=f"02000000{i:02}"
+            )
+            for i in range(12)
+        ]
+        cls.group = StudyGroup.objects.create(
+            name="Algorithms", major="Computer Science", creator=cls.users[0], whatsAppLink="https://chat.whatsapp.com/x"
+        )
+        # the creator and two admins
+        GroupMembers.objects.bulk_create([GroupMembers(group=cls.group, member=user, is_admin=i < 3) for i, user in enumerate(cls.users)])
+        for user in cls.users[:2]:
+            UserProfile.objects.create(user=user, major="Computer Science", date_of_birth=datetime.date(2000, 1, 1))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.users[5]).access_token}")
+
+    def test_roster_within_budget(self):
+        response = self.client.get(f"/api/groups/members/roster/{self.group.id}/")
+        self.assertEqual(len(response.data["results"]), 12)
+        self.assertWithinQueryBudget(response)
+
+    def test_every_page_within_budget(self):
+        member_ids = []
+        response = self.client.get(f"/api/groups/members/roster/{self.group.id}/?page_size=5")
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertWithinQueryBudget(response)
+            member_ids += [member["member"] for member in response.data["results"]]
+            if response.data["next"] is None:
+                break
+            response = self.client.get(response.data["next"])
+        self.assertEqual(member_ids, [user.id for user in self.users])
+
+    def test_roles(self):
+        response = self.client.get(f"/api/groups/members/roster/{self.group.id}/")
+        roles = {member["member"]: member["role"] for member in response.data["results"]}
+        self.assertEqual(roles[self.users[0].id], "creator")
+        self.assertEqual([roles[user.id] for user in self.users[1:4]], ["admin", "admin", "member"])
+        self.assertEqual(set(roles.values()), {"creator", "admin", "member"})
+
+    def test_admins_filter(self):
+        for value in ("true", "1"):
+            with self.subTest(admins=value):
+                response = self.client.get(f"/api/groups/members/roster/{self.group.id}/?admins={value}")
+                self.assertEqual(
+                    [(member["member"], member["role"]) for member in response.data["results"]],
+                    [(self.users[0].id, "creator"), (self.users[1].id, "admin"), (self.users[2].id, "admin")],
+                )
+                self.assertWithinQueryBudget(response)
+
+        response = self.client.get(f"/api/groups/members/roster/{self.group.id}/?admins=false")
+        self.assertEqual(len(response.data["results"]), 12)
+
+    def test_members_only(self):
+        outsider = UserAccount.objects.create_user(
+            email="outsider@ashesi.edu.gh", password="Passw0rd!", firstname="Kofi", lastname="Boateng", mobile_number="0210000000"
+        )
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(outsider).access_token}")
+        self.assertEqual(client.get(f"/api/groups/members/roster/{self.group.id}/").status_code, 403)
+
+
+class CompiledSerializerTest(TestCase):
+    def test_rows_match_model_serializers(self):
+        user = UserAccount.objects.create_user(
+            email="member@ashesi.edu.gh", password="Passw0rd!", firstname="Ama", lastname="Mensah", mobile_number="0200000001"
+        )
+        group = StudyGroup.objects.create(
+            name="Algorithms", major="Computer Science", creator=user, whatsAppLink="https://chat.whatsapp.com/x"
+        )
+        GroupMembers.objects.create(group=group, member=user, is_admin=True)
+        GroupScheduledTime.objects.create(group=group, day=2, start_time="10:00", end_time="11:30")
+        GroupScheduledTime.objects.create(group=group, day=4, start_time="14:00", end_time="15:00", interval_weeks=2, ends_on="2030-01-01")
+
+        members, times = GroupMembers.objects.all(), GroupScheduledTime.objects.all()
+        self.assertEqual(group_member_rows.serialize(members), GroupMembersSerializer(members, many=True).data)
+        self.assertEqual(scheduled_time_rows.serialize(times), GroupScheduledTimeSerializer(times, many=True).data)
+
+
+class CompressionTest(TestCase):
+    def test_large_lists_are_gzipped(self):
+        user = UserAccount.objects.create_user(
+            email="member@ashesi.edu.gh", password="Passw0rd!", firstname="Ama", lastname="Mensah", mobile_number="0200000001"
+        )
+        group = StudyGroup.objects.create(
+            name="Algorithms", major="Computer Science", creator=user, whatsAppLink="https://chat.whatsapp.com/x"
+        )
+        GroupScheduledTime.objects.bulk_create([
+            GroupScheduledTime(group=group, day=day, start_time="10:00", end_time="11:00") for day in range(7) for _ in range(5)
+        ])
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+        plain = client.get("/api/groups/scheduled_time/list/")
+        compressed = client.get("/api/groups/scheduled_time/list/", HTTP_ACCEPT_ENCODING="gzip;q=1, identity;q=0.5")
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertEqual(compressed["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", compressed["Vary"])
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+
+
+class GroupConditionalGetTest(TestCase):
+    def test_group_etag_follows_related_rows(self):
+        user = UserAccount.objects.create_user(
+            email="member@ashesi.edu.gh", password="Passw0rd!", firstname="Ama", lastname="Mensah", mobile_number="0200000001"
+        )
+        group = StudyGroup.objects.create(
+            name="Algorithms", major="Computer Science", creator=user, whatsAppLink="https://chat.whatsapp.com/x"
+        )
+        GroupMembers.objects.create(group=group, member=user, is_admin=True)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+        for path in (f"/api/groups/{group.id}/", "/api/groups/list/"):
+            etag = client.get(path)["ETag"]
+            # compressed responses carry the weak form
+            self.assertEqual(client.get(path, HTTP_IF_NONE_MATCH=f"W/{etag}").status_code, 304)
+
+            GroupScheduledTime.objects.create(group=group, day=0, start_time="10:00", end_time="11:00")
+            self.assertEqual(client.get(path, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class GroupFragmentCacheTest(TestCase):
+    def setUp(self):
+        caches["fragments"].clear()
+
+    def test_shared_part_is_cached_and_invalidated(self):
+        creator, member = [
+            UserAccount.objects.create_user(
+                email=f"member{i}@ashesi.edu.gh", password="Passw0rd!", firstname="Ama", lastname="Mensah", mobile_number=f"020000000{i}"
+            )
+            for i in range(2)
+        ]
+        group = StudyGroup.objects.create(
+            name="Algorithms", major="Computer Science", creator=creator, whatsAppLink="https://chat.whatsapp.com/x"
+        )
+        GroupMembers.objects.bulk_create([GroupMembers(group=group, member=creator, is_admin=True), GroupMembers(group=group, member=member)])
+        GroupMembershipRequest.objects.create(group=group, user=UserAccount.objects.create_user(
+            email="applicant@ashesi.edu.gh", password="Passw0rd!", firstname="Kofi", lastname="Boateng", mobile_number="0200000009"
+        ))
+        clients = {}
+        for user in (creator, member):
+            clients[user] = APIClient()
+            clients[user].credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+        admin_view = clients[creator].get(f"/api/groups/{group.id}/").data
+        with self.assertNumQueries(5):
+            # user, blacklist, ETag version, group and roles; the rest comes from the fragment
+            member_view = clients[member].get(f"/api/groups/{group.id}/").data
+        self.assertEqual(len(admin_view["membership_requests"]), 1)
+        self.assertEqual({**member_view, "membership_requests": admin_view["membership_requests"]}, admin_view)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            GroupInterests.objects.create(group=group, interest="Finance")
+        self.assertIsNone(caches["fragments"].get(group_fragment_key(group.id)))
+        self.assertEqual(clients[member].get(f"/api/groups/{group.id}/").data["interests"][0]["interest"], "Finance")
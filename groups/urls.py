@@ -1,27 +1,41 @@
 from django.urls import path
+
+from accounts.async_views import select_view
+from .async_views import AsyncListStudyGroupsView, AsyncRetrieveStudyGroupView, AsyncRecommendGroupView
 from .views import (
     CreateStudyGroupView, ListStudyGroupsView, RetrieveStudyGroupView, UpdateStudyGroupView, DeleteStudyGroupView,
     RemoveGroupInterestView, RecommendGroupView, LeaveStudyGroupView,
     CreateGroupScheduledTimeView, ListGroupScheduledTimesView, UpdateGroupScheduledTimeView, DeleteGroupScheduledTimeView,
+    GroupCalendarView, ListGroupFreeTimesView, ListUpcomingGroupSessionsView,
+    CreateGroupScheduledTimeExceptionView, DeleteGroupScheduledTimeExceptionView,
+    GroupCalendarFeedLinkView, GroupCalendarFeedView,
     RequestGroupMembershipView, ListYourMembershipRequestsView, DeleteGroupMembershipRequestView, 
     ListGroupMembershipRequestsView, AcceptGroupMembershipRequestView, RejectGroupMembershipRequestView,
-    ListGroupMembersView, MakeGroupMemberAdminView, RemoveGroupMemberAdminView, RemoveGroupMemberView
+    BatchAcceptGroupMembershipRequestsView, BatchRejectGroupMembershipRequestsView,
+    ListGroupMembersView, GroupRosterView, MakeGroupMemberAdminView, RemoveGroupMemberAdminView, RemoveGroupMemberView
 )
 
 urlpatterns = [
     path("create/", CreateStudyGroupView.as_view(), name="create_group"),
-    path("list/", ListStudyGroupsView.as_view(), name="list_groups"),
-    path("<int:group_id>/", RetrieveStudyGroupView.as_view(), name="retrieve_group"),
+    path("list/", select_view(ListStudyGroupsView, AsyncListStudyGroupsView), name="list_groups"),
+    path("<int:group_id>/", select_view(RetrieveStudyGroupView, AsyncRetrieveStudyGroupView), name="retrieve_group"),
     path("update/<int:group_id>/", UpdateStudyGroupView.as_view(), name="update_group"),
     path("delete/<int:group_id>/", DeleteStudyGroupView.as_view(), name="delete_group"),
     path("interests/remove/<int:interest_id>/", RemoveGroupInterestView.as_view(), name="remove_interest"),
     path("leave/<int:group_id>/", LeaveStudyGroupView.as_view(), name="leave_group"),
-    path("recommend/", RecommendGroupView.as_view(), name="recommend_group"),
+    path("recommend/", select_view(RecommendGroupView, AsyncRecommendGroupView), name="recommend_group"),
 
     path("scheduled_time/create/<int:group_id>/", CreateGroupScheduledTimeView.as_view(), name="create_scheduled_time"),
     path("scheduled_time/list/", ListGroupScheduledTimesView.as_view(), name="list_scheduled_times"),
     path("scheduled_time/update/<int:time_id>/", UpdateGroupScheduledTimeView.as_view(), name="update_scheduled_time"),
     path("scheduled_time/delete/<int:time_id>/", DeleteGroupScheduledTimeView.as_view(), name="delete_scheduled_time"),
+    path("scheduled_time/free/<int:group_id>/", ListGroupFreeTimesView.as_view(), name="list_free_times"),
+    path("scheduled_time/upcoming/", ListUpcomingGroupSessionsView.as_view(), name="list_upcoming_sessions"),
+    path("scheduled_time/exceptions/add/<int:time_id>/", CreateGroupScheduledTimeExceptionView.as_view(), name="create_scheduled_time_exception"),
+    path("scheduled_time/exceptions/delete/<int:exception_id>/", DeleteGroupScheduledTimeExceptionView.as_view(), name="delete_scheduled_time_exception"),
+    path("calendar/", GroupCalendarView.as_view(), name="calendar"),
+    path("calendar/feed/", GroupCalendarFeedLinkView.as_view(), name="calendar_feed_link"),
+    path("calendar/<str:token>.ics", GroupCalendarFeedView.as_view(), name="calendar_feed"),
 
     path("membership/request/<int:group_id>/", RequestGroupMembershipView.as_view(), name="request_membership"),
     path("membership/requests/list/", ListYourMembershipRequestsView.as_view(), name="list_your_membership_requests"),
@@ -30,8 +44,11 @@ urlpatterns = [
     path("membership/requests/list/<int:group_id>/", ListGroupMembershipRequestsView.as_view(), name="list_membership_requests"),
     path("membership/request/accept/<int:request_id>/", AcceptGroupMembershipRequestView.as_view(), name="accept_membership_request"),
     path("membership/request/reject/<int:request_id>/", RejectGroupMembershipRequestView.as_view(), name="reject_membership_request"),
+    path("membership/requests/accept/<int:group_id>/", BatchAcceptGroupMembershipRequestsView.as_view(), name="batch_accept_membership_requests"),
+    path("membership/requests/reject/<int:group_id>/", BatchRejectGroupMembershipRequestsView.as_view(), name="batch_reject_membership_requests"),
 
     path("members/list/<int:group_id>/", ListGroupMembersView.as_view(), name="list_members"),
+    path("members/roster/<int:group_id>/", GroupRosterView.as_view(), name="group_roster"),
     path("members/admin/make/<int:group_member_id>/", MakeGroupMemberAdminView.as_view(), name="make_admin"),
     path("members/admin/remove/<int:group_member_id>/", RemoveGroupMemberAdminView.as_view(), name="remove_admin"),
     path("members/remove/<int:group_member_id>/", RemoveGroupMemberView.as_view(), name="remove_member"),
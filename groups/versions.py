@@ -0,0 +1,41 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.utils import timezone
+
+from .models import StudyGroup
+
+# the group ids collected by an enclosing touch_groups_once block
+deferred_touches = ContextVar("deferred_touches", default=None)
+
+
+def touch_groups(*group_ids):
+    # moves the groups' ETags when a row their representation includes changes
+    deferred = deferred_touches.get()
+    if deferred is not None:
+        deferred.update(group_ids)
+        return
+    StudyGroup.objects.filter(id__in=group_ids).update(updated_at=timezone.now())
+
+
+@contextmanager
+def touch_groups_once():
+    """Collect the touch_groups calls of the block, e.g. from the row signals
+    of a queryset delete, and touch each group with one UPDATE at its end."""
+    group_ids = set()
+    token = deferred_touches.set(group_ids)
+    try:
+        yield
+    finally:
+        deferred_touches.reset(token)
+    if group_ids:
+        touch_groups(*group_ids)
+
+
+def group_version(request, group_id):
+    return StudyGroup.objects.filter(id=group_id).values_list("id", "updated_at")
+
+
+def member_groups_version(request):
+    # the groups ListStudyGroupsView lists, in one join through the user's memberships
+    return StudyGroup.objects.filter(groupmembers__member=request.user).order_by("id").values_list("id", "updated_at")
@@ -1,22 +1,56 @@
+import datetime
+import hashlib
+from itertools import islice
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
 from rest_framework import status, generics
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.parsers import FormParser
 
 from .models import (
-    StudyGroup, GroupInterests, GroupMembers, GroupScheduledTime, GroupMembershipRequest
+    StudyGroup, GroupInterests, GroupMembers, GroupScheduledTime, GroupScheduledTimeException,
+    GroupMembershipRequest
 )
 from accounts.models import Interest, Notification, UserInterest, UserProfile
 from .serializers import (
-    StudyGroupSerializer, GroupMembersSerializer, GroupScheduledTimeSerializer,
-    GroupMembershipRequestSerializer
+    StudyGroupSerializer, GroupScheduledTimeSerializer,
+    GroupScheduledTimeExceptionSerializer, GroupMembershipRequestSerializer, GroupRosterSerializer,
+    group_member_rows, scheduled_time_rows
 )
 from accounts.permissions import AccessBlacklisted
+from accounts.uploads import ImageMultiPartParser
+from accounts.unit_of_work import atomic_mutation
+from StudyAlly.conditional import conditional_get
+from StudyAlly.fastjson import ORJSONParser
+from StudyAlly.metrics import RECOMMENDATIONS_SERVED
+from .schedule import weekly_timeline, weekly_free_windows, expand, takes_place_on
+from .ical import render_calendar
+from .pagination import GroupRosterPagination
+from .permissions import IsGroupAdmin, IsGroupMember
+from .fragments import invalidate_group_fragments
+from .roles import get_group_roles
+from .versions import group_version, member_groups_version, touch_groups, touch_groups_once
+
+
+CALENDAR_FEED_SALT = "groups.calendar.feed"
+UPCOMING_SESSIONS_LIMIT = 100
 
 
 class CreateStudyGroupView(APIView):
     permission_classes = [IsAuthenticated, AccessBlacklisted]
+    parser_classes = [ORJSONParser, FormParser, ImageMultiPartParser]
 
+    @atomic_mutation
     def post(self, request):
         serializer = StudyGroupSerializer(data=request.data, context={"request": request})
         if serializer.is_valid():
@@ -24,19 +58,21 @@ class CreateStudyGroupView(APIView):
 
             # add group interests
             if "interests" in request.data:
-                for interest in request.data["interests"]:
-                    if interest in Interest:
-                        GroupInterests.objects.create(group=study_group, interest=interest)
+                # written right away rather than at commit, the response lists them
+                GroupInterests.objects.bulk_create(
+                    [GroupInterests(group=study_group, interest=interest) for interest in request.data["interests"] if interest in Interest],
+                    ignore_conflicts=True,
+                )
 
             # add creator as group member
             GroupMembers.objects.create(group=study_group, member=request.user, is_admin=True)
 
             # create notification
-            Notification.objects.create(
+            self.unit_of_work.add(Notification(
                 user=study_group.creator,
                 message=f"You created the group {study_group.name} on {study_group.date_created}",
 
-            )
+            ))
 
             return Response(StudyGroupSerializer(study_group, context={"request": request}).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -45,9 +81,10 @@ class CreateStudyGroupView(APIView):
 class RetrieveStudyGroupView(APIView):
     permission_classes = [IsAuthenticated, AccessBlacklisted]
 
+    @conditional_get(group_version)
     def get(self, request, group_id):
         try:
-            study_group = StudyGroup.objects.get(id=group_id)
+            study_group = StudyGroup.objects.select_related("creator").get(id=group_id)
         except StudyGroup.DoesNotExist:
             return Response({"message": "Group not found"}, status=status.HTTP_404_NOT_FOUND)
         
@@ -62,13 +99,18 @@ class ListStudyGroupsView(generics.ListAPIView):
 
     def get_queryset(self):
         # retrieve groups the user is part of
-        user_groups = GroupMembers.objects.filter(member=self.request.user)
-        return [group.group for group in user_groups]
+        return StudyGroup.objects.filter(id__in=get_group_roles(self.request).member_group_ids()).select_related("creator")
+
+    @conditional_get(member_groups_version)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
 
 
 class UpdateStudyGroupView(APIView):
     permission_classes = [IsAuthenticated, AccessBlacklisted]
+    parser_classes = [ORJSONParser, FormParser, ImageMultiPartParser]
 
+    @atomic_mutation
     def patch(self, request, group_id):
         try:
             study_group = StudyGroup.objects.get(id=group_id)
@@ -88,9 +130,11 @@ class UpdateStudyGroupView(APIView):
 
             # update group interests
             if "interests" in request.data:
-                for interest in request.data["interests"]:
-                    if interest in Interest and not GroupInterests.objects.filter(group=study_group, interest=interest).exists():
-                        GroupInterests.objects.create(group=study_group, interest=interest)
+                # written right away rather than at commit, the response lists them
+                GroupInterests.objects.bulk_create(
+                    [GroupInterests(group=study_group, interest=interest) for interest in request.data["interests"] if interest in Interest],
+                    ignore_conflicts=True,
+                )
 
             return Response(StudyGroupSerializer(study_group, context={"request": request}).data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -99,6 +143,7 @@ class UpdateStudyGroupView(APIView):
 class RemoveGroupInterestView(APIView):
     permission_classes = [IsAuthenticated, AccessBlacklisted]
 
+    @atomic_mutation
     def delete(self, request, interest_id):
         try:
             group_interest = GroupInterests.objects.get(id=interest_id)
@@ -106,7 +151,7 @@ class RemoveGroupInterestView(APIView):
             return Response({"message": "Interest not found"}, status=status.HTTP_404_NOT_FOUND)
         
         # ensure user is the creator of the group
-        if group_interest.group.creator != request.user:
+        if not get_group_roles(request).is_creator(group_interest.group_id):
             return Response({"message": "You do not have permission to remove this interest"}, status=status.HTTP_403_FORBIDDEN)
         
         group_interest.delete()
@@ -116,6 +161,7 @@ class RemoveGroupInterestView(APIView):
 class DeleteStudyGroupView(APIView):
     permission_classes = [IsAuthenticated, AccessBlacklisted]
 
+    @atomic_mutation
     def delete(self, request, group_id):
         try:
             study_group = StudyGroup.objects.get(id=group_id)
@@ -123,7 +169,7 @@ class DeleteStudyGroupView(APIView):
             return Response({"message": "Group not found"}, status=status.HTTP_404_NOT_FOUND)
         
         # ensure user is the creator of the group
-        if study_group.creator != request.user:
+        if not get_group_roles(request).is_creator(study_group.id):
             return Response({"message": "You do not have permission to delete this group"}, status=status.HTTP_403_FORBIDDEN)
         
         # ensure no members are in the group aside the creator
@@ -131,10 +177,10 @@ class DeleteStudyGroupView(APIView):
             return Response({"message": "You cannot delete a group with members"}, status=status.HTTP_400_BAD_REQUEST)
         
         # create notification
-        Notification.objects.create(
+        self.unit_of_work.add(Notification(
             user=study_group.creator,
             message=f"You deleted the group {study_group.name}!",
-        )
+        ))
 
         study_group.delete()
         return Response({"message": "Group deleted"}, status=status.HTTP_200_OK)
@@ -150,25 +196,30 @@ class RecommendGroupView(APIView):
         recommended_groups = []
         groups_to_remove = []
 
+        # users without a profile have no major, only their interests count
+        user_profile = UserProfile.objects.filter(user=request.user).first()
+        major = user_profile.major if user_profile is not None else None
+
         # get groups with the same major as the user
         for index, group in enumerate(possible_groups):
-            if group.major == UserProfile.objects.filter(user=request.user).first().major:
+            if group.major == major:
                 recommended_groups.append(group)
 
                 # remove group from possible groups
                 groups_to_remove.append(group)
 
         # remove recommended groups from possible groups before checking for similar interests
-        possible_groups = possible_groups.exclude(pk__in=[group.pk for group in groups_to_remove])
+        possible_groups = list(possible_groups.exclude(pk__in=[group.pk for group in groups_to_remove]))
 
         # get groups with similar interests as the user
         user_interests = UserInterest.objects.filter(user=request.user)
         for interest in user_interests:
-            for group in possible_groups:
+            for group in list(possible_groups):
                 if GroupInterests.objects.filter(group=group, interest=interest.interest).exists():
                     recommended_groups.append(group)
-                    possible_groups.pop(possible_groups.index(group))
+                    possible_groups.remove(group)
 
+        RECOMMENDATIONS_SERVED.inc(len(recommended_groups))
         serializer = StudyGroupSerializer(recommended_groups, context={"request": request}, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
     
@@ -176,6 +227,7 @@ class RecommendGroupView(APIView):
 class LeaveStudyGroupView(APIView):
     permission_classes = [IsAuthenticated, AccessBlacklisted]
 
+    @atomic_mutation
     def delete(self, request, group_id):
         try:
             group = StudyGroup.objects.get(id=group_id)
@@ -190,43 +242,40 @@ class LeaveStudyGroupView(APIView):
         group_member.delete()
 
         # create notification for user
-        Notification.objects.create(
+        self.unit_of_work.add(Notification(
             user=request.user,
             message=f"You left the group {group.name}",
-        )
+        ))
 
         # notify all admin members of the group
         group_members = GroupMembers.objects.filter(group=group, is_admin=True)
         for member in group_members:
-            Notification.objects.create(
-                user=member.member,
+            self.unit_of_work.add(Notification(
+                user_id=member.member_id,
                 message=f"{request.user.firstname} {request.user.lastname} left the group {group.name}",
 
-            )
+            ))
 
         return Response({"message": "You have left the group"}, status=status.HTTP_200_OK)
     
 
 class CreateGroupScheduledTimeView(APIView):
-    permission_classes = [IsAuthenticated, AccessBlacklisted]
+    permission_classes = [IsAuthenticated, AccessBlacklisted, IsGroupAdmin]
 
+    @atomic_mutation
     def post(self, request, group_id):
         serializer = GroupScheduledTimeSerializer(data=request.data)
         if serializer.is_valid():
-            # ensure user is an admin of the group
-            if not GroupMembers.objects.filter(group_id=group_id, member=request.user, is_admin=True).exists():
-                return Response({"message": "You do not have permission to create a scheduled time"}, status=status.HTTP_403_FORBIDDEN)
-            
             group_scheduled_time = serializer.save(group_id=group_id)
 
             # notify all admin members of the group
             group_members = GroupMembers.objects.filter(group_id=group_id, is_admin=True)
             for member in group_members:
-                Notification.objects.create(
-                    user=member.member,
+                self.unit_of_work.add(Notification(
+                    user_id=member.member_id,
                     message=f"{request.user.firstname} {request.user.lastname} created a scheduled time for the group {group_scheduled_time.group.name}",
     
-                )
+                ))
 
             return Response(GroupScheduledTimeSerializer(group_scheduled_time).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -237,10 +286,107 @@ class ListGroupScheduledTimesView(generics.ListAPIView):
     queryset = GroupScheduledTime.objects.all()
     serializer_class = GroupScheduledTimeSerializer
 
+    def list(self, request, *args, **kwargs):
+        return Response(scheduled_time_rows.serialize(self.get_queryset()), status=status.HTTP_200_OK)
+
+
+def requested_date_range(request, start_param="start", end_param="end"):
+    """The (start_date, end_date) of e.g. ?start=2024-05-01&end=2024-05-31,
+    the next week by default, or an error Response."""
+    try:
+        start_date = datetime.date.fromisoformat(request.query_params.get(start_param, timezone.localdate().isoformat()))
+        end_date = datetime.date.fromisoformat(
+            request.query_params.get(end_param, (start_date + datetime.timedelta(days=7)).isoformat())
+        )
+    except ValueError:
+        return Response({"message": "Invalid start or end date"}, status=status.HTTP_400_BAD_REQUEST)
+    if end_date < start_date or (end_date - start_date).days > 366:
+        return Response({"message": "Invalid date range"}, status=status.HTTP_400_BAD_REQUEST)
+
+    return start_date, end_date
+
+
+def active_between(start_date, end_date):
+    # scheduled times whose recurrence overlaps the dates
+    return (Q(ends_on__isnull=True) | Q(ends_on__gte=start_date)) & Q(starts_on__lte=end_date)
+
+
+class GroupCalendarView(APIView):
+    permission_classes = [IsAuthenticated, AccessBlacklisted]
+
+    def get(self, request):
+        # only the schedules running in the date range, e.g. ?start=2024-05-01&end=2024-05-31 (defaults to the next week)
+        result = requested_date_range(request)
+        if isinstance(result, Response):
+            return result
+        start_date, end_date = result
+
+        # scheduled times of the user's groups in a single join through their memberships
+        scheduled_times = GroupScheduledTime.objects.filter(
+            active_between(start_date, end_date), group__groupmembers__member=request.user
+        ).select_related("group").distinct().order_by("day", "start_time")
+
+        calendar = []
+        for day, times, conflicts in weekly_timeline(scheduled_times):
+            sessions = []
+            for time in times:
+                session = GroupScheduledTimeSerializer(time).data
+                session["group_name"] = time.group.name
+                session["conflict"] = time.id in conflicts
+                sessions.append(session)
+            calendar.append({"day": day, "sessions": sessions, "conflicts": len(conflicts)})
+
+        return Response(calendar, status=status.HTTP_200_OK)
+
+
+class ListGroupFreeTimesView(APIView):
+    permission_classes = [IsAuthenticated, AccessBlacklisted]
+
+    def get(self, request, group_id):
+        try:
+            group = StudyGroup.objects.get(id=group_id)
+        except StudyGroup.DoesNotExist:
+            return Response({"message": "Group not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        # ensure user is a member of the group
+        if not get_group_roles(request).is_member(group.id):
+            return Response({"message": "You are not a member of this group"}, status=status.HTTP_403_FORBIDDEN)
+
+        # optional window to search within, e.g. ?start=08:00&end=20:00
+        try:
+            day_start = datetime.time.fromisoformat(request.query_params.get("start", "00:00"))
+            day_end = datetime.time.fromisoformat(request.query_params.get("end", "23:59:59"))
+        except ValueError:
+            return Response({"message": "Invalid start or end time"}, status=status.HTTP_400_BAD_REQUEST)
+        if day_start >= day_end:
+            return Response({"message": "Start time must be less than end time"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # only schedules running in the date range count, e.g. ?start_date=2024-05-01&end_date=2024-05-31
+        result = requested_date_range(request, "start_date", "end_date")
+        if isinstance(result, Response):
+            return result
+        start_date, end_date = result
+
+        # other groups' scheduled times of every member, in one query
+        busy_times = GroupScheduledTime.objects.filter(
+            active_between(start_date, end_date),
+            group__groupmembers__member__in=GroupMembers.objects.filter(group=group).values("member"),
+        ).exclude(group=group).values_list("day", "start_time", "end_time").distinct()
+
+        free_times = []
+        for day, windows in weekly_free_windows(busy_times, day_start, day_end):
+            free_times.append({
+                "day": day,
+                "free": [{"start_time": start, "end_time": end} for start, end in windows],
+            })
+
+        return Response(free_times, status=status.HTTP_200_OK)
+
 
 class UpdateGroupScheduledTimeView(APIView):
     permission_classes = [IsAuthenticated, AccessBlacklisted]
 
+    @atomic_mutation
     def patch(self, request, time_id):
         try:
             group_scheduled_time = GroupScheduledTime.objects.get(id=time_id)
@@ -254,11 +400,11 @@ class UpdateGroupScheduledTimeView(APIView):
             # notify all admin members of the group
             group_members = GroupMembers.objects.filter(group=group_scheduled_time.group, is_admin=True)
             for member in group_members:
-                Notification.objects.create(
-                    user=member.member,
+                self.unit_of_work.add(Notification(
+                    user_id=member.member_id,
                     message=f"{request.user.firstname} {request.user.lastname} updated a scheduled time for the group {group_scheduled_time.group.name}",
     
-                )
+                ))
 
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -267,6 +413,7 @@ class UpdateGroupScheduledTimeView(APIView):
 class DeleteGroupScheduledTimeView(APIView):
     permission_classes = [IsAuthenticated, AccessBlacklisted]
 
+    @atomic_mutation
     def delete(self, request, time_id):
         try:
             group_scheduled_time = GroupScheduledTime.objects.get(id=time_id)
@@ -278,34 +425,156 @@ class DeleteGroupScheduledTimeView(APIView):
         # notify all admin members of the group
         group_members = GroupMembers.objects.filter(group=group_scheduled_time.group, is_admin=True)
         for member in group_members:
-            Notification.objects.create(
-                user=member.member,
+            self.unit_of_work.add(Notification(
+                user_id=member.member_id,
                 message=f"{request.user.firstname} {request.user.lastname} deleted a scheduled time for the group {group_scheduled_time.group.name}",
 
-            )
+            ))
 
         return Response({"message": "Scheduled time deleted"}, status=status.HTTP_200_OK)
 
 
+class ListUpcomingGroupSessionsView(APIView):
+    permission_classes = [IsAuthenticated, AccessBlacklisted]
+
+    def get(self, request):
+        # date range to expand, e.g. ?start=2024-05-01&end=2024-05-31 (defaults to the next week)
+        result = requested_date_range(request)
+        if isinstance(result, Response):
+            return result
+        start_date, end_date = result
+
+        scheduled_times = GroupScheduledTime.objects.filter(
+            active_between(start_date, end_date), group__groupmembers__member=request.user,
+        ).select_related("group").prefetch_related("groupscheduledtimeexception_set").distinct()
+
+        # occurrences are generated lazily, only the first page is ever built
+        sessions = []
+        for occurrence in islice(expand(scheduled_times, start_date, end_date), UPCOMING_SESSIONS_LIMIT):
+            sessions.append({
+                "scheduled_time": occurrence.scheduled_time.id,
+                "group": occurrence.scheduled_time.group.id,
+                "group_name": occurrence.scheduled_time.group.name,
+                "start": occurrence.start,
+                "end": occurrence.end,
+            })
+
+        return Response(sessions, status=status.HTTP_200_OK)
+
+
+class CreateGroupScheduledTimeExceptionView(APIView):
+    permission_classes = [IsAuthenticated, AccessBlacklisted]
+
+    @atomic_mutation
+    def post(self, request, time_id):
+        try:
+            group_scheduled_time = GroupScheduledTime.objects.select_related("group").get(id=time_id)
+        except GroupScheduledTime.DoesNotExist:
+            return Response({"message": "Scheduled time not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        # ensure user is an admin of the group
+        if not get_group_roles(request).is_admin(group_scheduled_time.group_id):
+            return Response({"message": "You do not have permission to cancel this scheduled time"}, status=status.HTTP_403_FORBIDDEN)
+
+        serializer = GroupScheduledTimeExceptionSerializer(data=request.data)
+        if serializer.is_valid():
+            date = serializer.validated_data["date"]
+            if not takes_place_on(group_scheduled_time, date):
+                return Response({"message": "The scheduled time does not take place on this date"}, status=status.HTTP_400_BAD_REQUEST)
+
+            exception, _ = GroupScheduledTimeException.objects.get_or_create(scheduled_time=group_scheduled_time, date=date)
+
+            # bump the version so calendar feeds pick up the change
+            group_scheduled_time.save(update_fields=["updated_at"])
+
+            return Response(GroupScheduledTimeExceptionSerializer(exception).data, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class DeleteGroupScheduledTimeExceptionView(APIView):
+    permission_classes = [IsAuthenticated, AccessBlacklisted]
+
+    @atomic_mutation
+    def delete(self, request, exception_id):
+        try:
+            exception = GroupScheduledTimeException.objects.select_related("scheduled_time").get(id=exception_id)
+        except GroupScheduledTimeException.DoesNotExist:
+            return Response({"message": "Exception not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        # ensure user is an admin of the group
+        if not get_group_roles(request).is_admin(exception.scheduled_time.group_id):
+            return Response({"message": "You do not have permission to delete this exception"}, status=status.HTTP_403_FORBIDDEN)
+
+        exception.delete()
+        exception.scheduled_time.save(update_fields=["updated_at"])
+        return Response({"message": "Exception deleted"}, status=status.HTTP_200_OK)
+
+
+class GroupCalendarFeedLinkView(APIView):
+    permission_classes = [IsAuthenticated, AccessBlacklisted]
+
+    def get(self, request):
+        # calendar apps can't send the JWT, so the feed url carries a signed user id
+        token = signing.Signer(salt=CALENDAR_FEED_SALT).sign(str(request.user.id))
+        url = request.build_absolute_uri(reverse("calendar_feed", kwargs={"token": token}))
+        return Response({"url": url}, status=status.HTTP_200_OK)
+
+
+class GroupCalendarFeedView(APIView):
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request, token):
+        try:
+            user_id = signing.Signer(salt=CALENDAR_FEED_SALT).unsign(token)
+        except signing.BadSignature:
+            return HttpResponse(status=status.HTTP_404_NOT_FOUND)
+
+        scheduled_times = GroupScheduledTime.objects.filter(group__groupmembers__member_id=user_id)
+
+        # fingerprint of every row the feed is rendered from: the scheduled times (exceptions bump
+        # their updated_at) and their groups, whose name and link are in the events
+        version = scheduled_times.order_by("id").values_list("id", "updated_at", "group_id", "group__updated_at").distinct()
+        etag = '"%s"' % hashlib.md5(repr((user_id, list(version))).encode()).hexdigest()
+
+        headers = {"ETag": etag, "Cache-Control": f"private, max-age={settings.CALENDAR_FEED_MAX_AGE}"}
+        response = get_conditional_response(request, etag=etag, response=HttpResponse(headers=headers))
+        if response.status_code != status.HTTP_200_OK:
+            return response
+
+        cache_key = f"groups:calendar:{user_id}:{etag}"
+        calendar = cache.get(cache_key)
+        if calendar is None:
+            calendar = render_calendar(
+                scheduled_times.select_related("group").prefetch_related("groupscheduledtimeexception_set").distinct()
+            )
+            cache.set(cache_key, calendar, settings.CALENDAR_FEED_CACHE_TIMEOUT)
+
+        return HttpResponse(calendar, content_type="text/calendar; charset=utf-8", headers=headers)
+
+
 class RequestGroupMembershipView(APIView):
     permission_classes = [IsAuthenticated, AccessBlacklisted]
 
+    @atomic_mutation
     def post(self, request, group_id):
         try:
             group = StudyGroup.objects.get(id=group_id)
         except StudyGroup.DoesNotExist:
             return Response({"message": "Group not found"}, status=status.HTTP_404_NOT_FOUND)
         
-        GroupMembershipRequest.objects.create(group=group, user=request.user)
+        _, created = GroupMembershipRequest.objects.get_or_create(group=group, user=request.user)
+        if not created:
+            return Response({"message": "Membership request already sent"}, status=status.HTTP_200_OK)
 
         # notify all admin members of the group
         group_members = GroupMembers.objects.filter(group=group, is_admin=True)
         for member in group_members:
-            Notification.objects.create(
-                user=member.member,
+            self.unit_of_work.add(Notification(
+                user_id=member.member_id,
                 message=f"{request.user.firstname} {request.user.lastname} requested to join the group {group.name}",
 
-            )
+            ))
 
         return Response({"message": "Membership request sent"}, status=status.HTTP_201_CREATED)
     
@@ -322,6 +591,7 @@ class ListYourMembershipRequestsView(APIView):
 class DeleteGroupMembershipRequestView(APIView):
     permission_classes = [IsAuthenticated, AccessBlacklisted]
 
+    @atomic_mutation
     def delete(self, request, request_id):
         try:
             membership_request = GroupMembershipRequest.objects.get(id=request_id)
@@ -342,7 +612,7 @@ class ListGroupMembershipRequestsView(APIView):
             return Response({"message": "Group not found"}, status=status.HTTP_404_NOT_FOUND)
         
         # ensure user is an admin of the group
-        if not GroupMembers.objects.filter(group=group, member=request.user, is_admin=True).exists():
+        if not get_group_roles(request).is_admin(group.id):
             return Response({"message": "You do not have permission to view membership requests"}, status=status.HTTP_403_FORBIDDEN)
         
         membership_requests = GroupMembershipRequest.objects.filter(group=group)
@@ -353,6 +623,7 @@ class ListGroupMembershipRequestsView(APIView):
 class AcceptGroupMembershipRequestView(APIView):
     permission_classes = [IsAuthenticated, AccessBlacklisted]
 
+    @atomic_mutation
     def post(self, request, request_id):
                 
         try:
@@ -361,27 +632,27 @@ class AcceptGroupMembershipRequestView(APIView):
             return Response({"message": "Membership request not found"}, status=status.HTTP_404_NOT_FOUND)
         
         # ensure user is an admin of the group
-        if not GroupMembers.objects.filter(group=membership_request.group, member=request.user, is_admin=True).exists():
+        if not get_group_roles(request).is_admin(membership_request.group_id):
             return Response({"message": "You do not have permission to accept membership requests"}, status=status.HTTP_403_FORBIDDEN)
         
         # create group member
-        GroupMembers.objects.create(group=membership_request.group, member=membership_request.user)
+        GroupMembers.objects.get_or_create(group=membership_request.group, member=membership_request.user)
         membership_request.delete()
 
         # create notification for user
-        Notification.objects.create(
+        self.unit_of_work.add(Notification(
             user=membership_request.user,
             message=f"Your request to join the group {membership_request.group.name} was accepted",
-        )
+        ))
 
         # notify all admin members of the group
         group_members = GroupMembers.objects.filter(group=membership_request.group, is_admin=True)
         for member in group_members:
-            Notification.objects.create(
-                user=member.member,
+            self.unit_of_work.add(Notification(
+                user_id=member.member_id,
                 message=f"{request.user.firstname} {request.user.lastname} accepted {membership_request.user.firstname} {membership_request.user.lastname}'s request to join the group {membership_request.group.name}",
 
-            )
+            ))
 
         return Response({"message": "Membership request accepted"}, status=status.HTTP_200_OK)
     
@@ -389,6 +660,7 @@ class AcceptGroupMembershipRequestView(APIView):
 class RejectGroupMembershipRequestView(APIView):
     permission_classes = [IsAuthenticated, AccessBlacklisted]
 
+    @atomic_mutation
     def delete(self, request, request_id):
         try:
             membership_request = GroupMembershipRequest.objects.get(id=request_id)
@@ -396,27 +668,134 @@ class RejectGroupMembershipRequestView(APIView):
             return Response({"message": "Membership request not found"}, status=status.HTTP_404_NOT_FOUND)
         
         # ensure user is an admin of the group
-        if not GroupMembers.objects.filter(group=membership_request.group, member=request.user, is_admin=True).exists():
+        if not get_group_roles(request).is_admin(membership_request.group_id):
             return Response({"message": "You do not have permission to reject membership requests"}, status=status.HTTP_403_FORBIDDEN)
         
         membership_request.delete()
 
         # create notification for user
-        Notification.objects.create(
+        self.unit_of_work.add(Notification(
             user=membership_request.user,
             message=f"Your request to join the group {membership_request.group.name} was rejected",
-        )
+        ))
 
         # notify all admin members of the group
         group_members = GroupMembers.objects.filter(group=membership_request.group, is_admin=True)
         for member in group_members:
-            Notification.objects.create(
-                user=member.member,
+            self.unit_of_work.add(Notification(
+                user_id=member.member_id,
                 message=f"{request.user.firstname} {request.user.lastname} rejected {membership_request.user.firstname} {membership_request.user.lastname}'s request to join the group {membership_request.group.name}",
 
-            )
+            ))
         return Response({"message": "Membership request rejected"}, status=status.HTTP_200_OK)
-    
+
+
+def get_batch_membership_requests(request, group_id):
+    """Resolve the requests a batch accept/reject applies to.
+
+    Returns (group, admin ids, membership requests) or an error Response. The
+    body is either {"request_ids": [...]} or {"all": true} for every pending
+    request of the group.
+    """
+    try:
+        group = StudyGroup.objects.get(id=group_id)
+    except StudyGroup.DoesNotExist:
+        return Response({"message": "Group not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    # ensure user is an admin of the group
+    if not get_group_roles(request).is_admin(group.id):
+        return Response({"message": "You are not an admin of this group"}, status=status.HTTP_403_FORBIDDEN)
+
+    admin_ids = list(GroupMembers.objects.filter(group=group, is_admin=True).values_list("member_id", flat=True))
+
+    membership_requests = GroupMembershipRequest.objects.filter(group=group).select_related("user")
+    if request.data.get("all") is not True:
+        request_ids = request.data.get("request_ids")
+        # bool is a subclass of int, but true is not a request id
+        if not isinstance(request_ids, list) or not all(
+            isinstance(request_id, int) and not isinstance(request_id, bool) for request_id in request_ids
+        ):
+            return Response({"message": "Provide a list of request_ids or all"}, status=status.HTTP_400_BAD_REQUEST)
+        membership_requests = membership_requests.filter(id__in=request_ids)
+
+    return group, admin_ids, list(membership_requests)
+
+
+class BatchAcceptGroupMembershipRequestsView(APIView):
+    permission_classes = [IsAuthenticated, AccessBlacklisted]
+
+    @atomic_mutation
+    def post(self, request, group_id):
+        result = get_batch_membership_requests(request, group_id)
+        if isinstance(result, Response):
+            return result
+        group, admin_ids, membership_requests = result
+
+        # users that already joined are skipped by the unique constraint
+        new_members = {
+            membership_request.user_id: GroupMembers(group=group, member_id=membership_request.user_id)
+            for membership_request in membership_requests
+        }
+        with touch_groups_once():
+            GroupMembers.objects.bulk_create(new_members.values(), ignore_conflicts=True)
+            # bulk_create sends no signals
+            transaction.on_commit(lambda: invalidate_group_fragments(group.id))
+            touch_groups(group.id)
+
+            GroupMembershipRequest.objects.filter(id__in=[membership_request.id for membership_request in membership_requests]).delete()
+
+        # notify each user and all admin members of the group
+        notifications = []
+        for membership_request in membership_requests:
+            notifications.append(Notification(
+                user_id=membership_request.user_id,
+                message=f"Your request to join the group {group.name} was accepted",
+            ))
+            for admin_id in admin_ids:
+                notifications.append(Notification(
+                    user_id=admin_id,
+                    message=f"{request.user.firstname} {request.user.lastname} accepted {membership_request.user.firstname} {membership_request.user.lastname}'s request to join the group {group.name}",
+                ))
+        self.unit_of_work.add(*notifications)
+
+        return Response({
+            "message": f"{len(membership_requests)} membership requests accepted",
+            "accepted": [membership_request.id for membership_request in membership_requests],
+        }, status=status.HTTP_200_OK)
+
+
+class BatchRejectGroupMembershipRequestsView(APIView):
+    permission_classes = [IsAuthenticated, AccessBlacklisted]
+
+    @atomic_mutation
+    def post(self, request, group_id):
+        result = get_batch_membership_requests(request, group_id)
+        if isinstance(result, Response):
+            return result
+        group, admin_ids, membership_requests = result
+
+        with touch_groups_once():
+            GroupMembershipRequest.objects.filter(id__in=[membership_request.id for membership_request in membership_requests]).delete()
+
+        # notify each user and all admin members of the group
+        notifications = []
+        for membership_request in membership_requests:
+            notifications.append(Notification(
+                user_id=membership_request.user_id,
+                message=f"Your request to join the group {group.name} was rejected",
+            ))
+            for admin_id in admin_ids:
+                notifications.append(Notification(
+                    user_id=admin_id,
+                    message=f"{request.user.firstname} {request.user.lastname} rejected {membership_request.user.firstname} {membership_request.user.lastname}'s request to join the group {group.name}",
+                ))
+        self.unit_of_work.add(*notifications)
+
+        return Response({
+            "message": f"{len(membership_requests)} membership requests rejected",
+            "rejected": [membership_request.id for membership_request in membership_requests],
+        }, status=status.HTTP_200_OK)
+
 
 class ListGroupMembersView(APIView):
     permission_classes = [IsAuthenticated, AccessBlacklisted]
@@ -428,17 +807,33 @@ class ListGroupMembersView(APIView):
             return Response({"message": "Group not found"}, status=status.HTTP_404_NOT_FOUND)
         
         # ensure user is a member of the group
-        if not GroupMembers.objects.filter(group=group, member=request.user).exists():
+        if not get_group_roles(request).is_member(group.id):
             return Response({"message": "You are not a member of this group"}, status=status.HTTP_403_FORBIDDEN)
         
         group_members = GroupMembers.objects.filter(group=group)
-        serializer = GroupMembersSerializer(group_members, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(group_member_rows.serialize(group_members), status=status.HTTP_200_OK)
+    
+
+class GroupRosterView(generics.ListAPIView):
+    permission_classes = [IsAuthenticated, AccessBlacklisted, IsGroupMember]
+    serializer_class = GroupRosterSerializer
+    pagination_class = GroupRosterPagination
+    query_budget = 4
+
+    def get_queryset(self):
+        # members with their account and profile in one query, a page at a time
+        group_members = GroupMembers.objects.filter(group_id=self.kwargs["group_id"]).select_related(
+            "group", "member", "member__userprofile"
+        )
+        if self.request.query_params.get("admins") in ("true", "1"):
+            group_members = group_members.filter(is_admin=True)
+        return group_members
     
 
 class MakeGroupMemberAdminView(APIView):
     permission_classes = [IsAuthenticated, AccessBlacklisted]
 
+    @atomic_mutation
     def post(self, request, group_member_id):
         try:
             group_member = GroupMembers.objects.get(id=group_member_id)
@@ -446,26 +841,26 @@ class MakeGroupMemberAdminView(APIView):
             return Response({"message": "Group member not found"}, status=status.HTTP_404_NOT_FOUND)
         
         # ensure user is the creator of the group
-        if group_member.group.creator != request.user:
+        if not get_group_roles(request).is_creator(group_member.group_id):
             return Response({"message": "You do not have permission to make this user an admin"}, status=status.HTTP_403_FORBIDDEN)
                 
         group_member.is_admin = True
         group_member.save()
 
         # create notification for user
-        Notification.objects.create(
+        self.unit_of_work.add(Notification(
             user=group_member.member,
             message=f"You are now an admin of the group {group_member.group.name}",
-        )
+        ))
 
         # notify all admin members of the group
         group_members = GroupMembers.objects.filter(group=group_member.group, is_admin=True)
         for member in group_members:
-            Notification.objects.create(
-                user=member.member,
+            self.unit_of_work.add(Notification(
+                user_id=member.member_id,
                 message=f"{request.user.firstname} {request.user.lastname} made {group_member.member.firstname} {group_member.member.lastname} an admin of the group {group_member.group.name}",
 
-            )
+            ))
 
         return Response({"message": "Group member is now an admin"}, status=status.HTTP_200_OK)
     
@@ -473,6 +868,7 @@ class MakeGroupMemberAdminView(APIView):
 class RemoveGroupMemberAdminView(APIView):
     permission_classes = [IsAuthenticated, AccessBlacklisted]
 
+    @atomic_mutation
     def delete(self, request, group_member_id):
         try:
             group_member = GroupMembers.objects.get(id=group_member_id)
@@ -480,26 +876,26 @@ class RemoveGroupMemberAdminView(APIView):
             return Response({"message": "Group member not found"}, status=status.HTTP_404_NOT_FOUND)
         
         # ensure user is the creator of the group
-        if group_member.group.creator != request.user:
+        if not get_group_roles(request).is_creator(group_member.group_id):
             return Response({"message": "You do not have permission to remove this user as an admin"}, status=status.HTTP_403_FORBIDDEN)
                 
         group_member.is_admin = False
         group_member.save()
 
         # create notification for user
-        Notification.objects.create(
+        self.unit_of_work.add(Notification(
             user=group_member.member,
             message=f"You are no longer an admin of the group {group_member.group.name}",
-        )
+        ))
 
         # notify all admin members of the group
         group_members = GroupMembers.objects.filter(group=group_member.group, is_admin=True)
         for member in group_members:
-            Notification.objects.create(
-                user=member.member,
+            self.unit_of_work.add(Notification(
+                user_id=member.member_id,
                 message=f"{request.user.firstname} {request.user.lastname} removed {group_member.member.firstname} {group_member.member.lastname} as an admin of the group {group_member.group.name}",
 
-            )
+            ))
 
         return Response({"message": "Group member is no longer an admin"}, status=status.HTTP_200_OK)
 
@@ -507,6 +903,7 @@ class RemoveGroupMemberAdminView(APIView):
 class RemoveGroupMemberView(APIView):
     permission_classes = [IsAuthenticated, AccessBlacklisted]
 
+    @atomic_mutation
     def delete(self, request, group_member_id):
         try:
             group_member = GroupMembers.objects.get(id=group_member_id)
@@ -514,24 +911,24 @@ class RemoveGroupMemberView(APIView):
             return Response({"message": "Group member not found"}, status=status.HTTP_404_NOT_FOUND)
         
         # ensure user is the creator of the group
-        if group_member.group.creator != request.user:
+        if not get_group_roles(request).is_creator(group_member.group_id):
             return Response({"message": "You do not have permission to remove this user from the group"}, status=status.HTTP_403_FORBIDDEN)
                 
         group_member.delete()
 
         # create notification for user
-        Notification.objects.create(
+        self.unit_of_work.add(Notification(
             user=group_member.member,
             message=f"You were removed from the group {group_member.group.name}",
-        )
+        ))
 
         # notify all admin members of the group
         group_members = GroupMembers.objects.filter(group=group_member.group, is_admin=True)
         for member in group_members:
-            Notification.objects.create(
-                user=member.member,
+            self.unit_of_work.add(Notification(
+                user_id=member.member_id,
                 message=f"{request.user.firstname} {request.user.lastname} removed {group_member.member.firstname} {group_member.member.lastname} from the group {group_member.group.name}",
 
-            )
+            ))
 
         return Response({"message": "Group member removed"}, status=status.HTTP_200_OK)
\ No newline at end of file